@@ -0,0 +1,153 @@
+"""
+aggregate_cube.py — 월별 집계 큐브 (대시보드 / 월간 결산 / 보고서 공용)
+
+(연, 월, 사업장, 대분류, 소분류)별 입금·출금 합계와 건수를 미리 집계해 둡니다.
+file_engine이 원본 파일을 반영할 때 파일 하나의 큐브를 만들어 manifest에 함께 기록하고,
+조회할 때는 파일별 큐브를 더하기만 하므로 거래 행을 다시 훑지 않습니다.
+
+KPI 계산 기준 (기존 화면과 동일)
+  매출 = 대분류 '매출'의 입금, 판관비/기타비용/투자 = 해당 대분류의 출금
+  지출 = 판관비 + 기타비용 (투자는 손익에서 제외)
+"""
+
+import pandas as pd
+
+KEYS = ['연', '월', '사업장', '대분류', '소분류']
+VALUES = ['입금', '출금', '건수']
+COLUMNS = KEYS + VALUES
+
+# 대분류 → 합계에 쓰는 금액 컬럼
+AMOUNT_OF = {'매출': '입금', '판관비': '출금', '기타비용': '출금', '투자': '출금'}
+EXPENSE_CATEGORIES = ['판관비', '기타비용']
+
+
+def empty():
+    return pd.DataFrame({
+        '연': pd.Series(dtype='int64'), '월': pd.Series(dtype='int64'),
+        '사업장': pd.Series(dtype=object), '대분류': pd.Series(dtype=object), '소분류': pd.Series(dtype=object),
+        '입금': pd.Series(dtype='int64'), '출금': pd.Series(dtype='int64'), '건수': pd.Series(dtype='int64'),
+    })
+
+
+def build(rows, site=None):
+    """
+    거래 행 → 큐브 (날짜 없는 행 제외)
+    site: 사업장 (None이면 rows의 '사업장' 컬럼, 그것도 없으면 '기타')
+    """
+    if rows is None or rows.empty or '날짜' not in rows.columns:
+        return empty()
+    dates = pd.to_datetime(rows['날짜'], errors='coerce')
+    if site is None:
+        site = rows['사업장'].astype(str) if '사업장' in rows.columns else '기타'
+    frame = pd.DataFrame({
+        '연': dates.dt.year,
+        '월': dates.dt.month,
+        '사업장': site,
+        '대분류': _labels(rows, '대분류', '미분류'),
+        '소분류': _labels(rows, '소분류', ''),
+        '입금': pd.to_numeric(rows.get('입금', 0), errors='coerce'),
+        '출금': pd.to_numeric(rows.get('출금', 0), errors='coerce'),
+    }, index=rows.index)
+    frame = frame[dates.notna()]
+    if frame.empty:
+        return empty()
+    frame[['입금', '출금']] = frame[['입금', '출금']].fillna(0).round()
+    cube = frame.groupby(KEYS, sort=True).agg(입금=('입금', 'sum'), 출금=('출금', 'sum'), 건수=('입금', 'size'))
+    return _typed(cube.reset_index())
+
+
+def _labels(rows, col, default):
+    """분류 컬럼 → 문자열 (없거나 빈 값은 default)"""
+    if col not in rows.columns:
+        return default
+    values = rows[col].astype(object)
+    return values.where(values.notna(), default).astype(str)
+
+
+def _typed(cube):
+    return cube.astype({'연': 'int64', '월': 'int64', '입금': 'int64', '출금': 'int64', '건수': 'int64'})[COLUMNS]
+
+
+def combine(cubes):
+    """여러 큐브 합치기 (같은 키는 합산)"""
+    cubes = [c for c in cubes if c is not None and not c.empty]
+    if not cubes:
+        return empty()
+    if len(cubes) == 1:
+        return cubes[0]
+    merged = pd.concat(cubes, ignore_index=True).groupby(KEYS, sort=True)[VALUES].sum()
+    return _typed(merged.reset_index())
+
+
+def to_records(cube):
+    """큐브 → JSON 저장용 리스트 [[연, 월, 사업장, 대분류, 소분류, 입금, 출금, 건수], ...]"""
+    return [[int(r[0]), int(r[1]), r[2], r[3], r[4], int(r[5]), int(r[6]), int(r[7])]
+            for r in cube[COLUMNS].itertuples(index=False, name=None)]
+
+
+def from_records(records):
+    if not records:
+        return empty()
+    return _typed(pd.DataFrame(records, columns=COLUMNS))
+
+
+# =============================================================================
+# 조회
+# =============================================================================
+def select(cube, year=None, month=None, site=None):
+    """연/월/사업장으로 거르기 (None이면 전체)"""
+    mask = pd.Series(True, index=cube.index)
+    if year is not None:
+        mask &= cube['연'] == int(year)
+    if month is not None:
+        mask &= cube['월'] == int(month)
+    if site is not None:
+        mask &= cube['사업장'] == site
+    return cube[mask]
+
+
+def periods(cube):
+    """데이터가 있는 (연, 월) 목록 (오름차순)"""
+    return sorted(set(zip(cube['연'].tolist(), cube['월'].tolist())))
+
+
+def total(cube, category, sub=None, exclude_sub=None):
+    """대분류 합계 (매출은 입금, 나머지는 출금) — sub/exclude_sub로 소분류 지정/제외"""
+    part = cube[cube['대분류'] == category]
+    if sub is not None:
+        part = part[part['소분류'] == sub]
+    if exclude_sub is not None:
+        part = part[part['소분류'] != exclude_sub]
+    return int(part[AMOUNT_OF.get(category, '출금')].sum())
+
+
+def count(cube, category):
+    return int(cube.loc[cube['대분류'] == category, '건수'].sum())
+
+
+def summary(cube):
+    """KPI 합계 {'매출', '판관비', '기타비용', '투자', '지출', '순수익', '미분류_건수'}"""
+    out = {c: total(cube, c) for c in AMOUNT_OF}
+    out['지출'] = sum(out[c] for c in EXPENSE_CATEGORIES)
+    out['순수익'] = out['매출'] - out['지출']
+    out['미분류_건수'] = count(cube, '미분류')
+    return out
+
+
+def breakdown(cube, category):
+    """소분류별 합계 Series (내림차순, 0 포함 — 소분류가 빈 행은 제외), category: 대분류 또는 대분류 목록"""
+    categories = [category] if isinstance(category, str) else list(category)
+    part = cube[cube['대분류'].isin(categories) & (cube['소분류'] != '')]
+    if part.empty:
+        return pd.Series(dtype='int64')
+    return part.groupby('소분류')[AMOUNT_OF.get(categories[0], '출금')].sum().sort_values(ascending=False)
+
+
+def monthly(cube, year):
+    """연도의 월별 매출/지출/투자 DataFrame (월 오름차순, 데이터가 있는 달만)"""
+    part = select(cube, year)
+    rows = []
+    for month, mc in part.groupby('월', sort=True):
+        s = summary(mc)
+        rows.append({'월': int(month), '매출': s['매출'], '지출': s['지출'], '투자': s['투자']})
+    return pd.DataFrame(rows, columns=['월', '매출', '지출', '투자'])
@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import os
 import io
-import json
 import time
 import re
 from datetime import datetime
@@ -10,6 +9,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # [핵심] 파일 읽기 엔진
 import file_engine as engine
+import data_store
+import row_ids
+import xlsx_stream
 
 # =============================================================================
 # 1. 페이지 설정
@@ -19,6 +21,8 @@ st.set_page_config(page_title="통합 자금 관리 대시보드", layout="wide"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_ROOT = os.path.join(BASE_DIR, "workspaces")
 os.makedirs(UPLOAD_ROOT, exist_ok=True)
+LAYOUTS_FILE = engine.layouts_file_for(UPLOAD_ROOT)  # 은행/홈택스 양식 학습 저장 파일
+DB_FILE = data_store.db_path_for(UPLOAD_ROOT)  # 브랜드 지정 저장소 (finance.db)
 
 SAFE_COL_AMOUNT = "금액"
 
@@ -31,26 +35,16 @@ def get_file_hash(filepath):
         return f"{filepath}_{stat.st_mtime}_{stat.st_size}"
     except: return filepath
 
-@st.cache_data(ttl=3600)
-def get_cached_brand_map(work_dir, _cache_key):
-    p = os.path.join(work_dir, "brands.json")
-    if os.path.exists(p):
-        try:
-            with open(p, "r", encoding="utf-8") as f: return json.load(f)
-        except: return {}
-    return {}
-
 def load_brand_map(work_dir):
-    p = os.path.join(work_dir, "brands.json")
-    cache_key = get_file_hash(p) if os.path.exists(p) else "empty"
-    return get_cached_brand_map(work_dir, cache_key)
+    """작업 월의 브랜드 지정 (로컬 저장소 — 예전 brands.json은 처음 한 번 가져옴)"""
+    work = os.path.basename(work_dir)
+    try:
+        data_store.import_legacy_brands(DB_FILE, work, os.path.join(work_dir, "brands.json"))
+        return data_store.load_brands(DB_FILE, work)
+    except: return {}
 
 def save_brand_map(work_dir, data):
-    p = os.path.join(work_dir, "brands.json")
-    try:
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        get_cached_brand_map.clear()
+    try: data_store.save_brands(DB_FILE, os.path.basename(work_dir), data)
     except: pass
 
 def extract_brand_auto(client_name):
@@ -70,7 +64,7 @@ def extract_brand_auto(client_name):
 # =============================================================================
 @st.cache_data(ttl=3600, show_spinner=False)
 def read_file_cached(filepath, filename, col_info, file_hash):
-    return engine.read_single_file(filepath, filename, col_info)
+    return engine.read_single_file(filepath, filename, col_info, layouts_path=LAYOUTS_FILE)
 
 def load_folder_parallel(path, col_info, max_workers=4):
     files = sorted([f for f in os.listdir(path) if f.endswith((".xlsx", ".xls", ".csv")) and not f.startswith("~$") and not f.startswith("month_") and not f.endswith("brands.json")])
@@ -111,7 +105,7 @@ def load_folder_parallel(path, col_info, max_workers=4):
 @st.cache_data(ttl=3600)
 def aggregate_brand_data(df, amount_col):
     df = df[~df['브랜드'].isin(['제외', '미지정'])]
-    brand_agg = df.groupby(['브랜드', '거래_유형'])[amount_col].sum().unstack(fill_value=0)
+    brand_agg = df.groupby(['브랜드', '거래_유형'], observed=True)[amount_col].sum().unstack(fill_value=0)
     for c in ['매출(청구)', '매입(청구)', '실제출금']:
         if c not in brand_agg.columns: brand_agg[c] = 0
     brand_agg['순이익'] = brand_agg['매출(청구)'] - brand_agg['매입(청구)'] - brand_agg['실제출금']
@@ -162,6 +156,7 @@ if st.sidebar.button("🗑️ 초기화", type="primary"):
         for f in os.listdir(WORK_DIR):
             file_path = os.path.join(WORK_DIR, f)
             if os.path.isfile(file_path): os.remove(file_path)
+        save_brand_map(WORK_DIR, {})
         st.cache_data.clear()
         st.success("완료!"); time.sleep(1); st.rerun()
     except Exception as e: st.error(f"오류: {e}")
@@ -206,8 +201,16 @@ if not dfs:
     st.stop()
 
 merged = pd.concat(dfs, ignore_index=True)
-brand_map = load_brand_map(WORK_DIR)
-merged['브랜드'] = merged['id'].map(brand_map).fillna("미지정")
+id_collisions = row_ids.collisions(merged['id'])
+if id_collisions:
+    st.sidebar.warning(f"⚠️ 파일 간 행 ID 충돌 {id_collisions}건 (브랜드 지정이 함께 적용될 수 있음)")
+
+# 브랜드 지정: 예전 문자열 키 → 정수 ID 키로 이전 (한 번만 저장)
+brand_map, migrated = row_ids.migrate_mapping(load_brand_map(WORK_DIR), merged, row_ids.id_columns(merged, col_client))
+if migrated:
+    save_brand_map(WORK_DIR, brand_map)
+    st.sidebar.info(f"🔁 브랜드 지정 {migrated}건을 새 ID 형식으로 이전했습니다.")
+merged['브랜드'] = row_ids.lookup(merged['id'], brand_map).fillna("미지정")
 
 # =============================================================================
 # 6. 탭 구성
@@ -286,7 +289,7 @@ with tab1:
             if item_search: manual_df = manual_df[manual_df[col_item].astype(str).str.contains(item_search, case=False, na=False)]
             if global_search:
                 mask = pd.Series([False]*len(manual_df), index=manual_df.index)
-                for col in manual_df.select_dtypes(include=['object']).columns: mask |= manual_df[col].astype(str).str.contains(global_search, case=False, na=False)
+                for col in manual_df.select_dtypes(include=['object', 'category']).columns: mask |= manual_df[col].astype(str).str.contains(global_search, case=False, na=False)
                 manual_df = manual_df[mask]
             
             if sort_by == "금액↓": manual_df = manual_df.sort_values(SAFE_COL_AMOUNT, ascending=False)
@@ -360,7 +363,7 @@ with tab1:
         analysis_type = st.radio("분석 기준", ["브랜드별", "품목별"], horizontal=True)
         if analysis_type == "브랜드별": brand_agg = aggregate_brand_data(active_view_df, SAFE_COL_AMOUNT)
         else:
-            brand_agg = active_view_df.groupby([col_item, '거래_유형'])[SAFE_COL_AMOUNT].sum().unstack(fill_value=0)
+            brand_agg = active_view_df.groupby([col_item, '거래_유형'], observed=True)[SAFE_COL_AMOUNT].sum().unstack(fill_value=0)
             for c in ['매출(청구)', '매입(청구)', '실제출금']: 
                 if c not in brand_agg.columns: brand_agg[c] = 0
             brand_agg['순이익'] = brand_agg['매출(청구)'] - brand_agg['매입(청구)'] - brand_agg['실제출금']
@@ -442,11 +445,13 @@ with tab1:
         z4.metric("💰 순수익", f"{final_profit:,.0f}")
         
         buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            pd.DataFrame({"항목": ["총 매출", "총 매입", "비용(은행)", "최종 순수익"], "금액": [total_sales, total_purchase, assigned_bank_expenses, final_profit]}).to_excel(writer, sheet_name='요약', index=False)
-            brand_agg.reset_index().to_excel(writer, sheet_name='브랜드별분석', index=False)
-            if not bank_out_df.empty:
-                bank_out_df[~bank_out_df['브랜드'].isin(['미지정', '제외'])].to_excel(writer, sheet_name='비용상세', index=False)
+        sheets = [
+            ("요약", pd.DataFrame({"항목": ["총 매출", "총 매입", "비용(은행)", "최종 순수익"], "금액": [total_sales, total_purchase, assigned_bank_expenses, final_profit]})),
+            ("브랜드별분석", brand_agg.reset_index()),
+        ]
+        if not bank_out_df.empty:
+            sheets.append(("비용상세", bank_out_df[~bank_out_df['브랜드'].isin(['미지정', '제외'])]))
+        xlsx_stream.write_sheets(buffer, sheets)
                 
         st.download_button("💾 엑셀 다운로드", buffer.getvalue(), f"정산_{choice}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
@@ -0,0 +1,277 @@
+"""
+benchmark.py — file_engine 구성 요소 마이크로 벤치마크
+
+사용법:
+    python benchmark.py              # 전체 실행
+    python benchmark.py currency     # 특정 항목만 실행
+    python benchmark.py memory       # 반환 DataFrame 메모리 비교
+    python benchmark.py period       # 한 달 조회: 전체 읽기 vs SQLite vs Parquet 저장소
+    python benchmark.py report       # 마감 보고서 저장: to_excel vs 스트리밍 저장 (한 달 20만 행)
+"""
+
+import os
+import re
+import sys
+import time
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import currency_parser
+import data_store
+import file_engine
+import warehouse
+import xlsx_stream
+
+
+def _timeit(func, repeat=3):
+    """func를 repeat번 실행해 가장 빠른 시간(초) 반환"""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+_LEGACY_CURRENCY_PATTERN = re.compile(r"[^\d.-]")
+
+
+def _legacy_clean_currency_val(x):
+    """비교용: 예전 셀 단위 변환 (file_engine._clean_currency_val)"""
+    if pd.isna(x) or x == "":
+        return 0
+    s = str(x).strip()
+    neg = s.startswith("(") and s.endswith(")")
+    s = _LEGACY_CURRENCY_PATTERN.sub("", s)
+    try:
+        return float(s) * (-1 if neg else 1)
+    except:
+        return 0
+
+
+# =============================================================================
+# 금액 변환 (currency_parser.parse_won)
+# =============================================================================
+# 정확성 확인용 (입력, 기대값) — Arrow 경로와 파이썬 경로 모두 확인
+_CURRENCY_SAMPLE = [
+    ("1,234,000원", 1_234_000), ("₩ 5,000", 5_000), ("-300", -300), ("(2,000)", -2_000),
+    ("(1,000)원", -1_000), ("₩(1,000)", -1_000), ("￦ (1,000) 원", -1_000), ("1,000-", -1_000),
+    ("３，０００", 3_000), ("（３，０００）", -3_000), ("", 0), ("abc", 0), (1500.4, 1_500), (None, 0),
+]
+
+
+def _check_currency():
+    """_CURRENCY_SAMPLE 결과가 기대값과 다르면 AssertionError"""
+    values = pd.Series([v for v, _ in _CURRENCY_SAMPLE], dtype=object)
+    expected = [e for _, e in _CURRENCY_SAMPLE]
+    paths = [("pyarrow", currency_parser.pa), ("파이썬", None)] if currency_parser.pa is not None else [("파이썬", None)]
+    pa = currency_parser.pa
+    try:
+        for name, module in paths:
+            currency_parser.pa = module
+            got = currency_parser.parse_won(values).tolist()
+            wrong = [(v, g, e) for (v, e), g in zip(_CURRENCY_SAMPLE, got) if g != e]
+            assert not wrong, f"금액 변환 오류 ({name}): {wrong}"
+    finally:
+        currency_parser.pa = pa
+    print(f"  정확성 확인 {len(_CURRENCY_SAMPLE)}건 통과 ({', '.join(name for name, _ in paths)})")
+
+
+def bench_currency(n=1_000_000):
+    rng = np.random.default_rng(0)
+    amounts = rng.integers(-5_000_000, 50_000_000, size=n)
+
+    cases = {
+        "엑셀 숫자 셀": pd.Series(amounts.astype(float)),
+        "숫자 문자열": pd.Series(amounts.astype(str), dtype=object),
+        "서식 문자열": pd.Series(
+            np.where(amounts < 0,
+                     [f"({-a:,})" for a in amounts],
+                     [f"{a:,}원" for a in amounts]),
+            dtype=object
+        ),
+    }
+    blanks = cases["서식 문자열"].copy()
+    blanks[::10] = ""
+    blanks[5::10] = None
+    cases["서식 + 빈 셀 20%"] = blanks
+
+    print(f"[금액 변환] {n:,}셀")
+    _check_currency()
+    for name, series in cases.items():
+        elapsed = _timeit(lambda: currency_parser.parse_won(series))
+        print(f"  {name:<16} {elapsed:7.3f}s  {n / elapsed / 1e6:6.2f}M셀/s")
+
+    # 비교 대상은 10만 셀로만 측정 후 환산
+    sample = cases["서식 문자열"].iloc[:100_000]
+    if currency_parser.pa is not None:
+        pa, currency_parser.pa = currency_parser.pa, None
+        try:
+            elapsed = _timeit(lambda: currency_parser.parse_won(sample), repeat=1)
+        finally:
+            currency_parser.pa = pa
+        print(f"  {'서식 (pyarrow 없음)':<16} {elapsed * n / len(sample):7.3f}s  "
+              f"{len(sample) / elapsed / 1e6:6.2f}M셀/s (환산)")
+
+    elapsed = _timeit(lambda: sample.apply(_legacy_clean_currency_val), repeat=1)
+    print(f"  {'서식 (예전 apply)':<16} {elapsed * n / len(sample):7.3f}s  "
+          f"{len(sample) / elapsed / 1e6:6.2f}M셀/s (환산)")
+
+
+# =============================================================================
+# 반환 DataFrame 메모리 (file_engine.to_output_schema)
+# =============================================================================
+def _legacy_frame(n, years, rng):
+    """예전 반환 형식: 날짜 문자열, 금액 float64, 나머지 object 문자열"""
+    days = pd.date_range(f"{2025 - years}-01-01", "2024-12-31", freq="D")
+    files = [f"{y}-{m:02d}_{bank}.xlsx" for y in range(2025 - years, 2025) for m in range(1, 13)
+             for bank in ("국민은행_통장", "신한은행", "매입_세금계산서", "매출_세금계산서")]
+    mains = ["매출", "판관비", "기타비용", "투자", "미분류", "입금(매출제외)", "출금(비용제외)"]
+    subs = [f"소분류{i}" for i in range(80)]
+    descs = np.array([f"거래처{i} 이체" for i in range(5000)], dtype=object)
+
+    amounts = rng.integers(1, 5_000, size=n) * 1000
+    is_in = rng.random(n) < 0.4
+    return pd.DataFrame({
+        "날짜": days[rng.integers(0, len(days), size=n)].strftime("%Y-%m-%d"),
+        "__row_idx": rng.integers(0, 2000, size=n),
+        "적요": descs[rng.integers(0, len(descs), size=n)],
+        "입금": np.where(is_in, amounts, 0).astype(float),
+        "출금": np.where(is_in, 0, amounts).astype(float),
+        "파일명": np.array(files, dtype=object)[rng.integers(0, len(files), size=n)],
+        "대분류": np.array(mains, dtype=object)[rng.integers(0, len(mains), size=n)],
+        "소분류": np.array(subs, dtype=object)[rng.integers(0, len(subs), size=n)],
+    })
+
+
+def _page_ops(df, convert_dates):
+    """페이지 재실행 시 하는 작업: 날짜 변환 → 월 필터 → 소분류별 합계"""
+    if convert_dates:
+        df = df.copy()
+        df["날짜"] = pd.to_datetime(df["날짜"], errors="coerce")
+    month = df[(df["날짜"].dt.year == 2024) & (df["날짜"].dt.month == 6)]
+    return month[month["대분류"] == "판관비"].groupby("소분류", observed=True)["출금"].sum()
+
+
+def bench_memory(n=1_000_000, years=3):
+    rng = np.random.default_rng(0)
+    legacy = _legacy_frame(n, years, rng)
+    typed = file_engine.to_output_schema(legacy)
+
+    old_mem = legacy.memory_usage(deep=True)
+    new_mem = typed.memory_usage(deep=True)
+    print(f"[반환 DataFrame 메모리] {n:,}행, {years}년치")
+    print(f"  {'컬럼':<10} {'예전':>10} {'현재':>10}  현재 타입")
+    for col in legacy.columns:
+        print(f"  {col:<10} {old_mem[col] / 1e6:8.1f}MB {new_mem[col] / 1e6:8.1f}MB  {typed[col].dtype}")
+    print(f"  {'합계':<10} {old_mem.sum() / 1e6:8.1f}MB {new_mem.sum() / 1e6:8.1f}MB  "
+          f"({old_mem.sum() / new_mem.sum():.1f}배 감소)")
+
+    old_t = _timeit(lambda: _page_ops(legacy, convert_dates=True))
+    new_t = _timeit(lambda: _page_ops(typed, convert_dates=False))
+    print(f"  페이지 작업(날짜 변환+월 필터+소분류 합계)  예전 {old_t:.3f}s  현재 {new_t:.3f}s")
+
+
+# =============================================================================
+# 기간 조회 (data_store / warehouse)
+# =============================================================================
+def bench_period(n=500_000, years=3):
+    rng = np.random.default_rng(0)
+    typed = file_engine.to_output_schema(_legacy_frame(n, years, rng))
+    # 파일명별로 원본 파일 하나씩 반영한 것처럼 기록
+    updates = {f"{name}": ("-", "-", rows) for name, rows in typed.groupby("파일명", observed=True)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = data_store.db_path_for(tmp)
+        t0 = time.perf_counter()
+        data_store.write_file_rows(db_path, updates)
+        db_write = time.perf_counter() - t0
+        print(f"[기간 조회] {n:,}행, {years}년치, 원본 파일 {len(updates)}개")
+        print(f"  SQLite 기록   {db_write:7.3f}s")
+
+        wh_root = warehouse.root_for(tmp)
+        if warehouse.available():
+            t0 = time.perf_counter()
+            warehouse.write_file_rows(wh_root, updates)
+            print(f"  Parquet 기록  {time.perf_counter() - t0:7.3f}s  "
+                  f"(파일 {sum(len(f) for _, _, f in os.walk(wh_root))}개)")
+
+        start, end = pd.Timestamp("2024-06-01"), pd.Timestamp("2024-07-01")
+        full_t = _timeit(lambda: typed[(typed["날짜"] >= start) & (typed["날짜"] < end)])
+        db_t = _timeit(lambda: data_store.query_transactions(db_path, start, end))
+        print(f"  한 달 조회: 메모리 필터 {full_t:.3f}s (전체 로드 필요)  SQLite {db_t:.3f}s", end="")
+        if warehouse.available():
+            wh_t = _timeit(lambda: warehouse.read_period(wh_root, start, end))
+            all_t = _timeit(lambda: warehouse.read_period(wh_root), repeat=1)
+            print(f"  Parquet {wh_t:.3f}s (전체 {all_t:.3f}s)")
+        else:
+            print("  Parquet 없음 (pyarrow 미설치)")
+
+
+# =============================================================================
+# 마감 보고서 저장 (xlsx_stream)
+# =============================================================================
+_DETAIL_CATEGORIES = ["매출", "판관비", "기타비용", "투자"]
+
+
+def _legacy_report(path, df):
+    """비교용: 예전 저장 방식 (ExcelWriter + 대분류마다 다시 필터해 to_excel)"""
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name="전체내역", index=False)
+        for cat in _DETAIL_CATEGORIES:
+            part = df[df["대분류"] == cat]
+            if not part.empty:
+                part.to_excel(writer, sheet_name=f"{cat}상세", index=False)
+
+
+def _stream_report(path, df):
+    parts = xlsx_stream.partition(df, "대분류", _DETAIL_CATEGORIES)
+    xlsx_stream.write_sheets(path, [("전체내역", df)] + [(f"{cat}상세", df, rows) for cat, rows in parts.items()])
+
+
+def _peak_mb(func):
+    """func 실행 중 파이썬 메모리 최대 사용량(MB) — tracemalloc은 느려서 시간 측정과 따로 실행"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return peak
+
+
+def bench_report(n=200_000):
+    rng = np.random.default_rng(0)
+    month = file_engine.to_output_schema(_legacy_frame(n, 1, rng))
+    month["날짜"] = pd.Timestamp("2024-06-01") + pd.to_timedelta(rng.integers(0, 30, size=n), unit="D")
+
+    print(f"[마감 보고서 저장] 한 달 {n:,}행 (전체내역 + 상세 시트 {len(_DETAIL_CATEGORIES)}개)")
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = os.path.join(tmp, "old.xlsx"), os.path.join(tmp, "new.xlsx")
+        old_t = _timeit(lambda: _legacy_report(old_path, month), repeat=1)
+        new_t = _timeit(lambda: _stream_report(new_path, month), repeat=1)
+        old_mem = _peak_mb(lambda: _legacy_report(old_path, month))
+        new_mem = _peak_mb(lambda: _stream_report(new_path, month))
+        engine = "xlsxwriter constant_memory" if xlsx_stream.xlsxwriter is not None else "openpyxl write_only"
+        print(f"  to_excel      {old_t:7.2f}s  최대 {old_mem:7.1f}MB")
+        print(f"  스트리밍 저장  {new_t:7.2f}s  최대 {new_mem:7.1f}MB  ({engine})")
+
+
+BENCHMARKS = {
+    "currency": bench_currency,
+    "memory": bench_memory,
+    "period": bench_period,
+    "report": bench_report,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"알 수 없는 항목: {name} (가능: {', '.join(BENCHMARKS)})")
+            continue
+        BENCHMARKS[name]()
+        print()
@@ -0,0 +1,130 @@
+"""
+closed_snapshot.py — 마감 보고서 '전체내역'의 컬럼형 스냅샷 (Arrow IPC)
+
+마감 보고서(xlsx)는 사람이 보는 파일로 그대로 두고, 저장할 때 같은 폴더에
+  {보고서 이름}.arrow       ← 전체내역 (Arrow IPC 파일, 메모리 맵으로 읽음)
+  {보고서 이름}.arrow.json  ← 스냅샷 체크섬(sha256) + 스냅샷을 만든 xlsx의 크기/수정시각
+를 함께 씁니다. 마감된 달은 바뀌지 않으므로 읽은 결과는 체크섬을 키로 프로세스가 끝날 때까지 보관합니다.
+xlsx가 스냅샷 이후 바뀌었거나(직접 편집 등) 체크섬이 맞지 않으면 None → 호출 측이 xlsx를 읽습니다.
+
+pyarrow가 없으면 available()이 False — 스냅샷 없이 xlsx만 사용합니다.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+SNAPSHOT_EXT = ".arrow"
+META_EXT = ".arrow.json"
+SNAPSHOT_VERSION = 1
+
+_CACHE = {}  # 체크섬 → DataFrame
+_LOCK = threading.Lock()
+
+
+def available():
+    return pa is not None
+
+
+def snapshot_path(xlsx_path):
+    return os.path.splitext(xlsx_path)[0] + SNAPSHOT_EXT
+
+
+def _meta_path(xlsx_path):
+    return os.path.splitext(xlsx_path)[0] + META_EXT
+
+
+def _xlsx_stat(xlsx_path):
+    st = os.stat(xlsx_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _to_table(df):
+    """DataFrame → Arrow 테이블 (엑셀에서 읽어 타입이 섞인 object 컬럼은 문자열로)"""
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].map(lambda v: v if v is None or v != v else str(v))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write(xlsx_path, df):
+    """
+    마감 보고서 저장 직후 호출 — 스냅샷 + 체크섬 기록 (xlsx는 이미 저장되어 있어야 함)
+    반환: 체크섬 (pyarrow가 없거나 실패하면 None)
+    """
+    if pa is None:
+        return None
+    path, meta_path = snapshot_path(xlsx_path), _meta_path(xlsx_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        table = _to_table(df)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(tmp_path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        os.replace(tmp_path, path)
+
+        meta = {"version": SNAPSHOT_VERSION, "checksum": checksum, "rows": table.num_rows,
+                "xlsx": _xlsx_stat(xlsx_path)}
+        with open(f"{meta_path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.{os.getpid()}.tmp", meta_path)
+        return checksum
+    except Exception:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        return None
+
+
+def checksum_for(xlsx_path):
+    """xlsx에 맞는 스냅샷의 체크섬 (스냅샷이 없거나 xlsx가 그 뒤에 바뀌었으면 None)"""
+    if pa is None:
+        return None
+    try:
+        with open(_meta_path(xlsx_path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION or meta.get("xlsx") != _xlsx_stat(xlsx_path):
+            return None
+        return meta.get("checksum")
+    except Exception:
+        return None
+
+
+def read(xlsx_path):
+    """
+    스냅샷 → DataFrame (복사본) — 체크섬별로 한 번만 메모리 맵으로 읽고 검증
+    사용할 수 있는 스냅샷이 없으면 None
+    """
+    checksum = checksum_for(xlsx_path)
+    if checksum is None:
+        return None
+    with _LOCK:
+        df = _CACHE.get(checksum)
+        if df is None:
+            try:
+                with pa.memory_map(snapshot_path(xlsx_path), "r") as source:
+                    if hashlib.sha256(source.read_buffer()).hexdigest() != checksum:
+                        return None
+                    source.seek(0)
+                    df = pa.ipc.open_file(source).read_all().to_pandas()
+            except Exception:
+                return None
+            _CACHE[checksum] = df
+    return df.copy()
@@ -0,0 +1,105 @@
+"""
+currency_parser.py — 원화 금액 컬럼 변환 (file_engine 두 엔진 공용)
+
+지원 형식
+  - 천 단위 구분자 / 원·₩ 표기 / 공백  : "1,234,000원", "₩ 5,000"
+  - 음수                              : "-300", "(2,000)", "(2,000)원", "₩(2,000)", "1,000-" (끝 마이너스)
+  - 전각 숫자·기호                     : "３，０００"
+  - 엑셀 숫자 셀                       : 문자열 변환 없이 그대로 사용
+  - 빈 셀 / 해석 불가                  : 0
+반환은 원 단위 int64 (소수점은 반올림)
+
+pyarrow가 설치되어 있으면 문자열 셀을 Arrow 연산으로 한 번에 처리하고,
+없으면 셀당 한 번의 파이썬 루프로 처리합니다 (결과는 동일).
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# 전각 → 반각 (Arrow 경로는 NFKC 정규화로 동일 처리)
+_FULLWIDTH = str.maketrans("０１２３４５６７８９，．－（）＋−￦", "0123456789,.-()+-₩")
+
+# 숫자/소수점/부호 이외 문자 제거 (구분자, 원, ₩, 공백 등)
+_NON_NUMERIC = r"[^\d.\-]"
+_NON_NUMERIC_PATTERN = re.compile(_NON_NUMERIC)
+
+# 괄호 음수 판별 전에 지우는 표기 (원, ₩, 공백) — "(1,000)원", "₩(1,000)"도 음수
+_MARKS = r"[\s원₩]+"
+_MARKS_PATTERN = re.compile(_MARKS)
+
+# 정리된 문자열: (앞 부호)(숫자)(끝 부호)
+_NUMBER = r"(?P<head>-?)(?P<num>\d+(?:\.\d*)?|\.\d+)(?P<tail>-?)"
+_NUMBER_PATTERN = re.compile(_NUMBER)
+
+_MAX_WON = 9e18
+
+
+def _parse_text_cell(text):
+    """문자열 셀 하나 → float (해석 불가 시 NaN)"""
+    if not text.isascii():
+        text = text.translate(_FULLWIDTH)
+    text = text.strip()
+    m = _NUMBER_PATTERN.fullmatch(_NON_NUMERIC_PATTERN.sub("", text))
+    if m is None:
+        return np.nan
+    value = float(m["num"])
+    bare = _MARKS_PATTERN.sub("", text)
+    if m["head"] or m["tail"] or (bare[:1] == "(" and bare[-1:] == ")"):
+        return -value
+    return value
+
+
+def _parse_text_arrow(texts):
+    """문자열 배열 → float 배열 (Arrow 연산)"""
+    arr = pa.array(texts, type=pa.string())
+    arr = pc.replace_substring(pc.utf8_normalize(arr, "NFKC"), "−", "-")
+    arr = pc.utf8_trim_whitespace(arr)
+    bare = pc.replace_substring_regex(arr, _MARKS, "")
+    paren = pc.and_(pc.starts_with(bare, "("), pc.ends_with(bare, ")"))
+
+    parts = pc.extract_regex(pc.replace_substring_regex(arr, _NON_NUMERIC, ""), f"^{_NUMBER}$")
+    value = pc.cast(pc.struct_field(parts, "num"), pa.float64())
+    neg = pc.or_(paren, pc.or_(pc.equal(pc.struct_field(parts, "head"), "-"),
+                               pc.equal(pc.struct_field(parts, "tail"), "-")))
+    value = pc.if_else(pc.fill_null(neg, False), pc.negate(value), value)
+    return value.to_numpy(zero_copy_only=False)
+
+
+def parse_won(values):
+    """
+    금액 컬럼 → 원 단위 int64 Series (index 유지)
+    1) 숫자 컬럼: 문자열 변환 없이 바로 반올림
+    2) 그 외: 숫자 셀은 그대로, 문자열 셀만 정리 (전각 변환 → 괄호/부호 판별 → 구분자 제거)
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        result = series.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        cells = series.to_numpy(dtype=object)
+        is_text = np.fromiter((isinstance(c, str) for c in cells), dtype=bool, count=len(cells))
+        result = np.full(len(cells), np.nan)
+
+        others = ~is_text & pd.notna(cells)
+        if others.any():
+            result[others] = pd.to_numeric(pd.Series(cells[others]), errors="coerce").to_numpy(dtype=float)
+        if is_text.any():
+            texts = cells[is_text]
+            if pa is not None:
+                result[is_text] = _parse_text_arrow(texts)
+            else:
+                result[is_text] = np.fromiter(map(_parse_text_cell, texts), dtype=float, count=len(texts))
+
+    # 빈 셀 / inf / int64 범위를 벗어나는 값은 0
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(result) & (np.abs(result) < _MAX_WON)
+    result = np.where(valid, result, 0)
+    return pd.Series(np.rint(result).astype("int64"), index=series.index)
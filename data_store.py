@@ -0,0 +1,351 @@
+"""
+data_store.py — 로컬 내장 저장소 (SQLite, workspaces/finance.db)
+
+엑셀 원본을 매번 다시 해석하거나 JSON/CSV 파일 전체를 다시 쓰는 대신,
+아래 데이터를 하나의 SQLite 파일에 보관합니다.
+  - transactions   : 분류된 거래 (원본 파일별로 교체 — file_engine이 변경된 파일만 반영)
+  - manual_entries : 수기 입력 (기존 manual_entries.json)
+  - brands         : 브랜드 지정 (기존 작업 월 폴더의 brands.json)
+  - contracts      : 계약 목록 (기존 contracts/contract_list.csv)
+  - projects       : 프로젝트 목록 (기존 contracts/project_list.csv)
+날짜 / 대분류·소분류 / 거래처(적요) / 파일명에 인덱스가 있어 기간·분류 조회가 이력 길이와 무관하게 빠릅니다.
+
+표 저장(save_table)은 기존 행과 비교해 바뀐 행만 쓰고, 기존 JSON/CSV는 처음 한 번만 가져옵니다.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import datetime as dt
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+DB_FILE = "finance.db"
+SCHEMA_VERSION = 1
+
+# 표 정의: 이름 → (키 컬럼, [(컬럼, 타입)]) — 타입: TEXT / INTEGER / DATE(YYYY-MM-DD 문자열) / BOOL
+TABLES = {
+    "manual_entries": ("id", [
+        ("id", "TEXT"), ("날짜", "DATE"), ("적요", "TEXT"), ("대분류", "TEXT"), ("소분류", "TEXT"),
+        ("입금", "INTEGER"), ("출금", "INTEGER"), ("메모", "TEXT"),
+    ]),
+    "contracts": ("ID", [
+        ("ID", "TEXT"), ("계약명", "TEXT"), ("거래처", "TEXT"), ("유형", "TEXT"), ("상태", "TEXT"),
+        ("시작일", "DATE"), ("종료일", "DATE"), ("금액", "INTEGER"), ("담당자", "TEXT"),
+        ("파일명", "TEXT"), ("자동갱신", "BOOL"), ("비고", "TEXT"),
+    ]),
+    "projects": ("P_ID", [
+        ("P_ID", "TEXT"), ("프로젝트명", "TEXT"), ("관련계약ID", "TEXT"), ("진행상태", "TEXT"),
+        ("진행률", "INTEGER"), ("담당자", "TEXT"), ("메모", "TEXT"), ("마감일", "DATE"),
+    ]),
+}
+
+# 거래 행 컬럼 (file_engine.OUTPUT_COLUMNS 순서, __row_idx → row_idx)
+TX_COLUMNS = ["날짜", "row_idx", "적요", "입금", "출금", "파일명", "대분류", "소분류"]
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    # 원본 파일별 반영 상태 (내용 해시 + 규칙 버전이 같으면 다시 쓰지 않음)
+    "CREATE TABLE IF NOT EXISTS source_files (rel TEXT PRIMARY KEY, hash TEXT, rules_ver TEXT, rows INTEGER)",
+    """CREATE TABLE IF NOT EXISTS transactions (
+        rel TEXT NOT NULL, seq INTEGER NOT NULL,
+        "날짜" TEXT, row_idx INTEGER, "적요" TEXT, "입금" INTEGER, "출금" INTEGER,
+        "파일명" TEXT, "대분류" TEXT, "소분류" TEXT,
+        PRIMARY KEY (rel, seq)
+    ) WITHOUT ROWID""",
+    'CREATE INDEX IF NOT EXISTS ix_tx_date ON transactions ("날짜")',
+    'CREATE INDEX IF NOT EXISTS ix_tx_class ON transactions ("대분류", "소분류")',
+    'CREATE INDEX IF NOT EXISTS ix_tx_client ON transactions ("적요")',
+    'CREATE INDEX IF NOT EXISTS ix_tx_file ON transactions ("파일명")',
+    'CREATE TABLE IF NOT EXISTS brands (work TEXT NOT NULL, key TEXT NOT NULL, "브랜드" TEXT, PRIMARY KEY (work, key)) WITHOUT ROWID',
+]
+for _name, (_key, _cols) in TABLES.items():
+    _defs = ", ".join(f'"{c}" {"INTEGER" if t in ("INTEGER", "BOOL") else "TEXT"}' for c, t in _cols)
+    _SCHEMA.append(f'CREATE TABLE IF NOT EXISTS {_name} ({_defs}, PRIMARY KEY ("{_key}"))')
+_SCHEMA += [
+    'CREATE INDEX IF NOT EXISTS ix_manual_date ON manual_entries ("날짜")',
+    'CREATE INDEX IF NOT EXISTS ix_contracts_client ON contracts ("거래처")',
+    'CREATE INDEX IF NOT EXISTS ix_projects_contract ON projects ("관련계약ID")',
+]
+
+_READY = set()
+_READY_LOCK = threading.Lock()
+
+
+def db_path_for(workspaces_dir):
+    return os.path.join(workspaces_dir, DB_FILE)
+
+
+@contextmanager
+def connect(path):
+    """연결 (처음 열 때 / DB 파일이 지워졌으면 스키마 생성) — with 블록이 끝나면 커밋 후 닫음"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    exists = os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with _READY_LOCK:
+            if path not in _READY or not exists:
+                conn.execute("PRAGMA journal_mode=WAL")
+                for stmt in _SCHEMA:
+                    conn.execute(stmt)
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+                conn.commit()
+                _READY.add(path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# 값 변환 (pandas ↔ SQLite)
+# =============================================================================
+def _to_sql(value, kind):
+    if value is None:
+        return None
+    if not isinstance(value, (list, dict)):
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+    if kind == "DATE":
+        if isinstance(value, (dt.date, pd.Timestamp, np.datetime64)):
+            return pd.Timestamp(value).strftime("%Y-%m-%d")
+        text = str(value).strip()
+        parsed = pd.to_datetime(text, errors="coerce")
+        return parsed.strftime("%Y-%m-%d") if pd.notna(parsed) else (text or None)
+    if kind == "BOOL":
+        if isinstance(value, str):
+            return 1 if value.strip().lower() in ("true", "1", "y", "yes") else 0
+        return int(bool(value))
+    if kind == "INTEGER":
+        try:
+            return int(round(float(value)))
+        except (TypeError, ValueError):
+            return 0
+    return str(value)
+
+
+def _frame_rows(df, cols):
+    """DataFrame → SQLite 행 튜플 리스트 (표 정의 타입으로 변환, 없는 컬럼은 NULL)"""
+    columns = [df[c].tolist() if c in df.columns else [None] * len(df) for c, _ in cols]
+    kinds = [t for _, t in cols]
+    return [tuple(_to_sql(v, k) for v, k in zip(row, kinds)) for row in zip(*columns)]
+
+
+def _quote(names):
+    return ", ".join(f'"{n}"' for n in names)
+
+
+# =============================================================================
+# 거래 (file_engine이 원본 파일 단위로 반영)
+# =============================================================================
+def file_versions(path):
+    """반영된 원본 파일 → (내용 해시, 규칙 버전)"""
+    with connect(path) as conn:
+        return {rel: (h, v) for rel, h, v in conn.execute("SELECT rel, hash, rules_ver FROM source_files")}
+
+
+def write_file_rows(path, updates, removed=()):
+    """
+    원본 파일 단위로 거래 행 교체 (한 트랜잭션)
+    updates: {rel: (내용 해시, 규칙 버전, DataFrame | None)}
+    removed: 삭제된 원본 파일 rel 목록
+    """
+    with connect(path) as conn:
+        for rel in removed:
+            conn.execute("DELETE FROM transactions WHERE rel = ?", (rel,))
+            conn.execute("DELETE FROM source_files WHERE rel = ?", (rel,))
+        for rel, (digest, rules_ver, rows) in updates.items():
+            conn.execute("DELETE FROM transactions WHERE rel = ?", (rel,))
+            n = 0
+            if rows is not None and not rows.empty:
+                n = len(rows)
+                dates = pd.to_datetime(rows["날짜"], errors="coerce").dt.strftime("%Y-%m-%d")
+                data = zip(
+                    [rel] * n, range(n),
+                    dates.astype(object).where(dates.notna(), None),
+                    rows["__row_idx"].astype("int64").tolist(),
+                    rows["적요"].astype(str).tolist(),
+                    rows["입금"].astype("int64").tolist(),
+                    rows["출금"].astype("int64").tolist(),
+                    rows["파일명"].astype(str).tolist(),
+                    rows["대분류"].astype(str).tolist(),
+                    rows["소분류"].astype(str).tolist(),
+                )
+                conn.executemany(
+                    f"INSERT INTO transactions (rel, seq, {_quote(TX_COLUMNS)}) VALUES ({', '.join('?' * 10)})",
+                    data,
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO source_files (rel, hash, rules_ver, rows) VALUES (?, ?, ?, ?)",
+                (rel, digest, rules_ver, n),
+            )
+
+
+def query_transactions(path, start=None, end=None, categories=None, client=None, files=None, min_in=None):
+    """
+    거래 조회 (인덱스 사용)
+    start/end: 날짜 범위 [start, end) — Timestamp / date / 'YYYY-MM-DD'
+    categories: 대분류 목록, client: 적요(거래처) 부분 일치, files: 파일명 목록, min_in: 입금 하한
+    반환: rel, seq + TX_COLUMNS 컬럼 DataFrame (날짜는 문자열 그대로)
+    """
+    where, params = [], []
+    if start is not None:
+        where.append('"날짜" >= ?')
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append('"날짜" < ?')
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    if categories:
+        where.append(f'"대분류" IN ({", ".join("?" * len(categories))})')
+        params.extend(categories)
+    if client:
+        where.append('"적요" LIKE ?')
+        params.append(f"%{client}%")
+    if files:
+        where.append(f'"파일명" IN ({", ".join("?" * len(files))})')
+        params.extend(files)
+    if min_in is not None:
+        where.append('"입금" >= ?')
+        params.append(int(min_in))
+
+    sql = f"SELECT rel, seq, {_quote(TX_COLUMNS)} FROM transactions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    with connect(path) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+# =============================================================================
+# 표 (수기 입력 / 계약 / 프로젝트)
+# =============================================================================
+def load_table(path, name):
+    """표 전체 → DataFrame (표 정의 컬럼 순서, DATE는 'YYYY-MM-DD' 문자열)"""
+    key, cols = TABLES[name]
+    with connect(path) as conn:
+        df = pd.read_sql_query(f"SELECT {_quote([c for c, _ in cols])} FROM {name}", conn)
+    for c, t in cols:
+        if t == "BOOL":
+            df[c] = df[c].fillna(0).astype(bool)
+        elif t == "INTEGER":
+            df[c] = df[c].fillna(0).astype("int64")
+        else:
+            df[c] = df[c].astype(object).where(df[c].notna(), "")
+    return df
+
+
+def save_table(path, name, df):
+    """
+    DataFrame 내용으로 표를 맞춤 — 기존 행과 비교해 바뀐 행만 INSERT/UPDATE, 없어진 키만 DELETE
+    """
+    key, cols = TABLES[name]
+    rows = _frame_rows(df, cols)
+    key_pos = [c for c, _ in cols].index(key)
+    new = {row[key_pos]: row for row in rows if row[key_pos] is not None}
+
+    with connect(path) as conn:
+        old = {row[key_pos]: row for row in conn.execute(f"SELECT {_quote([c for c, _ in cols])} FROM {name}")}
+        gone = [(k,) for k in old if k not in new]
+        changed = [row for k, row in new.items() if old.get(k) != row]
+        if gone:
+            conn.executemany(f'DELETE FROM {name} WHERE "{key}" = ?', gone)
+        if changed:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {name} ({_quote([c for c, _ in cols])}) VALUES ({', '.join('?' * len(cols))})",
+                changed,
+            )
+    return len(changed), len(gone)
+
+
+def add_row(path, name, row):
+    """표에 행 하나 추가 (같은 키가 있으면 교체)"""
+    key, cols = TABLES[name]
+    values = tuple(_to_sql(row.get(c), t) for c, t in cols)
+    with connect(path) as conn:
+        conn.execute(
+            f"INSERT OR REPLACE INTO {name} ({_quote([c for c, _ in cols])}) VALUES ({', '.join('?' * len(cols))})",
+            values,
+        )
+
+
+def delete_rows(path, name, keys):
+    key, _ = TABLES[name]
+    with connect(path) as conn:
+        conn.executemany(f'DELETE FROM {name} WHERE "{key}" = ?', [(str(k),) for k in keys])
+
+
+def load_records(path, name):
+    """표 전체 → dict 리스트 (기존 JSON 목록과 같은 형태)"""
+    return load_table(path, name).to_dict("records")
+
+
+# =============================================================================
+# 브랜드 지정 (app.py 작업 월별)
+# =============================================================================
+def load_brands(path, work):
+    """작업 월 work의 브랜드 지정 {키 문자열: 브랜드} (brands.json과 같은 형태)"""
+    with connect(path) as conn:
+        return {k: b for k, b in conn.execute('SELECT key, "브랜드" FROM brands WHERE work = ?', (work,))}
+
+
+def save_brands(path, work, mapping):
+    """브랜드 지정을 mapping과 같게 맞춤 (바뀐 키만 쓰기)"""
+    new = {str(k): str(v) for k, v in mapping.items()}
+    with connect(path) as conn:
+        old = {k: b for k, b in conn.execute('SELECT key, "브랜드" FROM brands WHERE work = ?', (work,))}
+        gone = [(work, k) for k in old if k not in new]
+        changed = [(work, k, v) for k, v in new.items() if old.get(k) != v]
+        if gone:
+            conn.executemany("DELETE FROM brands WHERE work = ? AND key = ?", gone)
+        if changed:
+            conn.executemany('INSERT OR REPLACE INTO brands (work, key, "브랜드") VALUES (?, ?, ?)', changed)
+
+
+# =============================================================================
+# 기존 JSON / CSV 가져오기 (한 번만)
+# =============================================================================
+def _import_once(path, tag, func):
+    with connect(path) as conn:
+        if conn.execute("SELECT 1 FROM meta WHERE key = ?", (f"imported:{tag}",)).fetchone():
+            return False
+    try:
+        func()
+    except Exception:
+        return False
+    with connect(path) as conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                     (f"imported:{tag}", dt.datetime.now().isoformat(timespec="seconds")))
+    return True
+
+
+def import_legacy_table(path, name, legacy_file):
+    """manual_entries.json / contract_list.csv / project_list.csv → 표 (원본 파일은 그대로 둠)"""
+    def _load():
+        if not os.path.exists(legacy_file):
+            return
+        if legacy_file.endswith(".json"):
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                df = pd.DataFrame(json.load(f))
+        else:
+            df = pd.read_csv(legacy_file, dtype=str, keep_default_na=False)
+        if not df.empty:
+            save_table(path, name, df)
+    return _import_once(path, f"{name}:{os.path.abspath(legacy_file)}", _load)
+
+
+def import_legacy_brands(path, work, legacy_file):
+    """작업 월 폴더의 brands.json → brands 표"""
+    def _load():
+        if not os.path.exists(legacy_file):
+            return
+        with open(legacy_file, "r", encoding="utf-8") as f:
+            mapping = json.load(f)
+        mapping.update(load_brands(path, work))
+        save_brands(path, work, mapping)
+    return _import_once(path, f"brands:{work}", _load)
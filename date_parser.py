@@ -0,0 +1,142 @@
+"""
+date_parser.py — 거래일자 컬럼 → datetime64 변환 (file_engine 두 엔진 공용)
+
+pd.to_datetime(..., errors='coerce')는 형식이 섞인 object 컬럼에서
+첫 값의 형식만 추론해 나머지 형식의 행을 NaT로 버리거나, 셀 단위 해석으로 느려집니다.
+여기서는
+  1) 엑셀 날짜 셀(datetime)은 그대로, 숫자 셀은 엑셀 일련번호(예: 45658) / YYYYMMDD로 해석
+  2) 문자열은 앞부분 샘플로 형식을 한 번 추론 → 컬럼 전체를 해당 형식으로 한 번에 해석
+  3) 남은 행만 다음 형식 추론 → 그래도 남으면 개별 해석 (format="mixed")
+추론된 형식 목록은 레이아웃 키(헤더 구성 등)별로 기억해 두고 다음 파일에서 먼저 시도합니다.
+"""
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+# 문자열 날짜 후보 형식 (샘플 적중 수가 같으면 앞쪽 우선)
+DATE_FORMATS = [
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M",
+    "%Y.%m.%d", "%Y.%m.%d %H:%M:%S", "%Y.%m.%d %H:%M", "%Y.%m.%d.",
+    "%Y/%m/%d", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M",
+    "%Y%m%d", "%Y%m%d%H%M%S",
+    "%Y년 %m월 %d일", "%Y년%m월%d일", "%Y. %m. %d.", "%Y. %m. %d",
+    "%y-%m-%d", "%y.%m.%d", "%y/%m/%d",
+]
+
+# 형식 추론에 쓰는 샘플 크기
+SAMPLE_SIZE = 50
+
+# 엑셀 일련번호로 인정하는 범위 (1954-10 ~ 2119-01)
+EXCEL_SERIAL_MIN = 20000
+EXCEL_SERIAL_MAX = 80000
+_EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+# 레이아웃 키 → 성공했던 형식 목록 (프로세스 내 메모)
+_FORMAT_MEMO = {}
+
+
+def _infer_format(texts, skip=()):
+    """문자열 샘플에서 가장 많이 해석되는 형식 반환 (하나도 안 되면 None)"""
+    sample = texts.iloc[:SAMPLE_SIZE]
+    best, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        if fmt in skip:
+            continue
+        hits = pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+    return best
+
+
+def _parse_texts(texts, key, formats=()):
+    """문자열 Series → datetime64 Series (형식 추론 → 일괄 해석 → 남은 행만 재시도)"""
+    texts = texts.str.strip()
+    parsed = pd.Series(pd.NaT, index=texts.index, dtype="datetime64[ns]")
+    remaining = texts != ""
+
+    queue = list(formats) + (list(_FORMAT_MEMO.get(key, ())) if key is not None else [])
+    tried, used = set(), []
+    while remaining.any():
+        if queue:
+            fmt = queue.pop(0)
+        else:
+            fmt = _infer_format(texts[remaining], skip=tried)
+            if fmt is None:
+                break
+        if fmt in tried:
+            continue
+        tried.add(fmt)
+
+        out = pd.to_datetime(texts[remaining], format=fmt, errors="coerce")
+        ok = out.notna()
+        if ok.any():
+            parsed[ok[ok].index] = out[ok]
+            remaining[ok[ok].index] = False
+            used.append(fmt)
+
+    if remaining.any():
+        # 추론된 형식으로 해석되지 않은 행만 개별 해석
+        parsed[remaining] = pd.to_datetime(texts[remaining], format="mixed", errors="coerce")
+
+    if key is not None and used:
+        _FORMAT_MEMO[key] = used
+    return parsed
+
+
+def _parse_numbers(numbers):
+    """숫자 셀 → 엑셀 일련번호 또는 YYYYMMDD 정수로 해석 (그 외 NaT)"""
+    numbers = numbers.astype(float)
+    parsed = pd.Series(pd.NaT, index=numbers.index, dtype="datetime64[ns]")
+
+    serial = numbers.between(EXCEL_SERIAL_MIN, EXCEL_SERIAL_MAX)
+    if serial.any():
+        parsed[serial] = _EXCEL_EPOCH + pd.to_timedelta(numbers[serial], unit="D")
+
+    ymd = numbers.between(19000101, 21001231) & (numbers % 1 == 0)
+    if ymd.any():
+        parsed[ymd] = pd.to_datetime(numbers[ymd].astype("int64").astype(str), format="%Y%m%d", errors="coerce")
+    return parsed
+
+
+def known_formats(key):
+    """key로 지금까지 성공한 형식 목록 (레이아웃 저장용)"""
+    return list(_FORMAT_MEMO.get(key, ()))
+
+
+def parse_dates(values, key=None, formats=()):
+    """
+    날짜 컬럼 → datetime64[ns] Series (index 유지, 해석 불가는 NaT)
+    key: 형식 메모 키 (같은 은행/홈택스 양식이면 같은 값 — 예: 헤더 컬럼 튜플)
+    formats: 먼저 시도할 형식 목록 (저장된 레이아웃의 형식 등)
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return _parse_numbers(series)
+
+    # 거래일자는 반복이 많으므로 고유 값만 해석 후 펼침
+    codes, uniques = pd.factorize(series)
+    cells = pd.Series(np.asarray(uniques, dtype=object))
+    kinds = np.array([
+        1 if isinstance(c, str) else
+        2 if isinstance(c, (dt.date, np.datetime64)) else
+        3 if isinstance(c, (int, float, np.number)) and not isinstance(c, (bool, np.bool_)) else 0
+        for c in cells
+    ], dtype=np.int8)
+
+    parsed = pd.Series(pd.NaT, index=cells.index, dtype="datetime64[ns]")
+    if (kinds == 1).any():
+        parsed[kinds == 1] = _parse_texts(cells[kinds == 1], key, formats)
+    if (kinds == 2).any():
+        parsed[kinds == 2] = pd.to_datetime(cells[kinds == 2], errors="coerce")
+    if (kinds == 3).any():
+        parsed[kinds == 3] = _parse_numbers(cells[kinds == 3])
+
+    values = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))[codes]  # codes == -1 → NaT
+    return pd.Series(values, index=series.index)
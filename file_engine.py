@@ -1,9 +1,30 @@
 import pandas as pd
+import numpy as np
 import os
-import glob
 import warnings
 import io
 import re
+import codecs
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pyarrow  # noqa: F401 — 적요 컬럼 Arrow 문자열용
+    _TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    _TEXT_DTYPE = object
+
+import aggregate_cube
+import currency_parser
+import data_store
+import date_parser
+import layout_registry
+import parse_cache
+import row_ids
+import rule_matcher
+import warehouse
+import workspace_manifest
 
 # 경고 무시
 warnings.filterwarnings("ignore")
@@ -15,64 +36,124 @@ DEFAULT_IGNORE_KEYWORDS = ["가앤", "프레피스", "케이에스넷", "KSNET",
 # [공통] 파일 읽기 + 헤더 탐색 유틸리티 (load_and_classify_data + read_single_file 공용)
 # =============================================================================
 
-def _read_raw_dataframes(file):
-    """파일을 읽어서 candidate DataFrame 리스트를 반환"""
+# 파일 앞부분 매직 바이트
+_OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"   # 구형 .xls (xlrd)
+_ZIP_MAGIC = b"PK\x03\x04"                            # .xlsx (openpyxl)
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_CHARSET_PATTERN = re.compile(rb"charset\s*=\s*[\"']?([\w-]+)", re.IGNORECASE)
+_HTML_MARKERS = ("<html", "<table", "<!doctype", "<meta", "<head", "<body")
+
+
+def _sniff_encoding(raw_bytes):
+    """
+    텍스트 파일 인코딩 판별: BOM → HTML charset 선언 → utf-8 엄격 디코딩 → cp949
+    반환: (encoding, decoded_text) — 디코딩 실패 시 decoded_text는 None
+    """
+    for bom, enc in _BOMS:
+        if raw_bytes.startswith(bom):
+            try:
+                return enc, raw_bytes.decode(enc)
+            except UnicodeDecodeError:
+                return enc, None
+
+    candidates = []
+    m = _CHARSET_PATTERN.search(raw_bytes[:4096])
+    if m:
+        candidates.append(m.group(1).decode("ascii", "ignore").lower())
+    candidates += ["utf-8", "cp949"]
+
+    for enc in candidates:
+        try:
+            return enc, raw_bytes.decode(enc)
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return "cp949", None
+
+
+def _sniff_format(raw_bytes, file=""):
+    """
+    파일 내용(매직 바이트)으로 실제 포맷 판별 — 확장자와 무관
+    반환: ("ole2" | "zip" | "html" | "text" | None, encoding, decoded_text)
+    (국내 은행의 .xls 는 실제로 HTML 인 경우가 많음)
+    """
+    if raw_bytes.startswith(_OLE2_MAGIC):
+        return "ole2", None, None
+    if raw_bytes.startswith(_ZIP_MAGIC):
+        return "zip", None, None
+
+    enc, text = _sniff_encoding(raw_bytes)
+    if text is None:
+        return None, enc, None
+
+    head = text[:2048].lstrip().lower()
+    if head.startswith("<") or any(mk in head for mk in _HTML_MARKERS):
+        return "html", enc, text
+
+    # 구분자 텍스트: .csv 이거나, 첫 줄에 구분자가 있는 경우만 (깨진 엑셀 파일 오인 방지)
+    first_line = head.split("\n", 1)[0]
+    if file.lower().endswith(".csv") or ("," in first_line or "\t" in first_line):
+        return "text", enc, text
+    return None, enc, None
+
+
+def _parse_sniffed(raw_bytes, fmt, text):
+    """판별된 포맷의 파서 하나로 전체를 읽어 candidate DataFrame 리스트 반환"""
     candidate_dfs = []
+    try:
+        # 1. Excel (구형 xls / xlsx)
+        if fmt in ("ole2", "zip"):
+            engine = "xlrd" if fmt == "ole2" else "openpyxl"
+            excel_data = pd.read_excel(io.BytesIO(raw_bytes), header=None, engine=engine, sheet_name=None)
+            for _, df in excel_data.items():
+                if not df.empty:
+                    df['__row_idx'] = range(len(df))
+                    candidate_dfs.append(df)
+
+        # 2. HTML (은행 .xls 위장 파일 포함)
+        elif fmt == "html":
+            dfs = pd.read_html(io.StringIO(text), header=None)
+            for df in dfs:
+                df['__row_idx'] = range(len(df))
+            candidate_dfs.extend(dfs)
+
+        # 3. CSV / 탭 구분 텍스트
+        elif fmt == "text":
+            first_line = text.lstrip()[:2048].split("\n", 1)[0]
+            sep = "\t" if first_line.count("\t") > first_line.count(",") else ","
+            df = pd.read_csv(io.StringIO(text), sep=sep, header=None)
+            df['__row_idx'] = range(len(df))
+            candidate_dfs.append(df)
+    except:
+        pass
+    return candidate_dfs
+
+
+def _read_file_bytes(file, raw_bytes=None):
+    """반환: (raw_bytes, None) 또는 (None, 에러 메시지)"""
+    if raw_bytes is not None:
+        return raw_bytes, None
     try:
         with open(file, "rb") as f:
-            raw_bytes = f.read()
+            return f.read(), None
     except Exception as e:
-        return [], f"파일 열기 실패: {e}"
+        return None, f"파일 열기 실패: {e}"
 
-    # 1. CSV
-    if file.lower().endswith('.csv'):
-        try:
-            for enc in ['utf-8', 'cp949', 'euc-kr']:
-                try:
-                    df = pd.read_csv(io.BytesIO(raw_bytes), encoding=enc, header=None)
-                    df['__row_idx'] = range(len(df))
-                    candidate_dfs.append(df)
-                    break
-                except:
-                    pass
-        except:
-            pass
 
-    # 2. Excel (CSV가 아닌 경우만)
-    if not file.lower().endswith('.csv'):
-        try:
-            if file.lower().endswith('.xls'):
-                excel_data = pd.read_excel(file, header=None, engine='xlrd', sheet_name=None)
-            elif file.lower().endswith('.xlsx'):
-                excel_data = pd.read_excel(file, header=None, sheet_name=None)
-            else:
-                excel_data = None
-
-            if excel_data is not None:
-                if isinstance(excel_data, dict):
-                    for _, df in excel_data.items():
-                        if not df.empty:
-                            df['__row_idx'] = range(len(df))
-                            candidate_dfs.append(df)
-                else:
-                    excel_data['__row_idx'] = range(len(excel_data))
-                    candidate_dfs.append(excel_data)
-        except:
-            pass
+def _read_raw_dataframes(file, raw_bytes=None):
+    """
+    파일을 읽어서 candidate DataFrame 리스트를 반환 (raw_bytes가 있으면 재사용)
+    디스크에서 한 번만 읽고, 포맷을 먼저 판별해 해당 파서 하나로만 읽음
+    """
+    raw_bytes, err = _read_file_bytes(file, raw_bytes)
+    if err:
+        return [], err
 
-    # 3. HTML (다른 방식으로 읽지 못한 경우)
-    if not candidate_dfs:
-        for enc in ['utf-8', 'cp949', 'euc-kr', 'utf-8-sig']:
-            try:
-                decoded_html = raw_bytes.decode(enc)
-                dfs = pd.read_html(io.StringIO(decoded_html), header=None)
-                if dfs:
-                    for df in dfs:
-                        df['__row_idx'] = range(len(df))
-                    candidate_dfs.extend(dfs)
-                    break
-            except:
-                pass
+    fmt, _, text = _sniff_format(raw_bytes, file)
+    candidate_dfs = _parse_sniffed(raw_bytes, fmt, text)
 
     if not candidate_dfs:
         return [], "내용을 읽을 수 없음"
@@ -80,400 +161,1272 @@ def _read_raw_dataframes(file):
     return candidate_dfs, "OK"
 
 
-def _find_header_and_build_df(candidate_dfs):
-    """candidate_dfs에서 헤더를 탐색하여 정제된 DataFrame을 반환"""
-    final_df = None
-    for raw_df in candidate_dfs:
+# 헤더 탐색 범위 (앞부분 N행)
+_HEADER_SCAN_ROWS = 50
+
+
+def _read_candidates(file, raw_bytes=None):
+    """
+    헤더 탐색용 후보 목록 반환: ([(window_df, loader)], msg)
+      - Excel: 시트마다 앞부분 _HEADER_SCAN_ROWS 행만 읽고(read-only 스트리밍),
+               loader로 헤더가 있는 시트의 필요한 컬럼만 다시 읽음
+      - HTML/CSV: 전체를 읽고 loader는 메모리에서 잘라냄
+    window_df 에는 '__row_idx' 컬럼이 붙어 있음 (_find_header_and_build_df 와 동일한 형태)
+    loader(skiprows=0, usecols=None, dtype=None) → 원본 행 번호를 index로 갖는 DataFrame
+    """
+    raw_bytes, err = _read_file_bytes(file, raw_bytes)
+    if err:
+        return [], err
+
+    fmt, _, text = _sniff_format(raw_bytes, file)
+    candidates = []
+
+    if fmt in ("ole2", "zip"):
+        try:
+            engine = "xlrd" if fmt == "ole2" else "openpyxl"
+            book = pd.ExcelFile(io.BytesIO(raw_bytes), engine=engine)
+            for sheet in book.sheet_names:
+                window = book.parse(sheet, header=None, nrows=_HEADER_SCAN_ROWS)
+                if window.empty:
+                    continue
+                window['__row_idx'] = range(len(window))
+
+                def loader(skiprows=0, usecols=None, dtype=None, _sheet=sheet):
+                    part = book.parse(_sheet, header=None, skiprows=skiprows, usecols=usecols, dtype=dtype)
+                    part.index = part.index + skiprows
+                    return part
+
+                candidates.append((window, loader))
+        except:
+            candidates = []
+    else:
+        for df in _parse_sniffed(raw_bytes, fmt, text):
+            def loader(skiprows=0, usecols=None, dtype=None, _df=df):
+                part = _df.drop(columns='__row_idx').iloc[skiprows:]
+                return part if usecols is None else part[usecols]
+            candidates.append((df, loader))
+
+    if not candidates:
+        return [], "내용을 읽을 수 없음"
+    return candidates, "OK"
+
+
+# 헤더 판별 키워드: 종류별로 [그룹1, 그룹2, ...] — 모든 그룹에서 하나 이상 포함되어야 함
+_HEADER_SPECS = {
+    "tax": [["작성일자"], ["합계금액", "공급가액", "공급받는자", "등록번호"]],
+    "bank": [["일자", "날짜", "거래일"],
+             ["입금", "출금", "찾으신", "맡기신", "내용", "적요", "지급", "의뢰인"]],
+}
+_KIS_SPEC = {"kis": [["대리점명"], ["승인건수"]]}
+
+
+def _detect_header(raw_df, specs, max_rows=_HEADER_SCAN_ROWS):
+    """
+    앞부분 max_rows 행에서 헤더 후보를 한 번에 판별
+    (행 문자열 벡터 1개 + 키워드 적중 행렬 → 종류별 조건/점수를 행 전체에 대해 계산)
+    반환: [(행 번호, 종류, 신뢰도 0~1)] — 신뢰도 높은 순, 같으면 위쪽 행 우선
+    """
+    block = raw_df.iloc[:max_rows]
+    if block.empty:
+        return []
+
+    cells = block.astype(object).where(block.notna(), "").astype(str)
+    row_strs = cells.iloc[:, 0]
+    if cells.shape[1] > 1:
+        row_strs = row_strs.str.cat([cells.iloc[:, j] for j in range(1, cells.shape[1])])
+    row_strs = row_strs.str.replace(" ", "", regex=False).reset_index(drop=True)
+
+    keywords = sorted({kw for groups in specs.values() for g in groups for kw in g})
+    hits = pd.DataFrame({kw: row_strs.str.contains(kw, regex=False) for kw in keywords})
+
+    best_score = np.zeros(len(hits))
+    best_kind = np.full(len(hits), None, dtype=object)
+    for kind, groups in specs.items():
+        ok = np.logical_and.reduce([hits[g].any(axis=1).to_numpy() for g in groups])
+        kind_keywords = [kw for g in groups for kw in g]
+        score = hits[kind_keywords].sum(axis=1).to_numpy() / len(kind_keywords)
+        better = ok & (score > best_score)
+        best_score[better] = score[better]
+        best_kind[better] = kind
+
+    rows = np.flatnonzero(best_kind != None)
+    order = sorted(rows, key=lambda i: (-best_score[i], i))
+    return [(int(i), best_kind[i], round(float(best_score[i]), 3)) for i in order]
+
+
+def _locate_header(candidate_dfs):
+    """
+    candidate_dfs에서 헤더 행 탐색 (_detect_header 점수가 가장 높은 행)
+    반환: (candidate 번호, 헤더 행 번호, 중복 처리된 컬럼명 리스트) 또는 None
+    """
+    for k, raw_df in enumerate(candidate_dfs):
         if raw_df is None or raw_df.empty:
             continue
         if raw_df.shape[1] < 4:
             continue
 
-        found_header = False
-        for i in range(min(50, len(raw_df))):
-            row_values = raw_df.iloc[i].astype(str).tolist()
-            row_str = "".join(row_values).replace(" ", "")
-            is_tax = ("작성일자" in row_str) and (
-                ("합계금액" in row_str) or ("공급가액" in row_str) or
-                ("공급받는자" in row_str) or ("등록번호" in row_str)
-            )
-            is_bank = (
-                ("일자" in row_str) or ("날짜" in row_str) or ("거래일" in row_str)
-            ) and (
-                ("입금" in row_str) or ("출금" in row_str) or ("찾으신" in row_str) or
-                ("맡기신" in row_str) or ("내용" in row_str) or ("적요" in row_str) or
-                ("지급" in row_str) or ("의뢰인" in row_str)
-            )
-
-            if is_tax or is_bank:
-                try:
-                    final_df = raw_df.iloc[i+1:].copy()
-                    final_df.columns = raw_df.iloc[i]
-                    cols = pd.Series(final_df.columns)
-                    for dup in cols[cols.duplicated()].unique():
-                        cols[cols[cols == dup].index.values.tolist()] = [
-                            dup + '_' + str(j) if j != 0 else dup
-                            for j in range(sum(cols == dup))
-                        ]
-                    final_df.columns = cols
-                    found_header = True
-                    break
-                except:
-                    continue
-        if found_header:
-            break
+        for i, _, _ in _detect_header(raw_df, _HEADER_SPECS):
+            try:
+                return k, i, _dedupe_header(raw_df.iloc[i])
+            except:
+                continue
+    return None
 
+
+def _dedupe_header(row):
+    """헤더 행 값 → 중복 이름에 _1, _2 … 를 붙인 컬럼명 리스트"""
+    cols = pd.Series(list(row))
+    for dup in cols[cols.duplicated()].unique():
+        cols[cols[cols == dup].index.values.tolist()] = [
+            dup + '_' + str(j) if j != 0 else dup
+            for j in range(sum(cols == dup))
+        ]
+    return cols.tolist()
+
+
+def _find_header_and_build_df(candidate_dfs):
+    """candidate_dfs에서 헤더를 탐색하여 정제된 DataFrame을 반환"""
+    located = _locate_header(candidate_dfs)
+    if located is None:
+        return None
+    k, i, columns = located
+    final_df = candidate_dfs[k].iloc[i+1:].copy()
+    final_df.columns = columns
     return final_df
 
 
+def _junk_row_mask(df, columns, pattern):
+    """
+    요약/합계 등 불필요한 행 판별 — 지정 컬럼들을 한 번씩만 검사해 결합 마스크 1개 생성
+    pattern: 키워드를 '|'로 묶어 미리 컴파일한 정규식
+    반환: (mask, dropped) — mask: 제거할 행 True / dropped: {키워드: 제거된 행 수} (진단용)
+    """
+    mask = pd.Series(False, index=df.index)
+    texts = []
+    for col in columns:
+        try:
+            text = df[col].astype(str)
+            mask |= text.str.contains(pattern, na=False)
+            texts.append(text)
+        except:
+            pass
+
+    dropped = {}
+    if mask.any():
+        # 제거되는 행에서만 어떤 키워드였는지 집계 (한 행에 여러 키워드면 각각 1건)
+        removed = [t[mask] for t in texts]
+        joined = removed[0].str.cat(removed[1:], sep="\n") if len(removed) > 1 else removed[0]
+        for found in joined.str.findall(pattern):
+            for kw in set(found):
+                dropped[kw] = dropped.get(kw, 0) + 1
+    return mask, dropped
+
+
+def _format_dropped(dropped):
+    """제외 행 집계 → 메시지 꼬리표 (예: " (제외: 합계 2건, 소계 1건)")"""
+    if not dropped:
+        return ""
+    return " (제외: " + ", ".join(f"{kw} {n}건" for kw, n in dropped.items()) + ")"
+
+
+def layouts_file_for(workspaces_dir):
+    """workspaces 폴더의 레이아웃 저장 파일 경로 (read_single_file의 layouts_path 용)"""
+    return os.path.join(parse_cache.cache_dir_for(workspaces_dir), layout_registry.LAYOUTS_FILE)
+
+
+def _match_layout(layouts_path, frames, context):
+    """
+    저장된 레이아웃 중 헤더 위치의 지문이 일치하는 계획 찾기 (헤더 탐색 생략용)
+    반환: (plan, 헤더 컬럼 리스트) 또는 (None, None)
+    """
+    if not layouts_path:
+        return None, None
+    layouts = layout_registry.get_layouts(layouts_path)
+    for k, row in layout_registry.positions(layouts, context):
+        if k >= len(frames) or row >= len(frames[k]):
+            continue
+        # 마지막 '__row_idx' 컬럼은 지문에서 제외
+        fp = layout_registry.header_fingerprint(frames[k].iloc[row, :-1])
+        plan = layouts.get(layout_registry.layout_key(fp, context))
+        if plan is None or plan["k"] != k or plan["header_row"] != row:
+            continue
+        if plan.get("parser") != _PARSER_VERSION:  # 파서가 바뀌었으면 다시 학습
+            continue
+        try:
+            return plan, _dedupe_header(frames[k].iloc[row])
+        except:
+            continue
+    return None, None
+
+
+def _learn_layout(layouts_path, frames, context, plan):
+    """헤더 탐색에 성공한 양식을 저장 (plan: k, header_row + 매핑 정보)"""
+    if not layouts_path:
+        return
+    fp = layout_registry.header_fingerprint(frames[plan["k"]].iloc[plan["header_row"], :-1])
+    layout_registry.remember_layout(layouts_path, fp, context, dict(plan, parser=_PARSER_VERSION))
+
+
+def _forget_layout(layouts_path, plan):
+    if layouts_path and plan is not None:
+        layout_registry.forget_layout(
+            layouts_path, layout_registry.layout_key(plan["fingerprint"], plan["context"]))
+
+
 # =============================================================================
 # [메인 함수 1] load_and_classify_data — 01_Finance.py / main.py 용
 # =============================================================================
 
-def load_and_classify_data(workspaces_dir, rules):
+# 파싱 로직이 바뀌면 올려서 1단계 캐시를 무효화
+_PARSER_VERSION = 9
+
+# 반환 DataFrame 스키마 (to_output_schema)
+#   날짜                 datetime64[ns] (시각 없음, 해석 불가 NaT)
+#   적요                 string[pyarrow] (pyarrow 미설치 시 object)
+#   입금 / 출금          int64 (원)
+#   대분류 / 소분류 / 파일명  category
+#   __row_idx            int64 (원본 시트 행 번호)
+OUTPUT_COLUMNS = ['날짜', '__row_idx', '적요', '입금', '출금', '파일명', '대분류', '소분류']
+_CATEGORY_COLUMNS = ['대분류', '소분류', '파일명']
+
+# 날짜/적요 컬럼에 포함되면 제외할 행 (합계, 조회 조건 등)
+_TRASH_KEYWORDS = ["합계", "총계", "소계", "누계", "평잔", "거래내역", "조회기간"]
+_TRASH_PATTERN = re.compile("|".join(_TRASH_KEYWORDS))
+
+# KIS빌링: 대리점명 열에서 제외할 행 (합계/인센티브/수수료)
+_KIS_SKIP_PATTERN = re.compile("합계|인센티브|수수료")
+
+_FILE_BLACKLIST = [
+    "contact", "project", "address", "phone", "member",
+    "주소록", "연락처", "명부", "현황",
+    "contract", "계약", "proposal", "제안", "schedule", "일정"
+]
+
+
+def _resolve_columns(columns, filename):
     """
-    폴더 내의 모든 엑셀/HTML 파일을 읽어서 통합 DataFrame과 로딩 로그를 반환합니다.
-    (수정: 투자 우선순위, 컬럼매핑 first-match, 출금 != 0)
+    정리된 컬럼명 리스트 → 역할별 컬럼 매핑
+    반환: {"date", "main_desc", "sub_desc", "in", "out", "amt"} (없으면 None)
     """
-    load_status = {}
+    col_map = {"date": None, "main_desc": None, "sub_desc": None, "in": None, "out": None, "amt": None}
+
+    sangho_cols = [c for c in columns if "상호" in c]
+    if sangho_cols:
+        if "매출" in filename:
+            receiver_col = next((c for c in sangho_cols if "받는" in c), None)
+            col_map["main_desc"] = receiver_col if receiver_col else sangho_cols[-1]
+        elif "매입" in filename:
+            supplier_col = next((c for c in sangho_cols if "받는" not in c), None)
+            col_map["main_desc"] = supplier_col if supplier_col else sangho_cols[0]
+        else:
+            col_map["main_desc"] = sangho_cols[0]
+
+    col_map["sub_desc"] = next((c for c in columns if "적요" in c), None)
+    if col_map["main_desc"] is None:
+        primary_keywords = ["의뢰인", "수취인", "기재내용", "내용", "받는분", "보낸분", "성명"]
+        for kw in primary_keywords:
+            found = next((c for c in columns if kw in c and c != col_map["sub_desc"]), None)
+            if found:
+                col_map["main_desc"] = found
+                break
+        if col_map["main_desc"] is None and col_map["sub_desc"] is not None:
+            col_map["main_desc"] = col_map["sub_desc"]
+            col_map["sub_desc"] = None
+
+    # [수정 #7] 컬럼 매핑 — 첫 번째 매칭 우선 (덮어쓰기 방지)
+    for c in columns:
+        if col_map["date"] is None and any(k in c for k in ["작성일자", "일자", "날짜", "거래일"]):
+            col_map["date"] = c
+        if col_map["in"] is None and any(k in c for k in ["입금", "맡기신"]):
+            col_map["in"] = c
+        if col_map["out"] is None and any(k in c for k in ["출금", "찾으신", "지급"]):
+            col_map["out"] = c
+
+    # 금액 컬럼: 키워드 우선순위대로 탐색 (공급가액 > 합계금액)
+    # 컬럼 순회가 아닌 키워드 순회로, 엑셀 컬럼 순서와 무관하게 공급가액 우선
+    for amt_keyword in ["공급가액", "합계금액"]:
+        if col_map["amt"] is not None:
+            break
+        for c in columns:
+            if amt_keyword in c:
+                col_map["amt"] = c
+                break
+
+    return col_map
+
+
+def _parse_kis(candidates, file, filename):
+    """
+    KIS빌링 정산 시트 감지 및 처리
+    반환: _parse_file 결과 형식 dict, KIS빌링 시트가 아니면 None
+    """
+    for window, loader in candidates:
+        if window.shape[1] < 6:
+            continue
+        # 상위 5행에서 "대리점명" + "승인건수" 패턴 탐색
+        if not _detect_header(window, _KIS_SPEC, max_rows=5):
+            continue
 
+        # KIS빌링 확인 — 해당 시트 전체 읽기
+        try:
+            raw_df = loader()
+        except:
+            continue
+
+        # 헤더 이후 첫 데이터 행 찾기 (col 0이 실제 대리점명인 행)
+        names = raw_df.iloc[:, 0]
+        name_strs = names.where(names.notna(), "").astype(str).str.strip()
+        is_name = names.notna() & (name_strs != "") & (name_strs != "대리점명") & ~name_strs.str.startswith("nan")
+        if not is_name.any():
+            continue
+        data_start = int(is_name.to_numpy().argmax())
+
+        # 날짜: 파일명에서 추출 → 못 찾으면 파일 수정일
+        date_str = _extract_date_from_filename(filename)
+        if not date_str:
+            try:
+                from datetime import datetime as _dt
+                mtime = os.path.getmtime(file)
+                date_str = _dt.fromtimestamp(mtime).strftime('%Y-%m')
+            except:
+                from datetime import datetime as _dt
+                date_str = _dt.now().strftime('%Y-%m')
+
+        # 데이터 블록 한 번에 처리: 빈 대리점명 / 합계·인센티브·수수료 행 / 금액 0 제외
+        block_names = name_strs.iloc[data_start:]
+        amounts = raw_df.iloc[data_start:, 5]  # F열 (index 5)
+        amt_vals = currency_parser.parse_won(amounts)
+
+        keep = (
+            names.iloc[data_start:].notna() & (block_names != "")
+            & ~block_names.str.contains(_KIS_SKIP_PATTERN)
+            & amounts.notna() & (amt_vals != 0)
+        ).to_numpy()
+
+        if keep.any():
+            day = pd.to_datetime(f"{date_str}-01", errors='coerce')
+            temp = pd.DataFrame({
+                '날짜': day,
+                '적요': block_names.to_numpy()[keep],
+                '입금': amt_vals.to_numpy()[keep],
+                '출금': 0,
+                '파일명': filename,
+                '__row_idx': np.arange(data_start, len(raw_df))[keep],
+            })
+            status = {"status": "Success", "msg": f"KIS빌링 {len(temp)}건 로드"}
+            return {"kind": "kis", "rows": temp, "status": status}
+        status = {"status": "Warn", "msg": "KIS빌링 형식이나 유효 데이터 0건"}
+        return {"kind": "kis", "rows": None, "status": status}  # 첫 번째 매칭 시트만 처리
+
+    return None
+
+
+def _parse_file(file, filename, raw_bytes=None, layouts_path=None):
+    """
+    [1단계] 규칙과 무관한 파싱: 파일 → 정규화된 거래 행
+    반환: {"kind": "kis" | "table" | None, "rows": DataFrame | None, "status": {...}}
+    Excel은 앞부분만 읽어 헤더를 찾은 뒤, 해당 시트의 필요한 컬럼만 다시 읽음
+    layouts_path가 있으면 저장된 양식과 헤더 지문이 일치할 때 헤더 탐색/컬럼 매핑을 생략
+    """
+    # A. 파일 읽기 (헤더 탐색용 앞부분)
+    candidates, read_msg = _read_candidates(file, raw_bytes)
+    if not candidates:
+        return {"kind": None, "rows": None, "status": {"status": "Fail", "msg": read_msg}}
+
+    windows = [window for window, _ in candidates]
+    context = "table|" + ("매출" if "매출" in filename else "매입" if "매입" in filename else "")
+    plan, header = _match_layout(layouts_path, windows, context)
+
+    if plan is None:
+        # A-2. KIS빌링 포맷 감지 및 처리
+        kis = _parse_kis(candidates, file, filename)
+        if kis is not None:
+            return kis
+
+        # B. 표 찾기 (앞부분에서 헤더 행 탐색)
+        located = _locate_header(windows)
+        if located is None:
+            return {"kind": None, "rows": None, "status": {"status": "Skip", "msg": "헤더 미발견"}}
+
+    # C. 정제
+    try:
+        if plan is not None:
+            # 저장된 양식: 헤더 위치/컬럼 매핑/날짜 형식 그대로 사용
+            k, header_row = plan["k"], plan["header_row"]
+            columns = [str(c).strip().replace(" ", "") for c in header]
+            col_map = plan["col_map"]
+        else:
+            k, header_row, header = located
+            columns = [str(c).strip().replace(" ", "") for c in header]
+            col_map = _resolve_columns(columns, filename)
+
+            if not col_map["date"]:
+                return {"kind": None, "rows": None, "status": {"status": "Skip", "msg": "날짜 컬럼 없음"}}
+
+        # 매핑된 컬럼만, 헤더 다음 행부터 읽기 (날짜/적요는 원본 값 그대로 object)
+        # 마지막 위치는 '__row_idx' 이므로 제외
+        positions = {}
+        for role, name in col_map.items():
+            if name is not None and columns.index(name) < len(columns) - 1:
+                positions.setdefault(name, columns.index(name))
+        text_positions = {positions[col_map[r]] for r in ("date", "main_desc", "sub_desc") if col_map[r] in positions}
+        usecols = sorted(positions.values())
+        df = candidates[k][1](
+            skiprows=header_row + 1, usecols=usecols,
+            dtype={p: object for p in text_positions}
+        )
+        df.columns = [columns[p] for p in usecols]
+
+        check_cols = [col_map["date"]]
+        if col_map["main_desc"]:
+            check_cols.append(col_map["main_desc"])
+        junk, dropped = _junk_row_mask(df, check_cols, _TRASH_PATTERN)
+        df = df[~junk]
+
+        date_key = tuple(columns)
+        df['__parsed_date'] = date_parser.parse_dates(
+            df[col_map["date"]], key=date_key, formats=plan["date_formats"] if plan else ()
+        )
+        df = df.dropna(subset=['__parsed_date'])
+
+        temp = pd.DataFrame()
+
+        temp['날짜'] = df['__parsed_date'].dt.normalize()
+        temp['__row_idx'] = df.index
+
+        if col_map["main_desc"]:
+            main_vals = df[col_map["main_desc"]].fillna("").astype(str).str.strip()
+            temp['적요'] = main_vals
+            if col_map["sub_desc"]:
+                sub_vals = df[col_map["sub_desc"]].fillna("").astype(str).str.strip()
+                mask_empty = (temp['적요'] == '') | (temp['적요'] == 'nan')
+                temp.loc[mask_empty, '적요'] = sub_vals[mask_empty]
+        else:
+            temp['적요'] = "내용없음"
+
+        val_in = currency_parser.parse_won(df[col_map["in"]]) if col_map["in"] else 0
+        val_out = currency_parser.parse_won(df[col_map["out"]]) if col_map["out"] else 0
+        val_amt = currency_parser.parse_won(df[col_map["amt"]]) if col_map["amt"] else 0
+
+        if "매출" in filename:
+            temp['입금'] = val_amt if col_map["amt"] else val_in
+            temp['출금'] = 0
+        elif "매입" in filename:
+            temp['입금'] = 0
+            temp['출금'] = val_amt if col_map["amt"] else val_out
+        else:
+            temp['입금'] = val_in
+            temp['출금'] = val_out
+            if (col_map["amt"]) and (not col_map["in"]) and (not col_map["out"]):
+                temp['입금'] = val_amt
+
+        temp['파일명'] = filename
+        temp = temp[(temp['입금'] != 0) | (temp['출금'] != 0)]
+
+        if temp.empty:
+            status = {"status": "Warn", "msg": "데이터 0건"}
+        else:
+            status = {"status": "Success", "msg": f"{len(temp)}건 로드"}
+            if plan is None:
+                _learn_layout(layouts_path, windows, context, {
+                    "k": k, "header_row": header_row, "col_map": col_map,
+                    "date_formats": date_parser.known_formats(date_key),
+                })
+        if dropped:
+            status["dropped"] = dropped
+        return {"kind": "table", "rows": temp if not temp.empty else None, "status": status}
+
+    except Exception as e:
+        _forget_layout(layouts_path, plan)
+        return {"kind": None, "rows": None, "status": {"status": "Fail", "msg": f"처리 에러: {e}"}}
+
+
+# 분류 결과 라벨 (대분류, 소분류 고정값) — _classify_columns 분기 순서대로
+_CLASSIFY_BRANCHES = [
+    # [입금] 매출 파일 → 항상 분류
+    ("매출", "매출"),
+    ("매출", "세금계산서(매출)"),
+    # [입금] 은행 → 제외 키워드 있으면 무조건 제외, 없으면 규칙 매칭
+    ("입금(매출제외)", "세금계산서 발행처"),
+    ("입금(매출제외)", "매출"),
+    ("투자회수", "투자"),
+    ("미분류", "-"),
+    # [출금] 매입 파일 → 항상 분류 (제외 영향 없음)
+    ("판관비", "판관비"),
+    ("기타비용", "기타비용"),
+    ("판관비", "세금계산서(매입)"),
+    # [출금] 은행 → 제외 키워드 있으면 무조건 제외, 없으면 투자 → 판관비 → 기타비용
+    ("출금(비용제외)", "세금계산서 발행처"),
+    ("투자", "투자"),
+    ("판관비", "판관비"),
+    ("기타비용", "기타비용"),
+]
+
+
+def _classify_columns(temp, matcher):
+    """
+    [수정 #5, #10] 분류 로직 — 투자 우선순위 + 출금 != 0, 컬럼 단위 계산
+    파일 종류 / 입출금 방향 / 제외 키워드 / 규칙 매칭을 불리언 마스크로 만든 뒤
+    np.select로 분기 순서대로 첫 번째 조건을 선택 (행 단위 classify와 동일한 결과)
+    소분류의 두 번째 값이 카테고리명이면 해당 카테고리의 당첨 규칙 값, 아니면 고정값
+    반환: (대분류 배열, 소분류 배열)
+    """
+    hits = rule_matcher.match_frame(matcher, temp['적요'])
+    none = np.full(len(temp), None, dtype=object)
+    rule = {c: (hits[c].to_numpy() if c in hits else none) for c in rule_matcher.RULE_CATEGORIES}
+    has = {c: pd.notna(v) for c, v in rule.items()}
+    ignored = hits[rule_matcher.IGNORE_COLUMN].to_numpy()
+
+    fname = temp['파일명'].astype(str)
+    is_sales = fname.str.contains("매출", regex=False).to_numpy()
+    is_purchase = fname.str.contains("매입", regex=False).to_numpy()
+    is_in = (temp['입금'] != 0).to_numpy()
+    is_out = ~is_in & (temp['출금'] != 0).to_numpy()
+
+    conditions = [
+        is_in & is_sales & has["매출"],
+        is_in & is_sales,
+        is_in & ignored,
+        is_in & has["매출"],
+        is_in & has["투자"],
+        is_in,
+        is_out & is_purchase & has["판관비"],
+        is_out & is_purchase & has["기타비용"],
+        is_out & is_purchase,
+        is_out & ignored,
+        is_out & has["투자"],
+        is_out & has["판관비"],
+        is_out & has["기타비용"],
+    ]
+
+    n = len(temp)
+    main = np.select(conditions, [np.full(n, m, dtype=object) for m, _ in _CLASSIFY_BRANCHES],
+                     default="미분류")
+    sub = np.select(conditions,
+                    [rule[s] if s in rule else np.full(n, s, dtype=object) for _, s in _CLASSIFY_BRANCHES],
+                    default="-")
+    return main, sub
+
+
+def _classify_parsed(parsed, rules):
+    """
+    [2단계] 규칙 적용: _parse_file 결과 → 대분류/소분류가 붙은 행
+    반환: {"rows": DataFrame | None, "status": {...}}
+    """
+    temp = parsed["rows"]
+    if temp is None:
+        return {"rows": None, "status": parsed["status"]}
+
+    # 규칙 매칭: 긴 키워드가 먼저 매칭 (rule_matcher — 규칙 버전별 컴파일 오토마타)
+    # 예) "김미정(해링턴플레이" → 해링턴임대료 가 "김미정" → 대표임금 보다 먼저 체크
     user_ignore_list = rules.get("중복방지", [])
     final_ignore_list = list(set(DEFAULT_IGNORE_KEYWORDS + user_ignore_list))
+    matcher = rule_matcher.get_matcher(rules, sorted(final_ignore_list))
 
-    if not os.path.exists(workspaces_dir):
-        return pd.DataFrame(), load_status
+    if parsed["kind"] == "kis":
+        # 매출 규칙으로 소분류 결정 (긴 키워드 우선), 기본값: 대리점명 전체
+        hits = rule_matcher.match_frame(matcher, temp['적요'])
+        sub = hits["매출"] if "매출" in hits else pd.Series(None, index=temp.index, dtype=object)
 
-    all_files = glob.glob(os.path.join(workspaces_dir, "**", "*.xlsx"), recursive=True)
-    all_files += glob.glob(os.path.join(workspaces_dir, "**", "*.xls"), recursive=True)
-    all_files += glob.glob(os.path.join(workspaces_dir, "**", "*.csv"), recursive=True)
+        temp = temp.copy()
+        temp.insert(len(temp.columns) - 1, '대분류', '매출')
+        temp.insert(len(temp.columns) - 1, '소분류', sub.where(sub.notna(), temp['적요']))
+        return {"rows": temp, "status": parsed["status"]}
 
-    all_tx = []
+    try:
+        temp = temp.copy()
+        temp['대분류'], temp['소분류'] = _classify_columns(temp, matcher)
 
-    for file in all_files:
-        filename = os.path.basename(file)
-        load_status[filename] = {"status": "Ready", "msg": "대기 중"}
+        mask = (temp['대분류'] == '매출') & (temp['출금'] > 0)
+        if mask.any():
+            temp.loc[mask, '입금'] = -temp.loc[mask, '출금']
+            temp.loc[mask, '출금'] = 0
+    except Exception as e:
+        return {"rows": None, "status": {"status": "Fail", "msg": f"처리 에러: {e}"}}
 
-        filename_lower = filename.lower()
-        blacklist = [
-            "contact", "project", "address", "phone", "member",
-            "주소록", "연락처", "명부", "현황",
-            "contract", "계약", "proposal", "제안", "schedule", "일정"
-        ]
+    return {"rows": temp, "status": parsed["status"]}
+
+
+def _load_file_cached(file, filename, rules, rules_ver, cache_dir, digest=None):
+    """
+    파일 하나를 2단계 캐시를 거쳐 분류된 결과로 변환
+    - 분류 캐시(내용 해시 + 규칙 버전) 적중 → 즉시 반환
+    - 파싱 캐시(내용 해시) 적중 → 엑셀을 다시 읽지 않고 규칙만 재적용
+    digest(manifest에 기록된 내용 해시)가 있으면 캐시 적중 시 파일을 열지 않음
+    반환: (entry, digest) — 파일을 열 수 없으면 digest는 None
+    """
+    raw_bytes = None
+    if digest is None:
+        try:
+            with open(file, "rb") as f:
+                raw_bytes = f.read()
+        except Exception as e:
+            return {"rows": None, "status": {"status": "Fail", "msg": f"파일 열기 실패: {e}"}}, None
+        digest = parse_cache.content_hash(raw_bytes)
+
+    key = parse_cache.file_key(digest, filename, _PARSER_VERSION)
+    classified_key = f"{key}_{rules_ver}"
+
+    entry = parse_cache.cache_get(cache_dir, parse_cache.TIER_CLASSIFIED, classified_key)
+    if entry is not None:
+        return entry, digest
 
-        if any(k in filename_lower for k in blacklist):
+    parsed = parse_cache.cache_get(cache_dir, parse_cache.TIER_PARSED, key)
+    if parsed is None:
+        layouts_path = os.path.join(cache_dir, layout_registry.LAYOUTS_FILE)
+        parsed = _parse_file(file, filename, raw_bytes, layouts_path)
+        parse_cache.cache_put(cache_dir, parse_cache.TIER_PARSED, key, parsed)
+
+    entry = _classify_parsed(parsed, rules)
+    parse_cache.cache_put(cache_dir, parse_cache.TIER_CLASSIFIED, classified_key, entry)
+    return entry, digest
+
+
+def _parse_and_classify(file, filename, rules):
+    """캐시 없이 파일 하나를 파싱 + 분류"""
+    return _classify_parsed(_parse_file(file, filename), rules)
+
+
+# 파일 수가 이보다 적으면 프로세스 풀 기동 비용이 더 커서 순차 처리
+PARALLEL_MIN_FILES = 4
+
+
+def _pool_call(func, task):
+    """프로세스 풀 작업자: func(*task) 결과 + 이 작업에서 학습/삭제한 레이아웃 (layouts.json은 부모가 저장)"""
+    layout_registry.defer_writes()
+    return func(*task), layout_registry.take_deferred()
+
+
+def _run_tasks(func, tasks, max_workers=None):
+    """
+    func(*task)를 tasks 순서대로 실행하고 결과 리스트를 같은 순서로 반환
+    기본은 순차 처리. max_workers가 2 이상이고 파일이 많으면 ProcessPoolExecutor로 분산
+    (pandas/openpyxl 파싱은 GIL에 묶여 스레드로는 병렬화 안 됨)
+      - 스트림릿 서버는 멀티스레드라 fork 대신 spawn으로 작업자 시작
+      - 작업자가 학습한 레이아웃은 결과와 함께 받아 여기서 한 번에 저장
+    프로세스 풀을 쓸 수 없는 환경이면 순차 처리로 대체
+    """
+    if not max_workers or max_workers <= 1 or len(tasks) < PARALLEL_MIN_FILES:
+        return [func(*t) for t in tasks]
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)),
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_pool_call, func, t) for t in tasks]
+            done = [f.result() for f in futures]
+    except Exception:
+        return [func(*t) for t in tasks]
+
+    for _, changes in done:
+        layout_registry.apply_deferred(changes)
+    return [result for result, _ in done]
+
+
+def _is_blacklisted(filename):
+    filename_lower = filename.lower()
+    return any(k in filename_lower for k in _FILE_BLACKLIST)
+
+
+def to_output_schema(df):
+    """
+    거래 DataFrame → 반환 스키마 (OUTPUT_COLUMNS 참고)
+    수기 입력 행 등을 합친 뒤 다시 호출해도 됨 (이미 맞는 컬럼은 그대로)
+    """
+    df = df.copy()
+    if '날짜' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['날짜']):
+        df['날짜'] = pd.to_datetime(df['날짜'], errors='coerce', format='mixed').dt.normalize()
+    for col in ['입금', '출금', '__row_idx']:
+        if col in df.columns and df[col].dtype != 'int64':
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).round().astype('int64')
+    if '적요' in df.columns and df['적요'].dtype != _TEXT_DTYPE:
+        df['적요'] = df['적요'].astype(object).where(df['적요'].notna(), "").astype(str).astype(_TEXT_DTYPE)
+    for col in _CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+# index_by_month()가 붙이는 (연, 월) → 행 범위 색인 (df.attrs 키)
+MONTH_INDEX_ATTR = "month_index"
+
+
+def index_by_month(df):
+    """
+    날짜순 정렬 (같은 날짜는 기존 순서 유지, 날짜 없는 행은 맨 뒤) + (연, 월) → 행 범위 색인
+    색인: df.attrs['month_index'] = {(연, 월): (시작, 끝)} — month_rows()로 바로 슬라이스
+    행을 추가·정렬한 뒤에는 다시 호출해야 함
+    """
+    if df.empty or '날짜' not in df.columns:
+        out = df.copy()
+        out.attrs[MONTH_INDEX_ATTR] = {}
+        return out
+    out = df.sort_values('날짜', kind='mergesort', na_position='last').reset_index(drop=True)
+    dates = out['날짜']
+    valid = int(dates.notna().sum())
+    keys = (dates.dt.year.to_numpy()[:valid] * 100 + dates.dt.month.to_numpy()[:valid]).astype('int64')
+    bounds = np.r_[0, np.flatnonzero(np.diff(keys)) + 1, valid] if valid else np.array([0])
+    out.attrs[MONTH_INDEX_ATTR] = {
+        divmod(int(keys[lo]), 100): (int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])
+    }
+    return out
+
+
+def month_rows(df, year, month):
+    """index_by_month() 결과에서 (연, 월) 행 슬라이스 (없으면 빈 DataFrame)"""
+    lo, hi = df.attrs.get(MONTH_INDEX_ATTR, {}).get((int(year), int(month)), (0, 0))
+    return df.iloc[lo:hi]
+
+
+def _load_status(scanned, entries, sealed=()):
+    """파일명 → 로딩 상태 (스캔 순서)"""
+    load_status = {}
+    for rel in scanned:
+        filename = os.path.basename(rel)
+        if _is_blacklisted(filename):
             load_status[filename] = {"status": "Ignore", "msg": "재무 데이터 아님 (제외됨)"}
-            continue
+        elif rel in sealed:
+            load_status[filename] = {"status": "Skip", "msg": "마감된 달 (변경 없음)"}
+        elif rel in entries:
+            load_status[filename] = entries[rel]["status"]
+    return load_status
 
-        # A. 파일 읽기
-        candidate_dfs, read_msg = _read_raw_dataframes(file)
-        if not candidate_dfs:
-            load_status[filename] = {"status": "Fail", "msg": read_msg}
-            continue
 
-        # A-2. KIS빌링 포맷 감지 및 처리
-        kis_processed = False
-        for raw_df in candidate_dfs:
-            if raw_df.shape[1] < 6:
-                continue
-            # 상위 5행에서 "대리점명" + "승인건수" 패턴 탐색
-            is_kis = False
-            for i in range(min(5, len(raw_df))):
-                row_str = "".join(raw_df.iloc[i].astype(str))
-                if "대리점명" in row_str and "승인건수" in row_str:
-                    is_kis = True
-                    break
-            if not is_kis:
-                continue
+# 파일 간 중복 행 판정 컬럼
+_DEDUP_COLUMNS = ['날짜', '적요', '입금', '출금', '파일명', '__row_idx']
 
-            # KIS빌링 확인 — 데이터 행 추출
-            # 헤더 이후 첫 데이터 행 찾기 (col 0이 실제 대리점명인 행)
-            data_start = None
-            for i in range(len(raw_df)):
-                val = raw_df.iloc[i, 0]
-                if pd.notna(val):
-                    val_str = str(val).strip()
-                    if val_str and val_str != "대리점명" and not val_str.startswith("nan"):
-                        data_start = i
-                        break
-            if data_start is None:
-                continue
 
-            # 날짜: 파일명에서 추출 → 못 찾으면 파일 수정일
-            date_str = _extract_date_from_filename(filename)
-            if not date_str:
-                try:
-                    from datetime import datetime as _dt
-                    mtime = os.path.getmtime(file)
-                    date_str = _dt.fromtimestamp(mtime).strftime('%Y-%m')
-                except:
-                    from datetime import datetime as _dt
-                    date_str = _dt.now().strftime('%Y-%m')
-
-            kis_rows = []
-            for i in range(data_start, len(raw_df)):
-                name = raw_df.iloc[i, 0]
-                amount = raw_df.iloc[i, 5]  # F열 (index 5)
-
-                if pd.isna(name) or str(name).strip() == "":
-                    continue
-                name_str = str(name).strip()
+def _merge_entries(scanned, entries):
+    """파일별 결과를 스캔 순서대로 합쳐 (DataFrame, load_status) 생성"""
+    all_tx = [
+        entries[rel]["rows"] for rel in scanned
+        if not _is_blacklisted(os.path.basename(rel)) and entries[rel]["rows"] is not None
+    ]
 
-                # 합계/인센티브/수수료 행 제외
-                if any(kw in name_str for kw in ["합계", "인센티브", "수수료"]):
-                    continue
+    final_df = pd.concat(all_tx, ignore_index=True) if all_tx else pd.DataFrame()
 
-                # 금액 변환
-                try:
-                    amt_val = float(str(amount).replace(",", ""))
-                except:
-                    amt_val = 0
-                if pd.isna(amount) or amt_val == 0:
-                    continue
+    if not final_df.empty:
+        final_df = final_df.drop_duplicates(subset=_DEDUP_COLUMNS, keep='first')
+        final_df = to_output_schema(final_df)[OUTPUT_COLUMNS].reset_index(drop=True)
 
-                # 매출 규칙으로 소분류 결정 (긴 키워드 우선)
-                sub_cat = name_str  # 기본값: 대리점명 전체
-                for k, v in sorted(rules.get("매출", {}).items(), key=lambda x: len(x[0]), reverse=True):
-                    if k in name_str:
-                        sub_cat = v
-                        break
+    return final_df, _load_status(scanned, entries)
 
-                kis_rows.append({
-                    '날짜': f"{date_str}-01",
-                    '적요': name_str,
-                    '입금': amt_val,
-                    '출금': 0,
-                    '파일명': filename,
-                    '대분류': '매출',
-                    '소분류': sub_cat,
-                    '__row_idx': i
-                })
 
-            if kis_rows:
-                temp = pd.DataFrame(kis_rows)
-                temp['날짜'] = pd.to_datetime(temp['날짜'], errors='coerce').dt.strftime('%Y-%m-%d')
-                all_tx.append(temp)
-                load_status[filename] = {"status": "Success", "msg": f"KIS빌링 {len(kis_rows)}건 로드"}
-                kis_processed = True
-            else:
-                load_status[filename] = {"status": "Warn", "msg": "KIS빌링 형식이나 유효 데이터 0건"}
-                kis_processed = True
-            break  # 첫 번째 매칭 시트만 처리
+# 프로세스 내 메모: workspaces 경로 → manifest / 파일별 분류 결과 / 마지막 병합 결과
+_WORKSPACE_MEMO = {}
+_LOAD_LOCK = threading.Lock()
+_STATE_FILE = "workspace_state.pkl"
 
-        if kis_processed:
-            continue
 
-        # B. 표 찾기
-        final_df = _find_header_and_build_df(candidate_dfs)
+def _stores_for(workspaces_dir):
+    """분류 결과를 반영할 저장소 [(이름, 모듈, 경로)] — Parquet 저장소는 pyarrow가 있을 때만"""
+    stores = [("db", data_store, data_store.db_path_for(workspaces_dir))]
+    if warehouse.available():
+        stores.append(("warehouse", warehouse, warehouse.root_for(workspaces_dir)))
+    return stores
 
-        if final_df is None:
-            load_status[filename] = {"status": "Skip", "msg": "헤더 미발견"}
-            continue
 
-        # C. 정제
+def _sync_stores(workspaces_dir, manifest, entries, digests, present, rules_ver, start=None, end=None, skip=()):
+    """
+    파일별 분류 결과를 로컬 저장소(SQLite / Parquet)에 반영
+    저장소에 기록된 (내용 해시, 규칙 버전)이 다른 파일만 다시 쓰고, 사라진 파일(present에 없음)의 행은 삭제
+    entries에 없는 파일(기간 조회로 건너뛴 파일)은 그대로 둠
+    단, 기간 [start, end)에 걸치는 파일(skip 제외)이 저장소에 없거나 낡았는데 entries에도 없으면
+    (저장소 파일이 지워진 경우 등) 그 저장소는 반영 실패로 봄 → 조회는 다른 저장소/직접 로드로
+    반환: 반영에 성공한 저장소 이름 집합 (저장소 오류는 로딩에 영향 없음)
+    """
+    synced = set()
+    for name, store, path in _stores_for(workspaces_dir):
         try:
-            df = final_df.copy()
-            df.columns = [str(c).strip().replace(" ", "") for c in df.columns]
-            row_idx_col = next((c for c in df.columns if "__row_idx" in str(c)), None)
-
-            col_map = {"date": None, "main_desc": None, "sub_desc": None, "in": None, "out": None, "amt": None}
-
-            sangho_cols = [c for c in df.columns if "상호" in c]
-            if sangho_cols:
-                if "매출" in filename:
-                    receiver_col = next((c for c in sangho_cols if "받는" in c), None)
-                    col_map["main_desc"] = receiver_col if receiver_col else sangho_cols[-1]
-                elif "매입" in filename:
-                    supplier_col = next((c for c in sangho_cols if "받는" not in c), None)
-                    col_map["main_desc"] = supplier_col if supplier_col else sangho_cols[0]
-                else:
-                    col_map["main_desc"] = sangho_cols[0]
-
-            col_map["sub_desc"] = next((c for c in df.columns if "적요" in c), None)
-            if col_map["main_desc"] is None:
-                primary_keywords = ["의뢰인", "수취인", "기재내용", "내용", "받는분", "보낸분", "성명"]
-                for kw in primary_keywords:
-                    found = next((c for c in df.columns if kw in c and c != col_map["sub_desc"]), None)
-                    if found:
-                        col_map["main_desc"] = found
-                        break
-                if col_map["main_desc"] is None and col_map["sub_desc"] is not None:
-                    col_map["main_desc"] = col_map["sub_desc"]
-                    col_map["sub_desc"] = None
-
-            # [수정 #7] 컬럼 매핑 — 첫 번째 매칭 우선 (덮어쓰기 방지)
-            for c in df.columns:
-                if col_map["date"] is None and any(k in c for k in ["작성일자", "일자", "날짜", "거래일"]):
-                    col_map["date"] = c
-                if col_map["in"] is None and any(k in c for k in ["입금", "맡기신"]):
-                    col_map["in"] = c
-                if col_map["out"] is None and any(k in c for k in ["출금", "찾으신", "지급"]):
-                    col_map["out"] = c
-
-            # 금액 컬럼: 키워드 우선순위대로 탐색 (공급가액 > 합계금액)
-            # 컬럼 순회가 아닌 키워드 순회로, 엑셀 컬럼 순서와 무관하게 공급가액 우선
-            for amt_keyword in ["공급가액", "합계금액"]:
-                if col_map["amt"] is not None:
-                    break
-                for c in df.columns:
-                    if amt_keyword in c:
-                        col_map["amt"] = c
-                        break
+            stored = store.file_versions(path)
+            updates = {}
+            for rel, entry in entries.items():
+                digest = manifest.get(rel, {}).get("hash")
+                if digest and digests.get(rel) == digest and stored.get(rel) != (digest, rules_ver):
+                    updates[rel] = (digest, rules_ver, entry["rows"])
+            removed = [rel for rel in stored if rel not in present]
+            if updates or removed:
+                store.write_file_rows(path, updates, removed)
+            stale = [rel for rel in present
+                     if rel not in entries and rel not in skip and rel in manifest
+                     and stored.get(rel) != (manifest[rel].get("hash"), rules_ver)
+                     and _may_overlap(manifest[rel], start, end)]
+            if not stale:
+                synced.add(name)
+        except Exception:
+            pass
+    return synced
 
-            if not col_map["date"]:
-                load_status[filename] = {"status": "Skip", "msg": "날짜 컬럼 없음"}
-                continue
 
-            trash_keywords = ["합계", "총계", "소계", "누계", "평잔", "거래내역", "조회기간"]
-            check_cols = [col_map["date"]]
-            if col_map["main_desc"]:
-                check_cols.append(col_map["main_desc"])
-            for col in check_cols:
-                for kw in trash_keywords:
-                    df = df[~df[col].astype(str).str.contains(kw, na=False)]
+def _period_bounds(start, end):
+    return (pd.Timestamp(start) if start is not None else None,
+            pd.Timestamp(end) if end is not None else None)
 
-            df['__parsed_date'] = pd.to_datetime(df[col_map["date"]], errors='coerce')
-            df = df.dropna(subset=['__parsed_date'])
 
-            temp = pd.DataFrame()
+def _entry_span(entry):
+    """분류 결과의 실제 날짜 범위 [최소, 최대] (ISO 문자열) — 날짜 있는 행이 없으면 None"""
+    rows = entry.get("rows")
+    if rows is None or rows.empty:
+        return None
+    dates = pd.to_datetime(rows['날짜'], errors='coerce').dropna()
+    if dates.empty:
+        return None
+    return [dates.min().date().isoformat(), dates.max().date().isoformat()]
 
-            def clean_money(series):
-                if series is None:
-                    return 0
-                return pd.to_numeric(series.astype(str).str.replace(r'[^\d.-]', '', regex=True), errors='coerce').fillna(0)
 
-            temp['날짜'] = df['__parsed_date'].dt.strftime('%Y-%m-%d')
-            if row_idx_col:
-                temp['__row_idx'] = df[row_idx_col]
-            else:
-                temp['__row_idx'] = df.index
-
-            if col_map["main_desc"]:
-                main_vals = df[col_map["main_desc"]].fillna("").astype(str).str.strip()
-                temp['적요'] = main_vals
-                if col_map["sub_desc"]:
-                    sub_vals = df[col_map["sub_desc"]].fillna("").astype(str).str.strip()
-                    mask_empty = (temp['적요'] == '') | (temp['적요'] == 'nan')
-                    temp.loc[mask_empty, '적요'] = sub_vals[mask_empty]
-            else:
-                temp['적요'] = "내용없음"
+def _entry_cube(rel, entry):
+    """파일 하나의 집계 큐브 (manifest 저장용 레코드 — aggregate_cube 참고)"""
+    cube = aggregate_cube.build(entry.get("rows"), site_for(os.path.basename(rel)))
+    return aggregate_cube.to_records(cube)
 
-            val_in = clean_money(df[col_map["in"]]) if col_map["in"] else 0
-            val_out = clean_money(df[col_map["out"]]) if col_map["out"] else 0
-            val_amt = clean_money(df[col_map["amt"]]) if col_map["amt"] else 0
 
-            if "매출" in filename:
-                temp['입금'] = val_amt if col_map["amt"] else val_in
-                temp['출금'] = 0
-            elif "매입" in filename:
-                temp['입금'] = 0
-                temp['출금'] = val_amt if col_map["amt"] else val_out
-            else:
-                temp['입금'] = val_in
-                temp['출금'] = val_out
-                if (col_map["amt"]) and (not col_map["in"]) and (not col_map["out"]):
-                    temp['입금'] = val_amt
-
-            temp['파일명'] = filename
-
-            # -----------------------------------------------------------------
-            # [수정 #5, #10] 분류 로직 — 투자 우선순위 수정 + 출금 != 0
-            # -----------------------------------------------------------------
-            # 규칙 매칭: 긴 키워드가 먼저 매칭되도록 정렬
-            # 예) "김미정(해링턴플레이" → 해링턴임대료 가 "김미정" → 대표임금 보다 먼저 체크
-            def _sorted_rules(category):
-                return sorted(rules.get(category, {}).items(), key=lambda x: len(x[0]), reverse=True)
-
-            sorted_매출 = _sorted_rules("매출")
-            sorted_판관비 = _sorted_rules("판관비")
-            sorted_기타비용 = _sorted_rules("기타비용")
-            sorted_투자 = _sorted_rules("투자")
-
-            def classify(row):
-                desc = str(row['적요'])
-                fname = str(row['파일명'])
-
-                is_ignored = False
-                for kw in final_ignore_list:
-                    if kw in desc:
-                        is_ignored = True
-                        break
+def _may_overlap(rec, start, end):
+    """
+    manifest 기록의 날짜 범위(span)가 기간 [start, end)에 걸치는지
+    폴더(년/월)가 아니라 파일의 실제 거래일 기준 — 폴더 월과 다른 날짜의 행도 놓치지 않음
+    span을 아직 모르면 True (한 번 읽어서 기록)
+    """
+    if rec is None or "span" not in rec:
+        return True
+    if rec["span"] is None:
+        return False
+    lo, hi = pd.Timestamp(rec["span"][0]), pd.Timestamp(rec["span"][1])
+    return (start is None or hi >= start) and (end is None or lo < end)
 
-                # [입금]
-                if row['입금'] != 0:
-                    # 매출 파일 → 항상 분류
-                    if "매출" in fname:
-                        for k, v in sorted_매출:
-                            if k in desc:
-                                return "매출", v
-                        return "매출", "세금계산서(매출)"
-
-                    # 은행 입금 → 제외 키워드 있으면 무조건 제외
-                    if is_ignored:
-                        return "입금(매출제외)", "세금계산서 발행처"
-
-                    # 은행 입금 → 규칙 매칭
-                    for k, v in sorted_매출:
-                        if k in desc:
-                            return "입금(매출제외)", v
-                    for k, v in sorted_투자:
-                        if k in desc:
-                            return "투자회수", v
-                    return "미분류", "-"
-
-                # [출금]
-                if row['출금'] != 0:
-                    # 매입 파일 → 항상 분류 (제외 영향 없음)
-                    if "매입" in fname:
-                        for k, v in sorted_판관비:
-                            if k in desc:
-                                return "판관비", v
-                        for k, v in sorted_기타비용:
-                            if k in desc:
-                                return "기타비용", v
-                        return "판관비", "세금계산서(매입)"
-
-                    # 은행 출금 → 제외 키워드 있으면 무조건 제외
-                    if is_ignored:
-                        return "출금(비용제외)", "세금계산서 발행처"
-
-                    # 은행 출금 → 규칙 매칭
-                    for k, v in sorted_투자:
-                        if k in desc:
-                            return "투자", v
-                    for k, v in sorted_판관비:
-                        if k in desc:
-                            return "판관비", v
-                    for k, v in sorted_기타비용:
-                        if k in desc:
-                            return "기타비용", v
-                    return "미분류", "-"
-
-                return "미분류", "-"
-
-            temp[['대분류', '소분류']] = temp.apply(lambda x: pd.Series(classify(x)), axis=1)
-            temp = temp[(temp['입금'] != 0) | (temp['출금'] != 0)]
-
-            mask = (temp['대분류'] == '매출') & (temp['출금'] > 0)
-            if mask.any():
-                temp.loc[mask, '입금'] = -temp.loc[mask, '출금']
-                temp.loc[mask, '출금'] = 0
-
-            if temp.empty:
-                load_status[filename] = {"status": "Warn", "msg": "데이터 0건"}
-            else:
-                load_status[filename] = {"status": "Success", "msg": f"{len(temp)}건 로드"}
-                all_tx.append(temp)
 
-        except Exception as e:
-            load_status[filename] = {"status": "Fail", "msg": f"처리 에러: {e}"}
+def _span_months(span):
+    """날짜 범위 [최소, 최대] → 걸친 (연, 월) 목록"""
+    return [(p.year, p.month) for p in pd.period_range(span[0], span[1], freq='M')]
+
+
+def _month_bounds(year, month):
+    start = pd.Timestamp(year=int(year), month=int(month), day=1)
+    return start, start + pd.DateOffset(months=1)
+
+
+def _sealed_rels(manifest, scanned, seals):
+    """
+    봉인된 파일 — 날짜 범위의 모든 달이 봉인되어 있고, 각 봉인의 해시가 현재 내용 해시와 같은 파일
+    (manifest 기록 기준: 크기/수정시각이 바뀐 파일은 다시 해시를 확인한 뒤에야 봉인으로 인정)
+    """
+    sealed = set()
+    if not seals:
+        return sealed
+    for rel, (size, mtime_ns) in scanned.items():
+        rec = manifest.get(rel)
+        if rec is None or rec.get("size") != size or rec.get("mtime_ns") != mtime_ns or not rec.get("span"):
             continue
+        if all(seals.get(ym, {}).get(rel) == rec["hash"] for ym in _span_months(rec["span"])):
+            sealed.add(rel)
+    return sealed
 
-    final_df = pd.concat(all_tx, ignore_index=True) if all_tx else pd.DataFrame()
 
-    if not final_df.empty:
-        final_df = final_df.drop_duplicates(subset=['날짜', '적요', '입금', '출금', '파일명', '__row_idx'], keep='first')
+def _closed_changes(manifest, scanned, seals):
+    """
+    봉인 이후 바뀐 원본 파일 {(연, 월): [상대경로]}
+      - 봉인된 파일이 사라졌거나 내용 해시가 다름
+      - 봉인에 없던 파일인데 날짜 범위가 그 달에 걸침 (새로 올린 파일)
+    """
+    changes = {}
+    for (year, month), files in seals.items():
+        start, end = _month_bounds(year, month)
+        changed = [rel for rel, digest in files.items() if manifest.get(rel, {}).get("hash") != digest]
+        changed += [
+            rel for rel, rec in manifest.items()
+            if rel in scanned and rel not in files and rec.get("span") and _may_overlap(rec, start, end)
+        ]
+        if changed:
+            changes[(year, month)] = sorted(changed)
+    return changes
+
+
+def _filter_period(df, start, end):
+    """날짜 [start, end) 행만 (둘 다 None이면 그대로)"""
+    if df.empty or (start is None and end is None):
+        return df
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= df['날짜'] >= start
+    if end is not None:
+        keep &= df['날짜'] < end
+    return df[keep].reset_index(drop=True)
+
+
+def _workspace_memo(workspaces_dir, cache_dir):
+    key = os.path.abspath(workspaces_dir)
+    memo = _WORKSPACE_MEMO.get(key)
+    if memo is None:
+        memo = {
+            "manifest": workspace_manifest.load_manifest(cache_dir),
+            "state": {"rules_ver": None, "files": {}, "digests": {}},
+            "state_loaded": False,
+            "result": None,
+            "cube": None,
+            "stored": set(),
+            "stored_for": None,
+        }
+        _WORKSPACE_MEMO[key] = memo
+    return memo
+
+
+def _load_state(memo, state_path, rules_ver):
+    """
+    파일별 분류 결과 전체(workspace_state.pkl)를 한 번 읽어 메모와 합침 (메모에 이미 있는 파일 우선)
+    기간 조회만 하는 동안은 읽지 않음 — 필요한 파일만 분류 캐시에서 꺼냄
+    """
+    if memo["state_loaded"]:
+        return
+    memo["state_loaded"] = True
+    saved = parse_cache.read_pickle(state_path) or {}
+    state = memo["state"]
+    if saved.get("rules_ver") != rules_ver or state["rules_ver"] not in (None, rules_ver):
+        return
+    state["rules_ver"] = rules_ver
+    saved_digests = saved.get("digests", {})
+    for rel, entry in saved.get("files", {}).items():
+        if rel not in state["files"] and rel in saved_digests:
+            state["files"][rel] = entry
+            state["digests"][rel] = saved_digests[rel]
+
+
+def _refresh_workspace(workspaces_dir, rules, max_workers, start=None, end=None, seals=None, need_rows=True):
+    """
+    manifest와 비교해 추가·변경된 파일만 읽고, 삭제·교체된 파일의 결과는 제거
+    start/end가 있으면 날짜 범위(span)가 기간 [start, end)에 걸치는 파일만 반영
+    (기간 밖 파일은 변경되었어도 다음 전체/해당 기간 로드 때 반영)
+    seals: {(연, 월): {상대경로: 해시}} — 봉인된 파일(_sealed_rels)은 읽지 않음
+    need_rows=False: 집계 큐브만 필요 — manifest에 큐브가 있는 파일은 행을 불러오지 않음
+    반환: (memo, scanned, dirty) — dirty: 파일별 결과가 바뀌었는지
+    """
+    start, end = _period_bounds(start, end)
+    ranged = start is not None or end is not None
+    rules_ver = parse_cache.rules_version(rules, DEFAULT_IGNORE_KEYWORDS)
+    cache_dir = parse_cache.cache_dir_for(workspaces_dir)
+    state_path = os.path.join(cache_dir, _STATE_FILE)
+
+    scanned = workspace_manifest.scan_workspace(workspaces_dir)
+    memo = _workspace_memo(workspaces_dir, cache_dir)
+    if not ranged and need_rows:
+        _load_state(memo, state_path, rules_ver)
+
+    manifest = memo["manifest"]
+    added, changed, deleted = workspace_manifest.diff_manifest(manifest, scanned)
+    dirty = bool(added or changed or deleted)
+
+    # 규칙이 바뀌면 파일별 결과를 캐시에서 다시 구성 (엑셀 재읽기 없음)
+    if memo["state"]["rules_ver"] != rules_ver:
+        memo["state"] = {"rules_ver": rules_ver, "files": {}, "digests": {}}
+        dirty = True
+    entries, digests = memo["state"]["files"], memo["state"]["digests"]
+
+    # 삭제된 파일 → 행 제거
+    for rel in deleted:
+        manifest.pop(rel, None)
+        entries.pop(rel, None)
+        digests.pop(rel, None)
+
+    # 추가·변경된 파일 (또는 아직 결과가 없는 파일)만 처리
+    sealed = _sealed_rels(manifest, scanned, seals)
+    pending = []
+    for rel, (size, mtime_ns) in scanned.items():
+        if _is_blacklisted(os.path.basename(rel)) or rel in sealed:
+            continue
+        rec = manifest.get(rel)
+        stat_same = rec is not None and rec.get("size") == size and rec.get("mtime_ns") == mtime_ns
+        if stat_same and rel in entries and digests.get(rel) == rec.get("hash"):
+            continue
+        if ranged and stat_same and not _may_overlap(rec, start, end):
+            continue
+        if not need_rows and stat_same and "cube" in rec:
+            continue
+        pending.append((rel, rec.get("hash") if stat_same else None))
+
+    tasks = [
+        (os.path.join(workspaces_dir, rel), os.path.basename(rel), rules, rules_ver, cache_dir, digest)
+        for rel, digest in pending
+    ]
+    for (rel, _), (entry, digest) in zip(pending, _run_tasks(_load_file_cached, tasks, max_workers)):
+        size, mtime_ns = scanned[rel]
+        entries[rel] = entry
+        if digest:
+            digests[rel] = digest
+            manifest[rel] = {"size": size, "mtime_ns": mtime_ns, "hash": digest,
+                             "span": _entry_span(entry), "cube": _entry_cube(rel, entry)}
+        else:
+            digests.pop(rel, None)
+            manifest.pop(rel, None)
+        dirty = True
+
+    # 예전 manifest 기록에 없는 날짜 범위/큐브는 메모리의 결과로 채움
+    for rel, entry in entries.items():
+        rec = manifest.get(rel)
+        if rec is not None and digests.get(rel) == rec.get("hash") and not ("span" in rec and "cube" in rec):
+            rec["span"], rec["cube"] = _entry_span(entry), _entry_cube(rel, entry)
+            dirty = True
+
+    if dirty:
+        memo["result"] = None
+        memo["cube"] = None
+        workspace_manifest.save_manifest(cache_dir, manifest)
+        if memo["state_loaded"]:
+            parse_cache.write_pickle(state_path, memo["state"])
+
+    # 로컬 저장소 반영 (지난번 확인이 더 좁은 기간이었으면 이번 기간으로 다시 확인)
+    if dirty or not memo["stored"] or memo.get("stored_for") not in ((None, None), (start, end)):
+        present = {rel for rel in scanned if not _is_blacklisted(os.path.basename(rel))}
+        memo["stored"] = _sync_stores(workspaces_dir, manifest, entries, digests, present, rules_ver,
+                                      start, end, sealed)
+        memo["stored_for"] = (start, end)
+
+    return memo, scanned, dirty
+
+
+def _seals_for(workspaces_dir, closed_months, rules_ver):
+    """
+    closed_months 중 현재 분류 규칙으로 봉인된 달의 봉인 {(연, 월): {상대경로: 해시}}
+    규칙이 바뀐 뒤의 봉인은 무시 → 그 달 파일을 다시 분류해 마감 데이터와 비교
+    """
+    if not closed_months:
+        return {}
+    seals = workspace_manifest.load_seals(parse_cache.cache_dir_for(workspaces_dir))
+    wanted = {(int(y), int(m)) for y, m in closed_months}
+    return {ym: seal["files"] for ym, seal in seals.items() if ym in wanted and seal["rules_ver"] == rules_ver}
+
+
+def _refresh_live(workspaces_dir, rules, max_workers, start=None, end=None, closed_months=None, need_rows=True):
+    """
+    _refresh_workspace + 마감된 달 제외
+    봉인 이후 바뀐 달은 봉인을 풀고 그 달 파일을 다시 반영 (현재 데이터와 비교할 수 있도록)
+    반환: (memo, scanned, sealed, changes) — sealed: 결과에서 뺄 파일, changes: _closed_changes 결과
+    """
+    seals = _seals_for(workspaces_dir, closed_months, parse_cache.rules_version(rules, DEFAULT_IGNORE_KEYWORDS))
+    memo, scanned, _ = _refresh_workspace(workspaces_dir, rules, max_workers, start, end, seals, need_rows)
+    changes = _closed_changes(memo["manifest"], scanned, seals)
+    if changes:
+        seals = {ym: files for ym, files in seals.items() if ym not in changes}
+        memo, scanned, _ = _refresh_workspace(workspaces_dir, rules, max_workers, start, end, seals, need_rows)
+    return memo, scanned, _sealed_rels(memo["manifest"], scanned, seals), changes
+
+
+def _load_incremental(workspaces_dir, rules, max_workers, closed_months=None):
+    """변경된 파일만 반영 후 병합 — 변경이 없으면 마지막 병합 결과를 그대로 반환"""
+    memo, scanned, sealed, _ = _refresh_live(workspaces_dir, rules, max_workers, closed_months=closed_months)
+    key = frozenset(sealed)
+    if memo["result"] is None or memo["result"][0] != key:
+        live = {rel: stat for rel, stat in scanned.items() if rel not in sealed}
+        final_df, _ = _merge_entries(live, memo["state"]["files"])
+        memo["result"] = (key, (final_df, _load_status(scanned, memo["state"]["files"], sealed)))
+
+    final_df, load_status = memo["result"][1]
+    return final_df.copy(), {k: dict(v) for k, v in load_status.items()}
+
+
+def _load_period(workspaces_dir, rules, start, end, max_workers, closed_months=None):
+    """기간에 걸친 파일만 반영·병합 후 날짜로 거름 (load_status도 해당 파일만)"""
+    memo, scanned, sealed, _ = _refresh_live(workspaces_dir, rules, max_workers, start, end, closed_months)
+    manifest, entries = memo["manifest"], memo["state"]["files"]
+    picked = {
+        rel: stat for rel, stat in scanned.items()
+        if rel in entries and rel not in sealed and _may_overlap(manifest.get(rel), start, end)
+    }
+    final_df, load_status = _merge_entries(picked, entries)
+    return _filter_period(final_df, start, end), {k: dict(v) for k, v in load_status.items()}
+
+
+def _combine_cubes(workspaces_dir, rules, memo, scanned, sealed):
+    """
+    파일별 큐브(manifest 기록)를 합산
+    같은 파일명이 여러 폴더에 있으면 병합 시 중복 행이 빠지므로 그 파일들만 행으로 다시 집계
+    """
+    manifest, entries = memo["manifest"], memo["state"]["files"]
+    by_name = {}
+    for rel in scanned:
+        rec = manifest.get(rel)
+        if rel in sealed or rec is None or "cube" not in rec or _is_blacklisted(os.path.basename(rel)):
+            continue
+        by_name.setdefault(os.path.basename(rel), []).append(rel)
+
+    rules_ver = parse_cache.rules_version(rules, DEFAULT_IGNORE_KEYWORDS)
+    cache_dir = parse_cache.cache_dir_for(workspaces_dir)
+    cubes = []
+    for filename, rels in by_name.items():
+        if len(rels) == 1:
+            cubes.append(aggregate_cube.from_records(manifest[rels[0]]["cube"]))
+            continue
+        group = {}
+        for rel in rels:
+            entry = entries.get(rel)
+            if entry is None:
+                entry, _ = _load_file_cached(os.path.join(workspaces_dir, rel), filename, rules, rules_ver,
+                                             cache_dir, manifest[rel]["hash"])
+            group[rel] = entry
+        merged, _ = _merge_entries({rel: scanned[rel] for rel in rels}, group)
+        cubes.append(aggregate_cube.build(merged, site_for(filename)))
+    return aggregate_cube.combine(cubes)
+
+
+def load_cube(workspaces_dir, rules, closed_months=None, max_workers=None):
+    """
+    워크스페이스 전체의 월별 집계 큐브 (연, 월, 사업장, 대분류, 소분류 → 입금/출금/건수)
+    추가·변경된 파일만 읽어 파일별 큐브를 manifest에 기록하고, 나머지는 기록된 큐브를 합산 (거래 행을 불러오지 않음)
+    closed_months: load_and_classify_data 참고 (봉인된 파일 제외)
+    """
+    if not os.path.exists(workspaces_dir):
+        return aggregate_cube.empty()
+    with _LOAD_LOCK:
+        memo, scanned, sealed, _ = _refresh_live(workspaces_dir, rules, max_workers,
+                                                 closed_months=closed_months, need_rows=False)
+        key = frozenset(sealed)
+        if memo["cube"] is None or memo["cube"][0] != key:
+            memo["cube"] = (key, _combine_cubes(workspaces_dir, rules, memo, scanned, sealed))
+        return memo["cube"][1].copy()
+
+
+def seal_month(workspaces_dir, rules, year, month, max_workers=None):
+    """
+    마감된 달 봉인 — 그 달에 걸친 원본 파일의 내용 해시를 기록 (마감 보고서 저장 직후 호출)
+    이후 closed_months로 넘기면 내용이 그대로인 파일은 읽지도 합치지도 않음
+    반환: 봉인된 파일 수
+    """
+    if not os.path.exists(workspaces_dir):
+        return 0
+    start, end = _month_bounds(year, month)
+    cache_dir = parse_cache.cache_dir_for(workspaces_dir)
+    with _LOAD_LOCK:
+        memo, scanned, _ = _refresh_workspace(workspaces_dir, rules, max_workers, start, end)
+        files = {
+            rel: rec["hash"] for rel, rec in memo["manifest"].items()
+            if rel in scanned and rec.get("span") and _may_overlap(rec, start, end)
+        }
+        seals = workspace_manifest.load_seals(cache_dir)
+        seals[(int(year), int(month))] = {
+            "rules_ver": parse_cache.rules_version(rules, DEFAULT_IGNORE_KEYWORDS), "files": files,
+        }
+        workspace_manifest.save_seals(cache_dir, seals)
+    return len(files)
+
+
+def closed_month_changes(workspaces_dir, rules, closed_months, max_workers=None):
+    """
+    마감(봉인) 이후 원본 파일이 바뀐 달 {(연, 월): [상대경로]} — 봉인 기록이 없는 달은 확인하지 않음
+    크기/수정시각이 바뀐 파일만 내용 해시를 다시 계산 (같은 내용이면 변경 아님)
+    """
+    if not os.path.exists(workspaces_dir):
+        return {}
+    with _LOAD_LOCK:
+        _, _, _, changes = _refresh_live(workspaces_dir, rules, max_workers, closed_months=closed_months)
+    return changes
+
+
+def is_sealed(workspaces_dir, year, month, rules=None):
+    """
+    봉인 기록이 있는 달인지 (기록이 없는 예전 마감은 현재 데이터와 비교해 확인)
+    rules를 주면 현재 분류 규칙으로 봉인된 경우만 True (규칙이 바뀌었으면 다시 비교해야 함)
+    """
+    seal = workspace_manifest.load_seals(parse_cache.cache_dir_for(workspaces_dir)).get((int(year), int(month)))
+    if seal is None:
+        return False
+    return rules is None or seal["rules_ver"] == parse_cache.rules_version(rules, DEFAULT_IGNORE_KEYWORDS)
 
-    return final_df, load_status
+
+def source_files(workspaces_dir):
+    """
+    manifest에 기록된 원본 파일 중 날짜 있는 거래가 있는 파일명 (스캔 순서)
+    봉인되어 조회에서 빠진 파일도 포함 — 데이터 검증 화면의 파일 목록용
+    """
+    if not os.path.exists(workspaces_dir):
+        return []
+    cache_dir = parse_cache.cache_dir_for(workspaces_dir)
+    with _LOAD_LOCK:
+        manifest = dict(_workspace_memo(workspaces_dir, cache_dir)["manifest"])
+    names = []
+    for rel in workspace_manifest.scan_workspace(workspaces_dir):
+        name = os.path.basename(rel)
+        if manifest.get(rel, {}).get("span") and not _is_blacklisted(name) and name not in names:
+            names.append(name)
+    return names
+
+
+def query_transactions(workspaces_dir, rules, start=None, end=None, max_workers=None, closed_months=None):
+    """
+    로컬 저장소에서 거래 조회 — 기간에 걸친 원본 파일 중 추가·변경된 것만 먼저 반영
+      - Parquet 저장소(workspaces/.warehouse, pyarrow 필요): 기간에 걸친 연/월 파일만 읽음
+      - 없으면 SQLite 저장소(workspaces/finance.db)의 날짜 인덱스 조회
+    start/end: 날짜 범위 [start, end) (None이면 제한 없음)
+    closed_months: 마감된 (연, 월) 목록 — load_and_classify_data 참고
+    반환: (DataFrame, load_status) — load_and_classify_data와 같은 스키마·순서
+    저장소를 쓸 수 없으면 load_and_classify_data(start, end) 결과를 반환
+    """
+    if not os.path.exists(workspaces_dir):
+        return pd.DataFrame(), {}
+    start, end = _period_bounds(start, end)
+
+    with _LOAD_LOCK:
+        memo, scanned, sealed, _ = _refresh_live(workspaces_dir, rules, max_workers, start, end, closed_months)
+        load_status = _load_status(scanned, memo["state"]["files"], sealed)
+        stored = set(memo["stored"])
+
+    rows = None
+    if "warehouse" in stored:
+        try:
+            rows = warehouse.read_period(warehouse.root_for(workspaces_dir), start, end)
+        except Exception:
+            rows = None
+    if rows is None and "db" in stored:
+        try:
+            rows = data_store.query_transactions(data_store.db_path_for(workspaces_dir), start, end)
+            rows = rows.rename(columns={'row_idx': '__row_idx'})
+        except Exception:
+            rows = None
+
+    if rows is None:
+        return load_and_classify_data(workspaces_dir, rules, max_workers=max_workers, start=start, end=end,
+                                      closed_months=closed_months)
+
+    if sealed:
+        rows = rows[~rows['rel'].astype(object).isin(sealed)]
+    if rows.empty:
+        return pd.DataFrame(), load_status
+
+    # 스캔 순서 → 파일 안 순서로 정렬 (load_and_classify_data와 같은 행 순서)
+    order = {rel: i for i, rel in enumerate(scanned)}
+    rows = rows.assign(__order=rows['rel'].astype(object).map(order)).dropna(subset=['__order'])
+    rows = rows.sort_values(['__order', 'seq'], kind='mergesort')[OUTPUT_COLUMNS]
+    rows = to_output_schema(rows.reset_index(drop=True))
+    rows = rows.drop_duplicates(subset=_DEDUP_COLUMNS, keep='first').reset_index(drop=True)
+    return rows, load_status
+
+
+def load_and_classify_data(workspaces_dir, rules, use_cache=True, max_workers=None, start=None, end=None,
+                           closed_months=None):
+    """
+    폴더 내의 모든 엑셀/HTML 파일을 읽어서 통합 DataFrame과 로딩 로그를 반환합니다.
+    (수정: 투자 우선순위, 컬럼매핑 first-match, 출금 != 0)
+    use_cache=True 이면 manifest 비교로 추가·변경된 파일만 읽고,
+    workspaces/.engine_cache 의 파싱/분류 캐시를 사용합니다.
+    max_workers: 파일 파싱 프로세스 수 (None/1=순차 처리, 2 이상이면 spawn 프로세스 풀)
+    start/end: 날짜 범위 [start, end) — 지정하면 그 기간 행만 반환하고,
+      manifest에 기록된 파일별 실제 날짜 범위로 기간 밖 파일은 읽지도 합치지도 않음
+      (날짜 범위를 아직 모르는 새 파일은 한 번 읽어서 기록)
+    closed_months: 마감된 (연, 월) 목록 — 봉인(seal_month)된 달에만 걸친 파일은 내용이 그대로면 제외
+      (봉인 이후 바뀐 달은 그 달 파일을 모두 포함 → closed_month_changes로 확인, use_cache=True일 때만)
+    반환 DataFrame의 컬럼 타입은 OUTPUT_COLUMNS 위 주석 참고 (날짜 datetime64, 금액 int64, 분류 category)
+    """
+    if not os.path.exists(workspaces_dir):
+        return pd.DataFrame(), {}
+    start, end = _period_bounds(start, end)
+
+    if use_cache:
+        with _LOAD_LOCK:
+            if start is None and end is None:
+                return _load_incremental(workspaces_dir, rules, max_workers, closed_months)
+            return _load_period(workspaces_dir, rules, start, end, max_workers, closed_months)
+
+    scanned = workspace_manifest.scan_workspace(workspaces_dir)
+    targets = [rel for rel in scanned if not _is_blacklisted(os.path.basename(rel))]
+    tasks = [(os.path.join(workspaces_dir, rel), os.path.basename(rel), rules) for rel in targets]
+    entries = dict(zip(targets, _run_tasks(_parse_and_classify, tasks, max_workers)))
+    final_df, load_status = _merge_entries(scanned, entries)
+    return _filter_period(final_df, start, end), load_status
 
 
 # =============================================================================
@@ -484,23 +1437,27 @@ def load_and_classify_data(workspaces_dir, rules):
 # 요약/합계 행 제거용 키워드
 _DROP_KEYWORDS = ["요약", "합계", "소계", "누계", "총계", "월계", "이월",
                   "Total", "Subtotal", "Summary", "Sum", "Balance", "페이지", "Page"]
-_DROP_PATTERN = '|'.join(_DROP_KEYWORDS)
+_DROP_PATTERN = re.compile('|'.join(_DROP_KEYWORDS))
 
 _DATE_PATTERN = re.compile(r"(\d{4})[년\-/.](\d{1,2})")
-_CURRENCY_PATTERN = re.compile(r"[^\d.-]")
 
+# 은행 파일 입출금 분리 시 거래_유형 (출금 → 입금 순)
+_BANK_LEG_TYPES = ['실제출금', '실제입금']
 
-def _clean_currency_val(x):
-    """금액 문자열을 숫자로 변환"""
-    if pd.isna(x) or x == "":
-        return 0
-    s = str(x).strip()
-    neg = s.startswith("(") and s.endswith(")")
-    s = _CURRENCY_PATTERN.sub("", s)
-    try:
-        return float(s) * (-1 if neg else 1)
-    except:
-        return 0
+# 범주형 컬럼의 고정 범주 (파일마다 같아야 app.py에서 합쳐도 category 유지)
+_TX_TYPES = ['매출(청구)', '매입(청구)'] + _BANK_LEG_TYPES
+_SOURCE_TYPES = ['세금계산서', '은행']
+_SITE_TYPES = ['가앤', '프레피스코리아', '기타']
+
+
+def site_for(filename):
+    """파일명 → 사업장 (가앤 / 프레피스코리아 / 기타) — 집계 큐브에서도 사용"""
+    fn_lower = filename.lower()
+    if any(k in fn_lower for k in ["가앤", "가엔", "gaen"]):
+        return "가앤"
+    if any(k in fn_lower for k in ["프레피", "prepisco"]):
+        return "프레피스코리아"
+    return "기타"
 
 
 def _extract_date_from_filename(name):
@@ -537,11 +1494,12 @@ def _find_col_fuzzy(columns, hint, keywords):
     return None
 
 
-def read_single_file(file_path, filename, col_info):
+def read_single_file(file_path, filename, col_info, layouts_path=None):
     """
     app.py에서 사용하는 단일 파일 읽기 함수.
     col_info = (col_type, col_client, col_item, col_amount, col_date,
                 bank_date, bank_desc, bank_out, bank_in)
+    layouts_path: 양식 저장 파일 (layouts_file_for) — 지정 시 저장된 양식이면 헤더/컬럼 탐색 생략
     반환: (DataFrame, msg) 또는 (None, error_msg)
     """
     col_type, col_client, col_item, col_amount, col_date, \
@@ -555,10 +1513,18 @@ def read_single_file(file_path, filename, col_info):
     if not candidate_dfs:
         return None, read_msg
 
-    # 2. 헤더 탐색
-    df = _find_header_and_build_df(candidate_dfs)
-    if df is None:
-        return None, "헤더 미발견"
+    # 2. 헤더 탐색 (저장된 양식이면 생략)
+    context = "single|" + ("bank" if is_bank_file else "tax") + "|" + "|".join(map(str, col_info))
+    plan, header = _match_layout(layouts_path, candidate_dfs, context)
+    if plan is not None:
+        k, header_row = plan["k"], plan["header_row"]
+    else:
+        located = _locate_header(candidate_dfs)
+        if located is None:
+            return None, "헤더 미발견"
+        k, header_row, header = located
+    df = candidate_dfs[k].iloc[header_row + 1:].copy()
+    df.columns = header
 
     # 컬럼명 정리
     df.columns = [str(c).strip().replace("\n", "") for c in df.columns]
@@ -575,97 +1541,91 @@ def read_single_file(file_path, filename, col_info):
             new_cols.append(c)
     df.columns = new_cols
 
-    df['자료원_파일명'] = filename
-
-    # 요약/합계 행 제거
-    for col in df.columns:
-        try:
-            mask = df[col].astype(str).str.contains(_DROP_PATTERN, na=False)
-            df = df[~mask]
-        except:
-            pass
+    # 요약/합계 행 제거 (파일명 컬럼을 붙이기 전에 검사 — 파일명에 키워드가 있어도 전체 삭제되지 않도록)
+    junk, dropped = _junk_row_mask(df, df.columns, _DROP_PATTERN)
+    df = df[~junk].assign(자료원_파일명=filename)
 
     df = df.dropna(how='all')
 
+    date_key = tuple(df.columns)
+    date_formats = plan["date_formats"] if plan else ()
+
     try:
         if is_bank_file:
             # === 은행 파일 처리 ===
-            t_date = _find_col_fuzzy(df.columns, bank_date, ["거래일", "거래일자", "거래일시", "일자", "전표일자"])
-            t_desc = _find_col_fuzzy(df.columns, bank_desc, ["적요", "기재내용", "내용", "받는분", "보낸분", "상호", "의뢰인"])
-            t_out = _find_col_fuzzy(df.columns, bank_out, ["출금", "찾으신금액", "지급"])
-            t_in = _find_col_fuzzy(df.columns, bank_in, ["입금", "맡기신금액"])
+            if plan is not None:
+                t_date, t_desc, t_out, t_in = (plan["cols"][r] for r in ("date", "desc", "out", "in"))
+            else:
+                t_date = _find_col_fuzzy(df.columns, bank_date, ["거래일", "거래일자", "거래일시", "일자", "전표일자"])
+                t_desc = _find_col_fuzzy(df.columns, bank_desc, ["적요", "기재내용", "내용", "받는분", "보낸분", "상호", "의뢰인"])
+                t_out = _find_col_fuzzy(df.columns, bank_out, ["출금", "찾으신금액", "지급"])
+                t_in = _find_col_fuzzy(df.columns, bank_in, ["입금", "맡기신금액"])
+            found_cols = {"date": t_date, "desc": t_desc, "out": t_out, "in": t_in}
 
             if not t_date:
                 return None, f"날짜 컬럼 못찾음 (힌트: {bank_date})"
 
             result = pd.DataFrame()
             result['자료원_파일명'] = df['자료원_파일명']
-            result[bank_date] = pd.to_datetime(df[t_date], errors='coerce')
+            result[bank_date] = date_parser.parse_dates(df[t_date], key=date_key, formats=date_formats)
 
             if t_desc:
                 result[bank_desc] = df[t_desc].fillna("").astype(str).str.strip()
             else:
                 result[bank_desc] = ""
 
-            if t_out:
-                result[bank_out] = df[t_out].apply(_clean_currency_val)
-            else:
-                result[bank_out] = 0
-            if t_in:
-                result[bank_in] = df[t_in].apply(_clean_currency_val)
-            else:
-                result[bank_in] = 0
+            result[bank_out] = currency_parser.parse_won(df[t_out]) if t_out else 0
+            result[bank_in] = currency_parser.parse_won(df[t_in]) if t_in else 0
 
             result = result.dropna(subset=[bank_date])
 
-            # 출금/입금 각각 행으로 분리
-            rows = []
-            for _, row in result.iterrows():
-                base = {
-                    '자료원_파일명': row['자료원_파일명'],
-                    col_client: row[bank_desc],
-                    col_date: row[bank_date],
-                }
-                out_val = abs(row[bank_out]) if row[bank_out] != 0 else 0
-                in_val = abs(row[bank_in]) if row[bank_in] != 0 else 0
-
-                if out_val > 0:
-                    r = base.copy()
-                    r[SAFE_COL_AMOUNT] = out_val
-                    r['거래_유형'] = '실제출금'
-                    r['데이터출처'] = '은행'
-                    rows.append(r)
-                if in_val > 0:
-                    r = base.copy()
-                    r[SAFE_COL_AMOUNT] = in_val
-                    r['거래_유형'] = '실제입금'
-                    r['데이터출처'] = '은행'
-                    rows.append(r)
-
-            if not rows:
+            # 출금/입금 각각 행으로 분리 (원래 행 순서 유지, 같은 행이면 출금 → 입금)
+            legs = []
+            for leg_order, (amt_col, leg_type) in enumerate(zip([bank_out, bank_in], _BANK_LEG_TYPES)):
+                amounts = result[amt_col].abs()
+                mask = amounts > 0
+                legs.append(pd.DataFrame({
+                    '자료원_파일명': result.loc[mask, '자료원_파일명'],
+                    col_client: result.loc[mask, bank_desc],
+                    col_date: result.loc[mask, bank_date],
+                    SAFE_COL_AMOUNT: amounts[mask],
+                    '거래_유형': leg_type,
+                    '데이터출처': '은행',
+                    '__pos': np.flatnonzero(mask.to_numpy()),
+                    '__leg': leg_order,
+                }))
+
+            final = pd.concat(legs)
+            if final.empty:
                 return None, "은행 데이터 0건"
 
-            final = pd.DataFrame(rows)
+            final = final.sort_values(['__pos', '__leg'], kind='mergesort')
+            final = final.drop(columns=['__pos', '__leg']).reset_index(drop=True)
 
         else:
             # === 세금계산서 파일 처리 ===
-            t_type = _find_col_fuzzy(df.columns, col_type, ["구분", "유형", "종류"])
-            t_client = _find_col_fuzzy(df.columns, col_client, ["상호", "거래처", "공급자", "공급받는자"])
-            t_item = _find_col_fuzzy(df.columns, col_item, ["품목", "품명", "항목", "비고"])
-            # 금액 컬럼: 키워드 우선순위 탐색 (공급가액 > 합계금액)
-            # hint(사용자 설정)보다 공급가액 키워드를 먼저 체크
-            t_amount = None
-            for amt_kw in ["공급가액", "합계금액", "합계:합계금액", "금액"]:
-                for c in [str(col).strip() for col in df.columns]:
-                    if amt_kw in c.replace(" ", ""):
-                        t_amount = c
+            if plan is not None:
+                t_type, t_client, t_item, t_amount, t_date = (
+                    plan["cols"][r] for r in ("type", "client", "item", "amount", "date"))
+            else:
+                t_type = _find_col_fuzzy(df.columns, col_type, ["구분", "유형", "종류"])
+                t_client = _find_col_fuzzy(df.columns, col_client, ["상호", "거래처", "공급자", "공급받는자"])
+                t_item = _find_col_fuzzy(df.columns, col_item, ["품목", "품명", "항목", "비고"])
+                # 금액 컬럼: 키워드 우선순위 탐색 (공급가액 > 합계금액)
+                # hint(사용자 설정)보다 공급가액 키워드를 먼저 체크
+                t_amount = None
+                for amt_kw in ["공급가액", "합계금액", "합계:합계금액", "금액"]:
+                    for c in [str(col).strip() for col in df.columns]:
+                        if amt_kw in c.replace(" ", ""):
+                            t_amount = c
+                            break
+                    if t_amount:
                         break
-                if t_amount:
-                    break
-            # 키워드로 못 찾으면 hint로 폴백
-            if not t_amount:
-                t_amount = _find_col_fuzzy(df.columns, col_amount, [])
-            t_date = _find_col_fuzzy(df.columns, col_date, ["작성일자", "일자", "날짜", "발행일"])
+                # 키워드로 못 찾으면 hint로 폴백
+                if not t_amount:
+                    t_amount = _find_col_fuzzy(df.columns, col_amount, [])
+                t_date = _find_col_fuzzy(df.columns, col_date, ["작성일자", "일자", "날짜", "발행일"])
+            found_cols = {"type": t_type, "client": t_client, "item": t_item, "amount": t_amount, "date": t_date}
 
             if not t_date:
                 return None, f"날짜 컬럼 못찾음 (힌트: {col_date})"
@@ -674,10 +1634,10 @@ def read_single_file(file_path, filename, col_info):
 
             result = pd.DataFrame()
             result['자료원_파일명'] = df['자료원_파일명']
-            result[col_date] = pd.to_datetime(df[t_date], errors='coerce')
+            result[col_date] = date_parser.parse_dates(df[t_date], key=date_key, formats=date_formats)
             result[col_client] = df[t_client].fillna("").astype(str).str.strip() if t_client else ""
             result[col_item] = df[t_item].fillna("").astype(str).str.strip() if t_item else ""
-            result[SAFE_COL_AMOUNT] = df[t_amount].apply(_clean_currency_val)
+            result[SAFE_COL_AMOUNT] = currency_parser.parse_won(df[t_amount])
             result['데이터출처'] = '세금계산서'
 
             result = result.dropna(subset=[col_date])
@@ -710,31 +1670,22 @@ def read_single_file(file_path, filename, col_info):
             extracted = _extract_date_from_filename(filename)
             final['분석_월'] = extracted if extracted else ""
 
-        # 사업장 판별
-        fn_lower = filename.lower()
-        if any(k in fn_lower for k in ["가앤", "가엔", "gaen"]):
-            final['사업장'] = "가앤"
-        elif any(k in fn_lower for k in ["프레피", "prepisco"]):
-            final['사업장'] = "프레피스코리아"
-        else:
-            final['사업장'] = "기타"
+        final['사업장'] = site_for(filename)
 
-        # ID 생성 (중복 제거용)
-        id_cols = ['자료원_파일명']
-        if '분석_월' in final.columns:
-            id_cols.append('분석_월')
-        if col_client in final.columns:
-            id_cols.append(col_client)
-        if SAFE_COL_AMOUNT in final.columns:
-            id_cols.append(SAFE_COL_AMOUNT)
-        if '거래_유형' in final.columns:
-            id_cols.append('거래_유형')
+        final['거래_유형'] = pd.Categorical(final['거래_유형'], categories=_TX_TYPES)
+        final['데이터출처'] = pd.Categorical(final['데이터출처'], categories=_SOURCE_TYPES)
+        final['사업장'] = pd.Categorical(final['사업장'], categories=_SITE_TYPES)
 
-        final['id'] = final[id_cols].astype(str).agg('|'.join, axis=1)
-        # 동일 id 내 순번 추가
-        final['id'] = final['id'] + '|' + final.groupby('id').cumcount().astype(str)
+        # ID 생성 (브랜드 매핑 키 — 64비트 정수, row_ids 참고)
+        final['id'] = row_ids.make_ids(final, row_ids.id_columns(final, col_client))
 
-        return final, f"{len(final)}건 로드 완료"
+        if plan is None:
+            _learn_layout(layouts_path, candidate_dfs, context, {
+                "k": k, "header_row": header_row, "cols": found_cols,
+                "date_formats": date_parser.known_formats(date_key),
+            })
+        return final, f"{len(final)}건 로드 완료" + _format_dropped(dropped)
 
     except Exception as e:
+        _forget_layout(layouts_path, plan)
         return None, f"처리 에러: {e}"
@@ -0,0 +1,135 @@
+"""
+layout_registry.py — 은행/홈택스 양식(레이아웃) 학습 저장소
+
+매달 같은 5~6개 양식의 파일이 들어오므로, 한 번 헤더 탐색/컬럼 매핑에 성공한 양식은
+헤더 행 지문(fingerprint)을 키로 해석 계획(parse plan)을 저장해 둡니다.
+  - 헤더 위치 (시트 번호, 헤더 행 번호)
+  - 역할별 컬럼 매핑 (날짜 / 적요 / 입금 / 출금 / 금액 등)
+  - 날짜 형식 (date_parser가 추론한 형식)
+다음 파일은 저장된 헤더 위치의 지문만 계산해서 일치하면 탐색 없이 바로 읽습니다.
+
+저장 위치: workspaces/.engine_cache/layouts.json
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+import pandas as pd
+
+LAYOUTS_FILE = "layouts.json"
+LAYOUTS_VERSION = 1
+
+_LAYOUTS = {}  # 경로 → {키: 계획}
+_LAYOUTS_LOCK = threading.Lock()
+
+# 프로세스 풀 작업자에서는 layouts.json에 쓰지 않고 변경을 모아 부모 프로세스에 넘김
+# (여러 프로세스가 읽기-병합-쓰기를 동시에 하면 서로 학습한 양식을 덮어씀)
+_DEFERRED = None  # None이면 바로 저장, 리스트면 [("remember", 경로, 지문, 맥락, 계획) / ("forget", 경로, 키)]
+
+
+def header_fingerprint(cells):
+    """헤더 행 셀 값 → 지문 (공백 제거, 빈 셀 포함 순서 그대로)"""
+    norm = ["" if pd.isna(c) else str(c).strip().replace(" ", "") for c in cells]
+    return hashlib.sha1("\x1f".join(norm).encode("utf-8")).hexdigest()[:16]
+
+
+def layout_key(fingerprint, context):
+    """레이아웃 키: 지문 + 해석 맥락 (같은 헤더라도 매출/매입 파일이면 매핑이 다름)"""
+    return f"{context}#{fingerprint}"
+
+
+def _read_file(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != LAYOUTS_VERSION:
+            return {}
+        return data.get("layouts", {})
+    except Exception:
+        return {}
+
+
+def _write_file(path, layouts):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": LAYOUTS_VERSION, "layouts": layouts}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+    except Exception:
+        try: os.remove(tmp_path)
+        except OSError: pass
+
+
+def get_layouts(path):
+    """저장된 레이아웃 전체 {키: 계획} (프로세스 내 메모)"""
+    with _LAYOUTS_LOCK:
+        layouts = _LAYOUTS.get(path)
+        if layouts is None:
+            layouts = _LAYOUTS[path] = _read_file(path)
+        return layouts
+
+
+def positions(layouts, context):
+    """context에 해당하는 레이아웃들의 헤더 위치 목록 [(시트 번호, 헤더 행)]"""
+    return sorted({(p["k"], p["header_row"]) for p in layouts.values() if p.get("context") == context})
+
+
+def defer_writes():
+    """이 프로세스의 레이아웃 변경을 저장하지 않고 모으기 시작 (프로세스 풀 작업자용)"""
+    global _DEFERRED
+    with _LAYOUTS_LOCK:
+        if _DEFERRED is None:
+            _DEFERRED = []
+
+
+def take_deferred():
+    """모아 둔 레이아웃 변경 목록을 꺼내고 비움"""
+    global _DEFERRED
+    with _LAYOUTS_LOCK:
+        if _DEFERRED is None:
+            return []
+        changes, _DEFERRED = _DEFERRED, []
+        return changes
+
+
+def apply_deferred(changes):
+    """작업자가 모은 레이아웃 변경을 이 프로세스에서 저장"""
+    for change in changes:
+        if change[0] == "remember":
+            remember_layout(*change[1:])
+        elif change[0] == "forget":
+            forget_layout(*change[1:])
+
+
+def remember_layout(path, fingerprint, context, plan):
+    """새 레이아웃 저장 (디스크 내용과 병합 후 원자적 쓰기 — 다른 프로세스가 학습한 것도 유지)"""
+    key = layout_key(fingerprint, context)
+    stored = dict(plan, fingerprint=fingerprint, context=context)
+    with _LAYOUTS_LOCK:
+        if _DEFERRED is not None:
+            # 작업자: 이 프로세스의 메모에만 반영 (다음 파일부터 바로 사용), 저장은 부모가
+            _DEFERRED.append(("remember", path, fingerprint, context, plan))
+            _LAYOUTS.setdefault(path, _read_file(path))[key] = stored
+            return
+        layouts = _read_file(path)
+        layouts.update(_LAYOUTS.get(path, {}))
+        layouts[key] = stored
+        _LAYOUTS[path] = layouts
+        _write_file(path, layouts)
+
+
+def forget_layout(path, key):
+    """해석에 실패한 레이아웃 삭제"""
+    with _LAYOUTS_LOCK:
+        if _DEFERRED is not None:
+            _DEFERRED.append(("forget", path, key))
+            _LAYOUTS.get(path, {}).pop(key, None)
+            return
+        layouts = _read_file(path)
+        layouts.update(_LAYOUTS.get(path, {}))
+        if layouts.pop(key, None) is not None:
+            _LAYOUTS[path] = layouts
+            _write_file(path, layouts)
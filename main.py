@@ -11,10 +11,12 @@ from datetime import datetime
 current_dir = os.path.dirname(os.path.abspath(__file__))
 try:
     import file_engine
+    import aggregate_cube
 except ImportError:
     sys.path.append(current_dir)
     try:
         import file_engine
+        import aggregate_cube
     except:
         st.error("file_engine.py를 찾을 수 없습니다.")
         st.stop()
@@ -48,7 +50,7 @@ def load_rules():
     return {"매출": {}, "판관비": {}, "기타비용": {}, "투자": {}, "중복방지": []}
 
 rules = load_rules()
-df, _ = file_engine.load_and_classify_data(WORKSPACES_DIR, rules)
+cube = file_engine.load_cube(WORKSPACES_DIR, rules)  # 월별 집계 큐브 (파일 반영 시 갱신)
 
 # -----------------------------------------------------------------------------
 # 메인 화면 UI
@@ -57,46 +59,40 @@ st.title("📊 재무 현황 대시보드")
 st.markdown("회사의 자금 흐름과 주요 지표를 한눈에 확인하세요.")
 st.divider()
 
-if df.empty:
+if cube.empty:
     st.info("아직 데이터가 없습니다. 좌측 메뉴의 **'자금 관리'** 페이지에서 엑셀 파일을 업로드해주세요.")
 else:
-    # 날짜 처리
-    df['날짜'] = pd.to_datetime(df['날짜'], errors='coerce')
-    df = df.sort_values('날짜')
-    
-    # [사이드바 필터] 연도/월 선택
+    # [사이드바 필터] 연도/월 선택 — 데이터가 있는 달은 큐브에서 확인
     st.sidebar.header("대시보드 필터")
-    valid_df = df[df['날짜'].notna()]
-    if not valid_df.empty:
-        years = sorted(valid_df['날짜'].dt.year.unique(), reverse=True)
-        selected_year = st.sidebar.selectbox("연도 선택", years)
-        
-        # 월 선택 (전체 보기 옵션 추가)
-        months = sorted(valid_df[valid_df['날짜'].dt.year == selected_year]['날짜'].dt.month.unique())
-        selected_month = st.sidebar.selectbox("월 선택 (0=전체)", [0] + months, format_func=lambda x: "전체" if x==0 else f"{x}월")
-        
-        # 데이터 필터링
-        if selected_month == 0:
-            current_df = valid_df[valid_df['날짜'].dt.year == selected_year]
-            period_title = f"{selected_year}년 전체"
-        else:
-            current_df = valid_df[
-                (valid_df['날짜'].dt.year == selected_year) & 
-                (valid_df['날짜'].dt.month == selected_month)
-            ]
-            period_title = f"{selected_year}년 {selected_month}월"
+    periods = aggregate_cube.periods(cube)
+    years = sorted({y for y, _ in periods}, reverse=True)
+    selected_year = st.sidebar.selectbox("연도 선택", years)
+    
+    # 월 선택 (전체 보기 옵션 추가)
+    months = sorted(m for y, m in periods if y == selected_year)
+    selected_month = st.sidebar.selectbox("월 선택 (0=전체)", [0] + months, format_func=lambda x: "전체" if x==0 else f"{x}월")
+    
+    # 기간 집계
+    if selected_month == 0:
+        current_cube = aggregate_cube.select(cube, selected_year)
+        period_start = pd.Timestamp(year=selected_year, month=1, day=1)
+        period_end = period_start + pd.DateOffset(years=1)
+        period_title = f"{selected_year}년 전체"
     else:
-        current_df = pd.DataFrame()
-        period_title = "-"
+        current_cube = aggregate_cube.select(cube, selected_year, selected_month)
+        period_start = pd.Timestamp(year=selected_year, month=selected_month, day=1)
+        period_end = period_start + pd.DateOffset(months=1)
+        period_title = f"{selected_year}년 {selected_month}월"
 
     # -------------------------------------------------------------------------
     # 1. 핵심 지표 (KPI Metrics)
     # [수정 #3] 투자 KPI 추가
     # -------------------------------------------------------------------------
-    if not current_df.empty:
-        total_rev = current_df[current_df['대분류'] == '매출']['입금'].sum()
-        total_exp = current_df[current_df['대분류'].isin(['판관비', '기타비용'])]['출금'].sum()
-        total_invest = current_df[current_df['대분류'] == '투자']['출금'].sum()
+    if not current_cube.empty:
+        kpi = aggregate_cube.summary(current_cube)
+        total_rev = kpi['매출']
+        total_exp = kpi['지출']
+        total_invest = kpi['투자']
         net_profit = total_rev - total_exp
         margin = (net_profit / total_rev * 100) if total_rev > 0 else 0
 
@@ -109,7 +105,7 @@ else:
         k4.metric("투자/저축", f"{int(total_invest):,}원", border=True)
         
         # 미분류 건수 확인
-        unclassified_count = len(current_df[current_df['대분류'] == '미분류'])
+        unclassified_count = kpi['미분류_건수']
         k5.metric("미분류 건수", f"{unclassified_count}건", delta_color="inverse", 
                   delta="확인 필요" if unclassified_count > 0 else "완벽")
 
@@ -123,24 +119,9 @@ else:
 
         with c_left:
             st.markdown("#### 📈 월별 매출/지출/투자 추이")
-            # 월별 집계 (전체 데이터 기준, 연도 필터만 적용)
-            trend_df = valid_df[valid_df['날짜'].dt.year == selected_year].copy()
-            trend_df['월'] = trend_df['날짜'].dt.month
-            
-            monthly_rev = trend_df[trend_df['대분류']=='매출'].groupby('월')['입금'].sum().reset_index()
-            monthly_rev['유형'] = '매출'
-            monthly_rev.rename(columns={'입금':'금액'}, inplace=True)
-            
-            monthly_exp = trend_df[trend_df['대분류'].isin(['판관비', '기타비용'])].groupby('월')['출금'].sum().reset_index()
-            monthly_exp['유형'] = '지출'
-            monthly_exp.rename(columns={'출금':'금액'}, inplace=True)
-            
-            monthly_invest = trend_df[trend_df['대분류']=='투자'].groupby('월')['출금'].sum().reset_index()
-            monthly_invest['유형'] = '투자'
-            monthly_invest.rename(columns={'출금':'금액'}, inplace=True)
-            
-            chart_df = pd.concat([monthly_rev, monthly_exp, monthly_invest])
-            chart_df = chart_df.dropna(subset=['금액'])
+            # 월별 집계 (연도 필터만 적용)
+            monthly = aggregate_cube.monthly(cube, selected_year)
+            chart_df = monthly.melt(id_vars='월', value_vars=['매출', '지출', '투자'], var_name='유형', value_name='금액')
             chart_df = chart_df[chart_df['금액'] > 0]
             
             if not chart_df.empty:
@@ -162,9 +143,9 @@ else:
         with c_right:
             st.markdown("#### 🍩 지출 구성 (Top 5)")
             # 소분류별 지출 합계
-            exp_breakdown = current_df[current_df['대분류'].isin(['판관비', '기타비용'])]
+            exp_breakdown = aggregate_cube.breakdown(current_cube, aggregate_cube.EXPENSE_CATEGORIES)
             if not exp_breakdown.empty:
-                pie_df = exp_breakdown.groupby('소분류')['출금'].sum().reset_index()
+                pie_df = exp_breakdown.rename('출금').reset_index()
                 pie_df = pie_df[pie_df['출금'] > 0]
                 pie_df = pie_df.sort_values('출금', ascending=False).head(5) # Top 5만
                 
@@ -191,6 +172,9 @@ else:
         # 3. 최근 거래 내역
         # ---------------------------------------------------------------------
         st.markdown("#### 🕒 최근 입출금 내역 (최근 5건)")
+        current_df, _ = file_engine.query_transactions(WORKSPACES_DIR, rules, period_start, period_end)
+        if current_df.empty:
+            current_df = pd.DataFrame(columns=file_engine.OUTPUT_COLUMNS)
         recent_tx = current_df.sort_values('날짜', ascending=False).head(5)
         st.dataframe(
             recent_tx[['날짜', '대분류', '소분류', '적요', '입금', '출금']]
@@ -18,6 +18,12 @@ sys.path.append(parent_dir)
 
 try:
     import file_engine
+    import data_store
+    import warehouse
+    import aggregate_cube
+    import closed_snapshot
+    import row_diff
+    import xlsx_stream
     default_ignores = getattr(file_engine, 'DEFAULT_IGNORE_KEYWORDS', [])
 except ImportError:
     st.error("🚨 프로젝트 폴더에 'file_engine.py' 파일이 없습니다.")
@@ -34,7 +40,8 @@ RULES_FILE = os.path.join(WORKSPACES_DIR, "classification_rules.json")
 if not os.path.exists(WORKSPACES_DIR): os.makedirs(WORKSPACES_DIR)
 if not os.path.exists(CLOSED_DIR): os.makedirs(CLOSED_DIR)
 
-MANUAL_FILE = os.path.join(WORKSPACES_DIR, "manual_entries.json")
+MANUAL_FILE = os.path.join(WORKSPACES_DIR, "manual_entries.json")  # 예전 저장 파일 (처음 한 번 저장소로 가져옴)
+DB_FILE = data_store.db_path_for(WORKSPACES_DIR)
 
 # -----------------------------------------------------------------------------
 # 2. 규칙 관리
@@ -58,23 +65,30 @@ def save_rules(rules):
 # -----------------------------------------------------------------------------
 # 3. 데이터 로드 (Live Data)
 # -----------------------------------------------------------------------------
+def list_closed_months():
+    """closed_reports의 마감 보고서 → {(연, 월)}"""
+    months = set()
+    for path in glob.glob(os.path.join(CLOSED_DIR, "*년_*월_결산보고서.xlsx")):
+        m = re.match(r"(\d{4})년_(\d{1,2})월_결산보고서\.xlsx$", os.path.basename(path))
+        if m: months.add((int(m.group(1)), int(m.group(2))))
+    return months
+
 rules = load_rules()
-live_df, load_log = file_engine.load_and_classify_data(WORKSPACES_DIR, rules)
+closed_months = list_closed_months()
+# 마감(봉인)된 달의 원본 파일은 내용이 바뀌지 않는 한 읽지 않음 — 바뀐 달만 closed_changes로 표시
+live_df, load_log = file_engine.query_transactions(WORKSPACES_DIR, rules, closed_months=closed_months)  # 로컬 저장소(finance.db) 조회
+closed_changes = file_engine.closed_month_changes(WORKSPACES_DIR, rules, closed_months)
 
 # 3-1. 수기 입력 데이터 로드 및 병합
 def load_manual_entries():
-    if os.path.exists(MANUAL_FILE):
-        try:
-            with open(MANUAL_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except: pass
-    return []
-
-def save_manual_entries(entries):
-    with open(MANUAL_FILE, "w", encoding="utf-8") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
+    try:
+        data_store.import_legacy_table(DB_FILE, "manual_entries", MANUAL_FILE)
+        return data_store.load_records(DB_FILE, "manual_entries")
+    except: return []
 
 manual_entries = load_manual_entries()
+manual_cube = aggregate_cube.empty()
+MANUAL_LABEL = '✍️ 수기입력'  # 수기 입력 행의 파일명
 
 if manual_entries:
     manual_rows = []
@@ -86,14 +100,23 @@ if manual_entries:
             '출금': e.get('출금', 0),
             '대분류': e['대분류'],
             '소분류': e['소분류'],
-            '파일명': '✍️ 수기입력',
+            '파일명': MANUAL_LABEL,
             '__row_idx': 0,
         })
     manual_df = pd.DataFrame(manual_rows)
+    manual_cube = aggregate_cube.build(manual_df)
     if live_df.empty:
-        live_df = manual_df
+        live_df = file_engine.to_output_schema(manual_df)
     else:
-        live_df = pd.concat([live_df, manual_df], ignore_index=True)
+        live_df = file_engine.to_output_schema(pd.concat([live_df, manual_df], ignore_index=True))
+
+# 날짜순 정렬 + (연, 월) → 행 범위 색인 (월 버튼 / 월별 보기 / 데이터 검증에서 바로 슬라이스)
+live_df = file_engine.index_by_month(live_df)
+
+# 월간 결산 집계 (엔진 큐브 + 수기 입력) — 데이터가 있는 달 = 라이브 큐브의 달 + 마감된 달
+# (봉인된 파일은 live_df/큐브에서 빠지지만 그 파일의 달은 모두 마감된 달)
+live_cube = aggregate_cube.combine([file_engine.load_cube(WORKSPACES_DIR, rules, closed_months=closed_months), manual_cube])
+data_months = set(aggregate_cube.periods(live_cube)) | closed_months
 
 # -----------------------------------------------------------------------------
 # 4. 사이드바
@@ -113,47 +136,48 @@ def check_is_closed(year, month):
     return os.path.exists(path), path
 
 @st.cache_data(ttl=60) 
-def load_closed_data(filepath):
+def _read_closed_xlsx(filepath):
     try: return pd.read_excel(filepath, sheet_name="전체내역")
     except: return pd.DataFrame()
 
+def load_closed_data(filepath):
+    # 컬럼형 스냅샷이 있으면 그것을 (체크섬 키로 계속 캐시), 없으면 엑셀을 읽고 스냅샷 생성
+    df = closed_snapshot.read(filepath)
+    if df is None:
+        df = _read_closed_xlsx(filepath)
+        if not df.empty: closed_snapshot.write(filepath, df)
+    return df
+
 live_view_df = pd.DataFrame()
-if not live_df.empty:
-    live_df['날짜'] = pd.to_datetime(live_df['날짜'], errors='coerce')
-    valid_live_df = live_df[live_df['날짜'].notna()]
+if data_months:
+    data_years = {y for y, _ in data_months}
+    base_years = sorted(list(data_years | {datetime.now().year, 2024, 2025}), reverse=True)
     
-    if not valid_live_df.empty:
-        data_years = set(valid_live_df['날짜'].dt.year.unique())
-        base_years = sorted(list(data_years | {datetime.now().year, 2024, 2025}), reverse=True)
-        
-        st.sidebar.markdown("##### 연도 (Year)")
-        cols_y = st.sidebar.columns(3)
-        for i, y in enumerate(base_years):
-            is_sel = (st.session_state['finance_selected_year'] == y)
-            label = f"✔ {y}" if y in data_years else f"{y}"
-            if cols_y[i%3].button(label, key=f"y_{y}", type="primary" if is_sel else "secondary", use_container_width=True):
-                st.session_state['finance_selected_year'] = y
-                st.rerun()
-        
-        selected_year = st.session_state['finance_selected_year']
-        st.sidebar.markdown(f"##### {selected_year}년 월 (Month)")
-        
-        cols_m = st.sidebar.columns(3)
-        for m in range(1, 13):
-            is_sel = (st.session_state['finance_selected_month'] == m)
-            is_closed, _ = check_is_closed(selected_year, m)
-            icon = "🔒" if is_closed else "✔"
-            has_data = not valid_live_df[(valid_live_df['날짜'].dt.year == selected_year) & (valid_live_df['날짜'].dt.month == m)].empty
-            label = f"{icon} {m}월" if (has_data or is_closed) else f"{m}월"
-            if cols_m[(m-1)%3].button(label, key=f"m_{m}", type="primary" if is_sel else "secondary", use_container_width=True):
-                st.session_state['finance_selected_month'] = m
-                st.rerun()
+    st.sidebar.markdown("##### 연도 (Year)")
+    cols_y = st.sidebar.columns(3)
+    for i, y in enumerate(base_years):
+        is_sel = (st.session_state['finance_selected_year'] == y)
+        label = f"✔ {y}" if y in data_years else f"{y}"
+        if cols_y[i%3].button(label, key=f"y_{y}", type="primary" if is_sel else "secondary", use_container_width=True):
+            st.session_state['finance_selected_year'] = y
+            st.rerun()
+    
+    selected_year = st.session_state['finance_selected_year']
+    st.sidebar.markdown(f"##### {selected_year}년 월 (Month)")
+    
+    cols_m = st.sidebar.columns(3)
+    for m in range(1, 13):
+        is_sel = (st.session_state['finance_selected_month'] == m)
+        is_closed = (selected_year, m) in closed_months
+        icon = "🔒" if is_closed else "✔"
+        has_data = (selected_year, m) in data_months
+        label = f"{icon} {m}월" if (has_data or is_closed) else f"{m}월"
+        if cols_m[(m-1)%3].button(label, key=f"m_{m}", type="primary" if is_sel else "secondary", use_container_width=True):
+            st.session_state['finance_selected_month'] = m
+            st.rerun()
 
-        selected_month = st.session_state['finance_selected_month']
-        
-        start = pd.Timestamp(f"{selected_year}-{selected_month:02d}-01")
-        end = start + pd.DateOffset(months=1)
-        live_view_df = valid_live_df[(valid_live_df['날짜'] >= start) & (valid_live_df['날짜'] < end)].copy()
+    selected_month = st.session_state['finance_selected_month']
+    live_view_df = file_engine.month_rows(live_df, selected_year, selected_month).copy()
 
 is_closed, closed_file_path = check_is_closed(selected_year, selected_month)
 final_df = pd.DataFrame()
@@ -167,13 +191,25 @@ else:
     final_df = live_view_df.copy()
     mode = "LIVE"
 
+# 월간 결산 합계용 집계 — 라이브는 엔진 큐브 + 수기 입력, 마감은 마감 보고서 행으로 집계
+if mode == "CLOSED":
+    month_cube = aggregate_cube.build(final_df)
+else:
+    month_cube = aggregate_cube.select(live_cube, selected_year, selected_month)
+
 # [수정 #1] 데이터 초기화 — JSON 설정 파일 보호
+# 로컬 저장소(finance.db: 수기입력/브랜드/계약/프로젝트)와 Parquet 저장소(.warehouse)도 보호
+# → 지운 원본 파일의 거래 행은 다음 로드 때 file_engine이 저장소에서 삭제
 st.sidebar.markdown("---")
 if st.sidebar.button("🗑️ 데이터 초기화", use_container_width=True):
     PROTECT_EXTENSIONS = {'.json'}
+    PROTECT_DIRS = {warehouse.WAREHOUSE_DIR}
     for root, dirs, files in os.walk(WORKSPACES_DIR):
+        dirs[:] = [d for d in dirs if d not in PROTECT_DIRS]
         for fname in files:
             fpath = os.path.join(root, fname)
+            if fname.startswith(data_store.DB_FILE):
+                continue
             if os.path.splitext(fname)[1].lower() not in PROTECT_EXTENSIONS:
                 try: os.remove(fpath) 
                 except: pass
@@ -202,36 +238,35 @@ if st.sidebar.button("🗑️ 데이터 초기화", use_container_width=True):
 # -----------------------------------------------------------------------------
 def _save_closing_report(filepath, data_df, total_rev, total_opex, total_etc, total_invest, net_profit):
     """마감 보고서를 엑셀로 저장 (요약 + 전체내역 + 매출상세 + 지출상세 + 투자상세)"""
-    with pd.ExcelWriter(filepath) as writer:
-        # 요약 시트
-        summary = pd.DataFrame({
-            "항목": ["총 매출", "판관비", "기타비용", "순수익", "투자/저축"],
-            "금액": [int(total_rev), int(total_opex), int(total_etc), int(net_profit), int(total_invest)]
-        })
-        summary.to_excel(writer, sheet_name="요약", index=False)
-        
-        # 전체내역
-        data_df.to_excel(writer, sheet_name="전체내역", index=False)
-        
-        # 매출상세
-        rev = data_df[data_df['대분류'] == '매출']
-        if not rev.empty:
-            rev.to_excel(writer, sheet_name="매출상세", index=False)
-        
-        # 판관비상세
-        opex = data_df[data_df['대분류'] == '판관비']
-        if not opex.empty:
-            opex.to_excel(writer, sheet_name="판관비상세", index=False)
-        
-        # 기타비용상세
-        etc = data_df[data_df['대분류'] == '기타비용']
-        if not etc.empty:
-            etc.to_excel(writer, sheet_name="기타비용상세", index=False)
-        
-        # 투자상세
-        invest = data_df[data_df['대분류'] == '투자']
-        if not invest.empty:
-            invest.to_excel(writer, sheet_name="투자상세", index=False)
+    summary = pd.DataFrame({
+        "항목": ["총 매출", "판관비", "기타비용", "순수익", "투자/저축"],
+        "금액": [int(total_rev), int(total_opex), int(total_etc), int(net_profit), int(total_invest)]
+    })
+    data_df = data_df.reset_index(drop=True)
+    
+    # 상세 시트는 대분류로 한 번 나눈 행 위치로 작성 (빈 대분류는 시트 생략)
+    parts = xlsx_stream.partition(data_df, '대분류', ['매출', '판관비', '기타비용', '투자'])
+    sheets = [("요약", summary), ("전체내역", data_df)]
+    sheets += [(f"{cat}상세", data_df, rows) for cat, rows in parts.items()]
+    xlsx_stream.write_sheets(filepath, sheets)
+
+    # 전체내역 컬럼형 스냅샷 (마감된 달 조회용 — 엑셀은 사람이 보는 파일로 유지)
+    closed_snapshot.write(filepath, data_df)
+
+def _manual_rows(df):
+    """수기 입력 행만"""
+    if df.empty or '파일명' not in df.columns:
+        return df.iloc[0:0]
+    return df[df['파일명'].astype(str) == MANUAL_LABEL]
+
+def _live_month_rows(year, month):
+    """마감 제외 없이 그 달의 현재 데이터 (원본 파일 + 수기 입력) — 마감 업데이트 저장용"""
+    m_start = pd.Timestamp(year, month, 1)
+    file_rows, _ = file_engine.query_transactions(WORKSPACES_DIR, rules, start=m_start, end=m_start + pd.offsets.MonthBegin(1))
+    parts = [p for p in (file_rows, _manual_rows(file_engine.month_rows(live_df, year, month))) if not p.empty]
+    if not parts:
+        return pd.DataFrame()
+    return file_engine.to_output_schema(pd.concat(parts, ignore_index=True))
 
 # -----------------------------------------------------------------------------
 # 메인 탭
@@ -245,49 +280,83 @@ with tab1:
         st.warning(f"📉 {selected_year}년 {selected_month}월 데이터가 없습니다.")
     else:
         if mode == "CLOSED":
-            live_cnt = len(live_view_df)
-            close_cnt = len(final_df)
-            live_sum = int(live_view_df['입금'].sum() + live_view_df['출금'].sum()) if not live_view_df.empty else 0
-            close_sum = int(final_df['입금'].sum() + final_df['출금'].sum())
+            # 봉인된 달은 원본 파일 해시로만 변경 확인 (바뀐 파일이 없으면 현재 데이터와 비교하지 않음)
+            # 봉인 이후 분류 규칙이 바뀌었으면 봉인을 무시하고 다시 분류한 결과와 비교 (분류 변경 확인)
+            month_key = (selected_year, selected_month)
+            changed_files = closed_changes.get(month_key, [])
+            rules_changed = file_engine.is_sealed(WORKSPACES_DIR, *month_key) and not file_engine.is_sealed(WORKSPACES_DIR, *month_key, rules)
+            needs_check = bool(changed_files) or not file_engine.is_sealed(WORKSPACES_DIR, *month_key, rules)
+            # 건수/합계가 아니라 거래 단위로 비교 (금액이 서로 상쇄되는 수정도 잡음)
+            # 봉인된 달은 원본 파일 행이 live_view_df에서 빠지므로 수기 입력 행끼리만 비교
+            if needs_check:
+                month_diff = row_diff.diff_rows(final_df, live_view_df)
+            else:
+                month_diff = row_diff.diff_rows(_manual_rows(final_df), _manual_rows(live_view_df))
             
-            if (live_cnt != close_cnt) or (live_sum != close_sum):
-                st.warning(f"🚨 **주의: 마감 이후 새로운 데이터가 감지되었습니다!** (기존: {close_cnt}건 vs 현재: {live_cnt}건)")
+            if row_diff.has_changes(month_diff):
+                added, removed, reclassified = month_diff["added"], month_diff["removed"], month_diff["reclassified"]
+                st.warning(f"🚨 **주의: 마감 이후 변경된 거래가 감지되었습니다!** (추가 {len(added)}건 / 삭제 {len(removed)}건 / 분류 변경 {len(reclassified)}건)")
+                if changed_files:
+                    st.caption("변경된 원본 파일: " + ", ".join(os.path.basename(f) for f in changed_files))
+                if rules_changed:
+                    st.caption("마감 이후 분류 규칙이 변경되었습니다.")
                 
                 with st.expander("🔍 변경 사항 확인 및 업데이트 (클릭)", expanded=True):
-                    c_diff1, c_diff2 = st.columns(2)
-                    c_diff1.info(f"📂 **저장된 마감 데이터**\n\n건수: {close_cnt}건\n총액: {close_sum:,}원")
-                    c_diff2.error(f"⚡ **현재 업로드된 데이터**\n\n건수: {live_cnt}건\n총액: {live_sum:,}원")
+                    c_diff1, c_diff2, c_diff3, c_diff4 = st.columns(4)
+                    c_diff1.metric("➕ 추가", f"{len(added)}건", f"{int(added['입금'].sum() + added['출금'].sum()):,}원", delta_color="off")
+                    c_diff2.metric("➖ 삭제", f"{len(removed)}건", f"{int(removed['입금'].sum() + removed['출금'].sum()):,}원", delta_color="off")
+                    c_diff3.metric("🔀 분류 변경", f"{len(reclassified)}건")
+                    c_diff4.metric("✔️ 동일", f"{month_diff['unchanged']}건")
+                    
+                    diff_fmt = {'입금': '{:,.0f}', '출금': '{:,.0f}'}
+                    if not added.empty:
+                        st.markdown("**➕ 추가된 거래** (현재 데이터에만 있음)")
+                        st.dataframe(added.style.format(diff_fmt), use_container_width=True, hide_index=True)
+                    if not removed.empty:
+                        st.markdown("**➖ 삭제된 거래** (마감 데이터에만 있음)")
+                        st.dataframe(removed.style.format(diff_fmt), use_container_width=True, hide_index=True)
+                    if not reclassified.empty:
+                        st.markdown("**🔀 분류가 바뀐 거래** (마감 → 현재)")
+                        st.dataframe(reclassified.style.format(diff_fmt), use_container_width=True, hide_index=True)
                     
                     st.markdown("---")
                     b1, b2 = st.columns(2)
                     
                     # [수정 #2] 빈 데이터로 마감 덮어쓰기 방지
                     if b1.button("✅ 마감 업데이트 (현재 데이터로 덮어쓰기)", type="primary", use_container_width=True):
-                        if live_view_df.empty:
+                        update_df = _live_month_rows(selected_year, selected_month)
+                        if update_df.empty:
                             st.error("⛔ 현재 업로드된 데이터가 없습니다. 빈 데이터로 덮어쓸 수 없습니다. 파일을 먼저 업로드해주세요.")
                         else:
-                            _rev = live_view_df[live_view_df['대분류'] == '매출']['입금'].sum()
-                            _opex = live_view_df[live_view_df['대분류'] == '판관비']['출금'].sum()
-                            _etc = live_view_df[live_view_df['대분류'] == '기타비용']['출금'].sum()
-                            _invest = live_view_df[live_view_df['대분류'] == '투자']['출금'].sum()
+                            _rev = update_df[update_df['대분류'] == '매출']['입금'].sum()
+                            _opex = update_df[update_df['대분류'] == '판관비']['출금'].sum()
+                            _etc = update_df[update_df['대분류'] == '기타비용']['출금'].sum()
+                            _invest = update_df[update_df['대분류'] == '투자']['출금'].sum()
                             _net = _rev - _opex - _etc
-                            _save_closing_report(closed_file_path, live_view_df, _rev, _opex, _etc, _invest, _net)
+                            _save_closing_report(closed_file_path, update_df, _rev, _opex, _etc, _invest, _net)
+                            file_engine.seal_month(WORKSPACES_DIR, rules, selected_year, selected_month)
                             st.toast("마감 데이터가 최신으로 업데이트되었습니다!", icon="💾")
                             time.sleep(1.5)
                             st.rerun()
                         
                     if b2.button("❌ 변경 무시 (기존 마감 유지)", use_container_width=True):
                         st.toast("현재 화면은 기존 마감 데이터를 유지합니다.", icon="🛡️")
+            elif needs_check:
+                # 현재 데이터가 마감 데이터와 같음 — 봉인은 사용자가 확인할 때만 (다음부터 이 달 원본 파일은 읽지 않음)
+                st.caption("✅ 현재 데이터가 마감 데이터와 같습니다.")
+                if st.button("🔒 변경 없음 확인 (이 달 원본 파일 봉인)", use_container_width=True):
+                    file_engine.seal_month(WORKSPACES_DIR, rules, selected_year, selected_month)
+                    st.rerun()
 
         st.subheader(f"📈 {selected_year}년 {selected_month}월 손익 결산")
         
         # '투자'는 손익 계산에서 제외
-        total_rev = final_df[final_df['대분류'] == '매출']['입금'].sum()
-        total_opex = final_df[final_df['대분류'] == '판관비']['출금'].sum()
-        total_etc = final_df[final_df['대분류'] == '기타비용']['출금'].sum()
+        total_rev = aggregate_cube.total(month_cube, '매출')
+        total_opex = aggregate_cube.total(month_cube, '판관비')
+        total_etc = aggregate_cube.total(month_cube, '기타비용')
         
         # 투자금 집계
-        total_invest = final_df[final_df['대분류'] == '투자']['출금'].sum()
+        total_invest = aggregate_cube.total(month_cube, '투자')
         
         net_profit = total_rev - total_opex - total_etc
         
@@ -316,7 +385,7 @@ with tab1:
             st.markdown("### 🟦 매출 상세")
             rev_data = final_df[final_df['대분류'] == '매출']
             if not rev_data.empty:
-                grouped_rev = rev_data.groupby('소분류')['입금'].sum().sort_values(ascending=False)
+                grouped_rev = aggregate_cube.breakdown(month_cube, '매출')
                 chart_data = grouped_rev[grouped_rev > 0].reset_index()
                 chart_data.columns = ['브랜드', '매출']
                 chart_data = chart_data.dropna(subset=['매출'])
@@ -340,7 +409,7 @@ with tab1:
             st.markdown("#### 📊 판관비")
             opex_data = final_df[final_df['대분류'] == '판관비']
             if not opex_data.empty:
-                grouped_opex = opex_data.groupby('소분류')['출금'].sum().sort_values(ascending=False)
+                grouped_opex = aggregate_cube.breakdown(month_cube, '판관비')
                 for cat, val in grouped_opex.items():
                     with st.expander(f"🔴 {cat} : {int(val):,} 원"):
                         cat_data = opex_data[opex_data['소분류']==cat]
@@ -352,7 +421,7 @@ with tab1:
             st.markdown("#### 💸 기타비용")
             etc_data = final_df[final_df['대분류'] == '기타비용']
             if not etc_data.empty:
-                grouped_etc = etc_data.groupby('소분류')['출금'].sum().sort_values(ascending=False)
+                grouped_etc = aggregate_cube.breakdown(month_cube, '기타비용')
                 for cat, val in grouped_etc.items():
                     with st.expander(f"🔴 {cat} : {int(val):,} 원"):
                         cat_data = etc_data[etc_data['소분류']==cat]
@@ -405,6 +474,7 @@ with tab1:
                     save_path = os.path.join(CLOSED_DIR, f"{selected_year}년_{selected_month}월_결산보고서.xlsx")
                     # [수정 #6] 투자상세 + 요약 시트 포함
                     _save_closing_report(save_path, final_df, total_rev, total_opex, total_etc, total_invest, net_profit)
+                    file_engine.seal_month(WORKSPACES_DIR, rules, selected_year, selected_month)
                     st.success("✅ 마감 완료!")
                     time.sleep(1.5)
                     st.rerun()
@@ -538,9 +608,11 @@ with tab3:
             st.rerun()
 
     # --- 기존 루트 파일 자동 정리 안내 ---
+    # 설정(.json), 로컬 저장소(finance.db / -wal / -shm), 숨김 파일은 정리 대상 아님
     PROTECT_EXT = {'.json'}
     root_files = [f for f in os.listdir(WORKSPACES_DIR) 
                   if os.path.isfile(os.path.join(WORKSPACES_DIR, f)) 
+                  and not f.startswith('.') and not f.startswith(data_store.DB_FILE)
                   and os.path.splitext(f)[1].lower() not in PROTECT_EXT]
     if root_files:
         st.warning(f"⚠️ 정리되지 않은 파일 {len(root_files)}개가 루트에 있습니다.")
@@ -596,16 +668,23 @@ with tab3:
 
 with tab4:
     st.subheader("데이터 검증")
-    if not live_df.empty:
-        f_list = live_df['파일명'].unique()
+    # 파일 목록은 manifest 기준 (봉인되어 live_df에서 빠진 파일 포함) + 수기 입력
+    live_files = set(live_df['파일명'].astype(str).unique()) if not live_df.empty else set()
+    source_names = file_engine.source_files(WORKSPACES_DIR)
+    f_list = source_names + sorted(live_files - set(source_names))
+    if f_list:
         sel_f = st.selectbox("파일 선택", f_list)
-        f_data = live_df[live_df['파일명'] == sel_f].copy()
         
         filter_m = st.checkbox(f"{selected_year}년 {selected_month}월만 보기", value=True)
-        if filter_m:
-            s = pd.Timestamp(f"{selected_year}-{selected_month:02d}-01")
-            e = s + pd.DateOffset(months=1)
-            f_data = f_data[(f_data['날짜']>=s) & (f_data['날짜']<e)]
+        if sel_f in live_files:
+            f_data = file_engine.month_rows(live_df, selected_year, selected_month) if filter_m else live_df
+        else:
+            # 마감(봉인)된 달의 파일 — 마감 제외 없이 저장소에서 조회
+            m_start = pd.Timestamp(selected_year, selected_month, 1)
+            f_data, _ = file_engine.query_transactions(
+                WORKSPACES_DIR, rules,
+                start=m_start if filter_m else None, end=m_start + pd.offsets.MonthBegin(1) if filter_m else None)
+        f_data = f_data[f_data['파일명'] == sel_f].copy() if not f_data.empty else pd.DataFrame(columns=file_engine.OUTPUT_COLUMNS)
             
         if '__row_idx' in f_data.columns:
             f_data['엑셀 행 번호'] = f_data['__row_idx'] + 1
@@ -652,8 +731,7 @@ with tab5:
                     "출금": m_amount if m_type == "출금" else 0,
                     "메모": m_memo,
                 }
-                manual_entries.append(new_entry)
-                save_manual_entries(manual_entries)
+                data_store.add_row(DB_FILE, "manual_entries", new_entry)
                 st.success(f"저장 완료! ({m_cat}/{m_sub} {m_amount:,}원)")
                 time.sleep(1)
                 st.rerun()
@@ -690,8 +768,7 @@ with tab5:
                 f"{e['적요']} · **{direction} {amount:,}원**{memo_str}"
             )
             if ec2.button("🗑️", key=f"del_manual_{e['id']}", use_container_width=True):
-                manual_entries = [x for x in manual_entries if x['id'] != e['id']]
-                save_manual_entries(manual_entries)
+                data_store.delete_rows(DB_FILE, "manual_entries", [e['id']])
                 st.rerun()
 
     # 전체 보기
@@ -6,7 +6,6 @@ import time
 import re
 import json
 import fitz  # PyMuPDF
-import glob
 from datetime import datetime, date
 from PIL import Image
 import io
@@ -21,6 +20,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
+import data_store
+
 # =============================================================================
 # 1. 페이지 설정 및 데이터 관리
 # =============================================================================
@@ -29,9 +30,10 @@ st.set_page_config(page_title="계약 및 수납 관리", layout="wide")
 BASE_DIR = parent_dir
 CONTRACT_ROOT = os.path.join(BASE_DIR, "workspaces", "contracts")
 FILES_DIR = os.path.join(CONTRACT_ROOT, "files")
-DATA_FILE = os.path.join(CONTRACT_ROOT, "contract_list.csv")
+DATA_FILE = os.path.join(CONTRACT_ROOT, "contract_list.csv")  # 예전 저장 파일 (처음 한 번 저장소로 가져옴)
 SETTINGS_FILE = os.path.join(BASE_DIR, "workspaces", "settings.json")
 WORKSPACES_DIR = os.path.join(BASE_DIR, "workspaces")
+DB_FILE = data_store.db_path_for(WORKSPACES_DIR)
 
 os.makedirs(FILES_DIR, exist_ok=True)
 
@@ -63,46 +65,14 @@ def save_api_key(key):
 # -----------------------------------------------------------------------------
 @st.cache_data(ttl=60)
 def load_all_transactions():
-    """자금관리 메뉴의 엑셀 파일에서 입금 내역 로드"""
-    all_files = glob.glob(os.path.join(WORKSPACES_DIR, "**", "*.xlsx"), recursive=True)
-    all_tx = []
-    
-    for file in all_files:
-        try:
-            df = pd.read_excel(file)
-            df.columns = [str(c).strip() for c in df.columns]
-            
-            deposit_col = None
-            desc_col = None
-            date_col = None
-            
-            for c in df.columns:
-                if "입금" in c or "맡기신" in c: deposit_col = c
-                if "내용" in c or "적요" in c or "보낸분" in c: desc_col = c
-                if "일자" in c or "날짜" in c or "거래일" in c: date_col = c
-            
-            if deposit_col and desc_col:
-                if date_col:
-                    temp_df = df[[date_col, desc_col, deposit_col]].copy()
-                    temp_df.columns = ['날짜', '적요', '입금액']
-                    temp_df['날짜'] = temp_df['날짜'].astype(str).str[:10]
-                else:
-                    temp_df = df[[desc_col, deposit_col]].copy()
-                    temp_df.columns = ['적요', '입금액']
-                    temp_df['날짜'] = "-" 
-                
-                temp_df['입금액'] = pd.to_numeric(temp_df['입금액'], errors='coerce').fillna(0)
-                temp_df = temp_df[temp_df['입금액'] > 0]
-                temp_df['출처파일'] = os.path.basename(file)
-                all_tx.append(temp_df)
-        except: continue
-            
-    if all_tx:
-        final_df = pd.concat(all_tx, ignore_index=True)
-        if '날짜' not in final_df.columns: final_df['날짜'] = "-"
-        return final_df
-    else:
+    """자금관리 메뉴에서 반영된 입금 내역 (로컬 저장소 조회)"""
+    try:
+        tx = data_store.query_transactions(DB_FILE, min_in=1)
+    except:
         return pd.DataFrame(columns=['날짜', '적요', '입금액', '출처파일'])
+    tx = tx.rename(columns={'입금': '입금액', '파일명': '출처파일'})
+    tx['날짜'] = tx['날짜'].fillna("-")
+    return tx[['날짜', '적요', '입금액', '출처파일']]
 
 # -----------------------------------------------------------------------------
 # AI 분석 함수
@@ -157,23 +127,21 @@ def analyze_contract_with_gemini(file_bytes, file_type, api_key):
 # -----------------------------------------------------------------------------
 def load_data():
     cols = ["ID", "계약명", "거래처", "유형", "상태", "시작일", "종료일", "금액", "담당자", "파일명", "자동갱신", "비고"]
-    if os.path.exists(DATA_FILE):
-        try:
-            df = pd.read_csv(DATA_FILE)
-            for col in cols:
-                if col not in df.columns: df[col] = False if col == "자동갱신" else ""
-            df['시작일'] = pd.to_datetime(df['시작일'], errors='coerce').dt.date
-            df['종료일'] = pd.to_datetime(df['종료일'], errors='coerce').dt.date
-            df['자동갱신'] = df['자동갱신'].astype(bool)
-            df['금액'] = pd.to_numeric(df['금액'], errors='coerce').fillna(0).astype(int)
-            # ID는 문자열로 관리 (수정 시 매칭 오류 방지)
-            df['ID'] = df['ID'].astype(str)
-            return df
-        except: return pd.DataFrame(columns=cols)
-    else: return pd.DataFrame(columns=cols)
+    try:
+        # 예전 contract_list.csv는 처음 한 번 저장소로 가져옴
+        data_store.import_legacy_table(DB_FILE, "contracts", DATA_FILE)
+        df = data_store.load_table(DB_FILE, "contracts")
+        df['시작일'] = pd.to_datetime(df['시작일'], errors='coerce').dt.date
+        df['종료일'] = pd.to_datetime(df['종료일'], errors='coerce').dt.date
+        df['자동갱신'] = df['자동갱신'].astype(bool)
+        df['금액'] = pd.to_numeric(df['금액'], errors='coerce').fillna(0).astype(int)
+        # ID는 문자열로 관리 (수정 시 매칭 오류 방지)
+        df['ID'] = df['ID'].astype(str)
+        return df[cols]
+    except: return pd.DataFrame(columns=cols)
 
 def save_data(df):
-    df.to_csv(DATA_FILE, index=False)
+    data_store.save_table(DB_FILE, "contracts", df)
 
 def calculate_d_day(end_date):
     if pd.isna(end_date): return 999
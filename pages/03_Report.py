@@ -15,6 +15,8 @@ FONT_PATH = os.path.join(BASE_DIR, "assets", "NotoSansKR-VF.ttf")
 import sys
 sys.path.insert(0, BASE_DIR)
 import file_engine
+import aggregate_cube
+import closed_snapshot
 import report_generator
 import excel_report
 
@@ -34,8 +36,13 @@ def check_is_closed(year, month):
     return os.path.exists(path), path
 
 def load_closed_data(filepath):
-    try: return pd.read_excel(filepath, sheet_name="전체내역")
-    except: return pd.DataFrame()
+    # 컬럼형 스냅샷이 있으면 그것을 (체크섬 키로 계속 캐시), 없으면 엑셀을 읽고 스냅샷 생성
+    df = closed_snapshot.read(filepath)
+    if df is None:
+        try: df = pd.read_excel(filepath, sheet_name="전체내역")
+        except: return pd.DataFrame()
+        closed_snapshot.write(filepath, df)
+    return df
 
 def load_report_settings():
     if os.path.exists(REPORT_SETTINGS_FILE):
@@ -57,74 +64,65 @@ def get_data_for_month(year, month, rules):
         df = load_closed_data(closed_path)
         source = "마감"
     else:
-        df, _ = file_engine.load_and_classify_data(WORKSPACES_DIR, rules)
-        if not df.empty:
-            df['날짜'] = pd.to_datetime(df['날짜'], errors='coerce')
-            df = df[(df['날짜'].dt.year == year) & (df['날짜'].dt.month == month)]
+        start = pd.Timestamp(year=year, month=month, day=1)
+        df, _ = file_engine.query_transactions(WORKSPACES_DIR, rules, start, start + pd.DateOffset(months=1))
         source = "라이브"
     
     return df, source
 
-def build_report_data(df, year, month, all_df=None):
-    """DataFrame에서 보고서 데이터 구조 생성"""
+def build_report_data(df, year, month, cube=None):
+    """DataFrame에서 보고서 데이터 구조 생성 (전월/월별 추이는 집계 큐브 기준)"""
     if df.empty:
         return None
     
     if '날짜' not in df.columns:
         return None
     
-    df['날짜'] = pd.to_datetime(df['날짜'], errors='coerce')
+    if not pd.api.types.is_datetime64_any_dtype(df['날짜']):
+        # 마감 보고서(엑셀)에서 읽은 경우만 변환 — 라이브 데이터는 엔진에서 datetime64로 반환
+        df['날짜'] = pd.to_datetime(df['날짜'], errors='coerce')
     
-    rev_df = df[df['대분류'] == '매출']
-    opex_df = df[df['대분류'] == '판관비']
-    etc_df = df[df['대분류'] == '기타비용']
-    invest_df = df[df['대분류'] == '투자']
+    month_cube = aggregate_cube.build(df)
+    kpi = aggregate_cube.summary(month_cube)
     
-    total_rev = rev_df['입금'].sum()
-    total_opex = opex_df['출금'].sum()
-    total_etc = etc_df['출금'].sum()
+    total_rev = kpi['매출']
+    total_opex = kpi['판관비']
+    total_etc = kpi['기타비용']
     net_profit = total_rev - total_opex - total_etc
     
-    tax_rev = rev_df[rev_df['소분류'] == '세금계산서(매출)']['입금'].sum()
-    tax_exp = opex_df[opex_df['소분류'] == '세금계산서(매입)']['출금'].sum()
-    ops_cost = opex_df[opex_df['소분류'] != '세금계산서(매입)']['출금'].sum() + total_etc
+    tax_rev = aggregate_cube.total(month_cube, '매출', sub='세금계산서(매출)')
+    tax_exp = aggregate_cube.total(month_cube, '판관비', sub='세금계산서(매입)')
+    ops_cost = aggregate_cube.total(month_cube, '판관비', exclude_sub='세금계산서(매입)') + total_etc
     
-    rev_detail = rev_df.groupby('소분류')['입금'].sum().sort_values(ascending=False).to_dict()
-    exp_detail = opex_df.groupby('소분류')['출금'].sum().sort_values(ascending=False).to_dict()
+    rev_detail = aggregate_cube.breakdown(month_cube, '매출').to_dict()
+    exp_detail = aggregate_cube.breakdown(month_cube, '판관비').to_dict()
     
     # 전월 데이터
     prev_rev, prev_opex, prev_etc, prev_net = 0, 0, 0, 0
-    if all_df is not None and not all_df.empty:
+    if cube is not None and not cube.empty:
         prev_month = month - 1 if month > 1 else 12
         prev_year = year if month > 1 else year - 1
-        prev_df = all_df[(all_df['날짜'].dt.year == prev_year) & (all_df['날짜'].dt.month == prev_month)]
-        if not prev_df.empty:
-            prev_rev = prev_df[prev_df['대분류'] == '매출']['입금'].sum()
-            prev_opex = prev_df[prev_df['대분류'] == '판관비']['출금'].sum()
-            prev_etc = prev_df[prev_df['대분류'] == '기타비용']['출금'].sum()
-            prev_net = prev_rev - prev_opex - prev_etc
+        prev = aggregate_cube.summary(aggregate_cube.select(cube, prev_year, prev_month))
+        prev_rev, prev_opex, prev_etc = prev['매출'], prev['판관비'], prev['기타비용']
+        prev_net = prev_rev - prev_opex - prev_etc
     
-    # 월별 추이 (all_df 기준)
+    # 월별 추이 (큐브 기준)
     trend = {'months': [], 'revenues': [], 'expenses': []}
-    if all_df is not None and not all_df.empty:
-        year_df = all_df[all_df['날짜'].dt.year == year]
-        for m in sorted(year_df['날짜'].dt.month.dropna().unique().astype(int)):
-            mdf = year_df[year_df['날짜'].dt.month == m]
-            r = mdf[mdf['대분류'] == '매출']['입금'].sum()
-            e = mdf[mdf['대분류'].isin(['판관비', '기타비용'])]['출금'].sum()
-            if r > 0 or e > 0:
-                trend['months'].append(f"{m}월")
-                trend['revenues'].append(r)
-                trend['expenses'].append(e)
+    if cube is not None and not cube.empty:
+        for row in aggregate_cube.monthly(cube, year).itertuples(index=False):
+            if row.매출 > 0 or row.지출 > 0:
+                trend['months'].append(f"{row.월}월")
+                trend['revenues'].append(row.매출)
+                trend['expenses'].append(row.지출)
     
-    etc_detail = etc_df.groupby('소분류')['출금'].sum().sort_values(ascending=False).to_dict() if not etc_df.empty else {}
-    invest_detail = invest_df.groupby('소분류')['출금'].sum().sort_values(ascending=False).to_dict() if not invest_df.empty else {}
+    etc_detail = aggregate_cube.breakdown(month_cube, '기타비용').to_dict()
+    invest_detail = aggregate_cube.breakdown(month_cube, '투자').to_dict()
     
     return {
         'year': year, 'month': month,
         'total_rev': total_rev, 'total_opex': total_opex, 'total_etc': total_etc,
         'net_profit': net_profit,
-        'total_invest': invest_df['출금'].sum(),
+        'total_invest': kpi['투자'],
         'tax_rev': tax_rev, 'tax_exp': tax_exp, 'ops_cost': ops_cost,
         'prev_rev': prev_rev, 'prev_opex': prev_opex, 'prev_etc': prev_etc, 'prev_net': prev_net,
         'revenue_detail': rev_detail,
@@ -132,7 +130,7 @@ def build_report_data(df, year, month, all_df=None):
         'etc_detail': etc_detail,
         'invest_detail': invest_detail,
         'monthly_trend': trend,
-        '미분류_count': len(df[df['대분류'] == '미분류']),
+        '미분류_count': kpi['미분류_건수'],
     }
 
 # =============================================================================
@@ -167,13 +165,10 @@ sel_month = st.sidebar.selectbox("월", month_options,
 # --- 데이터 로드 ---
 month_df, data_source = get_data_for_month(sel_year, sel_month, rules)
 
-# 전체 데이터 (월별 추이용)
-all_df = None
+# 월별 집계 큐브 (전월 비교 / 월별 추이용)
+cube = None
 try:
-    full_df, _ = file_engine.load_and_classify_data(WORKSPACES_DIR, rules)
-    if not full_df.empty:
-        full_df['날짜'] = pd.to_datetime(full_df['날짜'], errors='coerce')
-        all_df = full_df[full_df['날짜'].notna()]
+    cube = file_engine.load_cube(WORKSPACES_DIR, rules)
 except:
     pass
 
@@ -182,7 +177,7 @@ if month_df is None or month_df.empty:
     st.info("먼저 **자금 관리** 페이지에서 파일을 업로드하고 결산을 진행해주세요.")
     st.stop()
 
-report_data = build_report_data(month_df, sel_year, sel_month, all_df)
+report_data = build_report_data(month_df, sel_year, sel_month, cube)
 
 if report_data is None:
     st.error("데이터 처리 중 오류가 발생했습니다.")
@@ -12,40 +12,39 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
+import data_store
+
 st.set_page_config(page_title="프로젝트 관리 | PMS", layout="wide")
 
 BASE_DIR = parent_dir
 CONTRACT_ROOT = os.path.join(BASE_DIR, "workspaces", "contracts")
 DATA_FILE = os.path.join(CONTRACT_ROOT, "contract_list.csv")
 PROJECT_FILE = os.path.join(CONTRACT_ROOT, "project_list.csv")
+DB_FILE = data_store.db_path_for(os.path.join(BASE_DIR, "workspaces"))  # 예전 CSV는 처음 한 번 저장소로 가져옴
 
 # -----------------------------------------------------------------------------
 # 데이터 로드/저장
 # -----------------------------------------------------------------------------
 def load_contracts():
-    if os.path.exists(DATA_FILE):
-        try:
-            df = pd.read_csv(DATA_FILE)
-            df['ID'] = df['ID'].astype(str)
-            return df
-        except: return pd.DataFrame()
-    return pd.DataFrame()
+    try:
+        data_store.import_legacy_table(DB_FILE, "contracts", DATA_FILE)
+        df = data_store.load_table(DB_FILE, "contracts")
+        df['ID'] = df['ID'].astype(str)
+        return df
+    except: return pd.DataFrame()
 
 def load_projects():
     cols = ["P_ID", "프로젝트명", "관련계약ID", "진행상태", "진행률", "담당자", "메모", "마감일"]
-    if os.path.exists(PROJECT_FILE):
-        try:
-            df = pd.read_csv(PROJECT_FILE)
-            for col in cols:
-                if col not in df.columns: df[col] = 0 if col == "진행률" else ""
-            df['마감일'] = pd.to_datetime(df['마감일'], errors='coerce').dt.date
-            df['관련계약ID'] = df['관련계약ID'].astype(str) # 비교를 위해 문자열 변환
-            return df
-        except: return pd.DataFrame(columns=cols)
-    else: return pd.DataFrame(columns=cols)
+    try:
+        data_store.import_legacy_table(DB_FILE, "projects", PROJECT_FILE)
+        df = data_store.load_table(DB_FILE, "projects")
+        df['마감일'] = pd.to_datetime(df['마감일'], errors='coerce').dt.date
+        df['관련계약ID'] = df['관련계약ID'].astype(str) # 비교를 위해 문자열 변환
+        return df[cols]
+    except: return pd.DataFrame(columns=cols)
 
 def save_projects(df):
-    df.to_csv(PROJECT_FILE, index=False)
+    data_store.save_table(DB_FILE, "projects", df)
 
 # =============================================================================
 # 메인 UI
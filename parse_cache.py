@@ -0,0 +1,128 @@
+"""
+parse_cache.py — file_engine 파싱 결과 디스크 캐시
+
+workspaces/.engine_cache/ 아래에 2단계로 저장합니다.
+  - parsed     : 파일 내용 해시 → 규칙과 무관한 파싱 결과 (엑셀 재읽기 방지)
+  - classified : 파일 내용 해시 + 규칙 버전 → 분류까지 끝난 결과
+용량 상한을 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다 (LRU).
+"""
+
+import os
+import json
+import pickle
+import hashlib
+
+CACHE_DIR_NAME = ".engine_cache"
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+
+TIER_PARSED = "parsed"
+TIER_CLASSIFIED = "classified"
+
+
+def cache_dir_for(workspaces_dir):
+    """workspaces 폴더에 대응하는 캐시 폴더 경로"""
+    return os.path.join(workspaces_dir, CACHE_DIR_NAME)
+
+
+def content_hash(raw_bytes):
+    """파일 내용 해시 (sha1)"""
+    return hashlib.sha1(raw_bytes).hexdigest()
+
+
+def file_key(content_digest, filename, parser_version):
+    """1단계 캐시 키: 내용 해시 + 파일명 (매출/매입 판별이 파일명에 의존) + 파서 버전"""
+    h = hashlib.sha1(f"{content_digest}|{filename}|{parser_version}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def rules_version(rules, extra_keywords=()):
+    """분류 규칙 버전: 규칙 내용이 바뀌면 값이 달라짐"""
+    payload = json.dumps(
+        {"rules": rules, "extra": sorted(extra_keywords)},
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _entry_path(cache_dir, tier, key):
+    return os.path.join(cache_dir, tier, f"{key}.pkl")
+
+
+def read_pickle(path):
+    """pickle 파일 로드. 없거나 손상되었으면 None (손상된 파일은 삭제)"""
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # 손상된 항목 (pandas 버전 변경 등) → 삭제 후 미스 처리
+        try: os.remove(path)
+        except OSError: pass
+        return None
+
+
+def write_pickle(path, value):
+    """pickle 파일 저장 (임시 파일 → 교체로 원자적 쓰기). 성공 여부 반환"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return True
+    except Exception:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        return False
+
+
+def cache_get(cache_dir, tier, key):
+    """캐시 항목 조회. 없거나 손상되었으면 None"""
+    path = _entry_path(cache_dir, tier, key)
+    value = read_pickle(path)
+    if value is None:
+        return None
+
+    # LRU: 사용 시각 갱신
+    try: os.utime(path, None)
+    except OSError: pass
+    return value
+
+
+def cache_put(cache_dir, tier, key, value, max_bytes=CACHE_MAX_BYTES):
+    """캐시 항목 저장 후 용량 초과 시 정리"""
+    if write_pickle(_entry_path(cache_dir, tier, key), value):
+        evict_lru(cache_dir, max_bytes)
+
+
+def evict_lru(cache_dir, max_bytes=CACHE_MAX_BYTES):
+    """전체 캐시 용량이 max_bytes 이하가 될 때까지 오래된 항목부터 삭제"""
+    entries = []
+    total = 0
+    for tier in (TIER_PARSED, TIER_CLASSIFIED):
+        tier_dir = os.path.join(cache_dir, tier)
+        if not os.path.isdir(tier_dir):
+            continue
+        for e in os.scandir(tier_dir):
+            if not e.name.endswith(".pkl"):
+                continue
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, e.path))
+            total += st.st_size
+
+    if total <= max_bytes:
+        return
+
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+        if total <= max_bytes:
+            break
@@ -0,0 +1,95 @@
+"""
+row_diff.py — 마감 데이터와 현재(라이브) 데이터의 거래 단위 비교
+
+건수/합계 비교는 무엇이 바뀌었는지 보여주지 못하고, 금액이 서로 상쇄되는 변경은 놓칩니다.
+여기서는 행을 정규화해
+  거래 키  = (날짜, 적요, 입금, 출금, 파일명) + 같은 키 안의 순번 → 64비트 해시
+  분류 값  = (대분류, 소분류)
+로 만들고, 거래 키 해시로 한 번 조인(해시 조인, 행 수에 선형)해서
+  추가(현재에만 있음) / 삭제(마감에만 있음) / 분류 변경(같은 거래, 분류만 다름)
+을 구합니다. 엑셀 행 번호(__row_idx)는 파일을 다시 받으면 밀릴 수 있어 키에서 제외합니다.
+"""
+
+import pandas as pd
+
+KEY_COLUMNS = ['날짜', '적요', '입금', '출금', '파일명']
+CLASS_COLUMNS = ['대분류', '소분류']
+SHOW_COLUMNS = ['날짜', '적요', '입금', '출금', '대분류', '소분류', '파일명']
+
+
+def _text(frame, col):
+    if col not in frame.columns:
+        return pd.Series("", index=frame.index)
+    values = frame[col].astype(object)
+    return values.where(values.notna(), "").astype(str).str.strip()
+
+
+def _amount(frame, col):
+    if col not in frame.columns:
+        return pd.Series(0, index=frame.index, dtype='int64')
+    return pd.to_numeric(frame[col], errors='coerce').fillna(0).round().astype('int64')
+
+
+def normalize(frame):
+    """비교용 정규화 (날짜는 일 단위, 금액은 정수, 문자열은 앞뒤 공백 제거) — index 유지"""
+    return pd.DataFrame({
+        '날짜': pd.to_datetime(frame['날짜'], errors='coerce').dt.normalize() if '날짜' in frame.columns
+                else pd.Series(pd.NaT, index=frame.index),
+        '적요': _text(frame, '적요'),
+        '입금': _amount(frame, '입금'),
+        '출금': _amount(frame, '출금'),
+        '파일명': _text(frame, '파일명'),
+        '대분류': _text(frame, '대분류'),
+        '소분류': _text(frame, '소분류'),
+    }, index=frame.index)
+
+
+def _hash(frame, cols):
+    return pd.util.hash_pandas_object(frame[cols], index=False).to_numpy()
+
+
+def row_keys(norm):
+    """정규화된 행 → (거래 키 해시, 분류 해시) — 같은 거래가 여러 번이면 등장 순서대로 순번을 붙여 구분"""
+    base = _hash(norm, KEY_COLUMNS)
+    seq = pd.Series(base).groupby(base, sort=False).cumcount().to_numpy()
+    keys = pd.util.hash_pandas_object(pd.DataFrame({"h": base, "n": seq}), index=False).to_numpy()
+    return keys, _hash(norm, CLASS_COLUMNS)
+
+
+def diff_rows(closed_df, live_df):
+    """
+    마감 데이터 vs 현재 데이터
+    반환: {"added": DataFrame, "removed": DataFrame, "reclassified": DataFrame, "unchanged": int}
+      - added / removed: SHOW_COLUMNS (정규화된 값)
+      - reclassified: SHOW_COLUMNS (현재 분류) + '마감_대분류', '마감_소분류'
+    """
+    old = normalize(closed_df).reset_index(drop=True)
+    new = normalize(live_df).reset_index(drop=True)
+    old_key, old_cls = row_keys(old)
+    new_key, new_cls = row_keys(new)
+
+    joined = pd.merge(
+        pd.DataFrame({"key": old_key, "old_pos": range(len(old)), "old_cls": old_cls}),
+        pd.DataFrame({"key": new_key, "new_pos": range(len(new)), "new_cls": new_cls}),
+        on="key", how="outer", indicator=True, sort=False,
+    )
+    only_old = joined[joined["_merge"] == "left_only"]["old_pos"].astype('int64')
+    only_new = joined[joined["_merge"] == "right_only"]["new_pos"].astype('int64')
+    both = joined[joined["_merge"] == "both"]
+    changed = both[both["old_cls"] != both["new_cls"]]
+
+    reclassified = new.iloc[changed["new_pos"].astype('int64')][SHOW_COLUMNS].reset_index(drop=True)
+    prev = old.iloc[changed["old_pos"].astype('int64')].reset_index(drop=True)
+    reclassified['마감_대분류'] = prev['대분류']
+    reclassified['마감_소분류'] = prev['소분류']
+
+    return {
+        "added": new.iloc[only_new][SHOW_COLUMNS].sort_values('날짜', kind='mergesort').reset_index(drop=True),
+        "removed": old.iloc[only_old][SHOW_COLUMNS].sort_values('날짜', kind='mergesort').reset_index(drop=True),
+        "reclassified": reclassified.sort_values('날짜', kind='mergesort').reset_index(drop=True),
+        "unchanged": int(len(both) - len(changed)),
+    }
+
+
+def has_changes(diff):
+    return not (diff["added"].empty and diff["removed"].empty and diff["reclassified"].empty)
@@ -0,0 +1,112 @@
+"""
+row_ids.py — 거래 행 ID (브랜드 매핑 / 선택 상태 키)
+
+예전에는 ID 컬럼들을 문자열로 이어 붙인 긴 키("파일명|2025-01|거래처|40000.0|매입(청구)|0")를
+행 단위로 만들었습니다. 여기서는
+  1) ID 컬럼들을 컬럼 단위로 해시 (pd.util.hash_pandas_object, 고정 해시 키 → 실행/프로세스가 달라도 동일)
+  2) 같은 해시 안에서 순번(cumcount)을 매겨 (해시, 순번)을 다시 해시
+해서 64비트 정수 ID를 만듭니다. brands.json 키는 이 정수의 10진 문자열입니다.
+
+예전 문자열 키로 저장된 brands.json은 migrate_mapping()으로 현재 데이터의 정수 ID로 옮깁니다.
+"""
+
+import numpy as np
+import pandas as pd
+
+AMOUNT_COL = "금액"
+
+
+def id_columns(frame, col_client):
+    """ID 구성 컬럼 (파일명, 분석_월, 거래처, 금액, 거래_유형 중 있는 것)"""
+    cols = ['자료원_파일명']
+    for c in ['분석_월', col_client, AMOUNT_COL, '거래_유형']:
+        if c in frame.columns and c not in cols:
+            cols.append(c)
+    return cols
+
+
+def _hash_rows(frame, id_cols):
+    """행별 64비트 해시 (uint64) — 금액은 정수, 나머지는 문자열 값 기준"""
+    key = {}
+    for c in id_cols:
+        if c == AMOUNT_COL:
+            key[c] = pd.to_numeric(frame[c], errors='coerce').fillna(0).round().astype('int64')
+        else:
+            key[c] = frame[c].astype(str)
+    return pd.util.hash_pandas_object(pd.DataFrame(key), index=False).to_numpy()
+
+
+def make_ids(frame, id_cols):
+    """
+    행 ID (int64 ndarray)
+    같은 내용의 행은 파일 안 등장 순서대로 순번이 붙어 서로 다른 ID가 됩니다.
+    ID가 겹치면 (해시 충돌) ValueError
+    """
+    if frame.empty:
+        return np.empty(0, dtype='int64')
+    base = _hash_rows(frame, id_cols)
+    seq = pd.Series(base).groupby(base, sort=False).cumcount().to_numpy()
+    ids = pd.util.hash_pandas_object(pd.DataFrame({"h": base, "n": seq}), index=False).to_numpy()
+    ids = ids.view('int64')
+
+    dup = collisions(ids)
+    if dup:
+        raise ValueError(f"행 ID 충돌 {dup}건")
+    return ids
+
+
+def collisions(ids):
+    """중복된 ID 수 (여러 파일을 합친 뒤 확인용)"""
+    return int(pd.Series(ids).duplicated().sum())
+
+
+def legacy_ids(frame, id_cols):
+    """예전 문자열 ID 재현 (brands.json 이전용) — 파일명이 키에 포함되므로 합친 데이터에서도 동일"""
+    parts = frame[id_cols].astype(str)
+    if AMOUNT_COL in id_cols:
+        # 예전 키는 금액을 실수 표기로 저장 (예: 40000.0)
+        parts[AMOUNT_COL] = frame[AMOUNT_COL].astype(float).astype(str)
+    base = parts[id_cols[0]].str.cat([parts[c] for c in id_cols[1:]], sep='|')
+    return base + '|' + base.groupby(base, sort=False).cumcount().astype(str)
+
+
+def migrate_mapping(mapping, frame, id_cols):
+    """
+    brands.json 매핑 → {정수 ID: 값}
+    반환: (새 매핑, 이전된 예전 키 수)
+      - 정수 문자열 키는 정수로 변환
+      - 예전 문자열 키는 frame(현재 로드된 데이터)의 같은 행 정수 ID로 변환
+      - 현재 데이터에 없는 예전 키는 그대로 유지 (해당 파일을 다시 올리면 그때 이전)
+    """
+    converted, legacy = {}, {}
+    for k, v in mapping.items():
+        try:
+            converted[int(k)] = v
+        except (TypeError, ValueError):
+            legacy[k] = v
+    if not legacy or frame.empty:
+        return {**converted, **legacy}, 0
+
+    old_to_new = dict(zip(legacy_ids(frame, id_cols), frame['id'].tolist()))
+    migrated = 0
+    for k, v in legacy.items():
+        new_id = old_to_new.get(k)
+        if new_id is None:
+            converted[k] = v
+        else:
+            # 새 키로 이미 지정된 값이 있으면 그것을 우선
+            converted.setdefault(new_id, v)
+            migrated += 1
+    return converted, migrated
+
+
+def lookup(ids, mapping):
+    """정수 ID 배열 → 매핑 값 Series (없으면 NaN) — 정수 인덱스로 한 번에 조회"""
+    ids = pd.Series(ids)
+    keys = [k for k in mapping if isinstance(k, (int, np.integer))]
+    if not keys:
+        return pd.Series(np.nan, index=ids.index, dtype=object)
+    table = pd.Series([mapping[k] for k in keys], index=pd.Index(keys, dtype='int64'), dtype=object)
+    pos = table.index.get_indexer(ids.to_numpy())
+    values = np.append(table.to_numpy(), np.nan)[pos]  # pos == -1 → NaN
+    return pd.Series(values, index=ids.index, dtype=object)
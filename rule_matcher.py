@@ -0,0 +1,148 @@
+"""
+rule_matcher.py — 분류 규칙 키워드 다중 매칭 (Aho-Corasick)
+
+규칙 파일의 모든 키워드(매출/판관비/기타비용/투자 + 중복방지)를 하나의 오토마타로 컴파일해 두고,
+적요 문자열을 한 번만 훑어서 카테고리별 당첨 규칙을 찾습니다.
+  - 당첨 규칙: 카테고리 안에서 "가장 긴 키워드" (길이가 같으면 규칙 파일 순서가 앞선 것)
+    → 기존 sorted(..., key=len, reverse=True) 후 첫 매칭과 동일
+  - 컴파일 결과는 규칙 버전별로 메모리에 보관
+"""
+
+import threading
+
+import pandas as pd
+
+import parse_cache
+
+# 매칭 대상 카테고리 (규칙 파일 키)
+RULE_CATEGORIES = ("매출", "판관비", "기타비용", "투자")
+IGNORE_COLUMN = "중복방지"
+
+_COMPILED = {}
+_COMPILED_LOCK = threading.Lock()
+_COMPILED_MAX = 8
+
+
+def _build_automaton(patterns):
+    """
+    패턴 리스트 → (goto, fail, out)
+    goto[node] = {문자: 다음 node}, out[node] = 해당 node에서 끝나는 패턴 번호들 (fail 경로 포함)
+    """
+    goto = [{}]
+    out = [[]]
+    for pid, pattern in enumerate(patterns):
+        node = 0
+        for ch in pattern:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                out.append([])
+            node = nxt
+        out[node].append(pid)
+
+    # BFS로 fail 링크 연결
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    head = 0
+    while head < len(queue):
+        node = queue[head]
+        head += 1
+        for ch, nxt in goto[node].items():
+            queue.append(nxt)
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            out[nxt] = out[nxt] + out[fail[nxt]]
+    return goto, fail, out
+
+
+def compile_rules(rules, ignore_keywords=()):
+    """
+    규칙 dict → 매처
+    반환: {"goto", "fail", "out", "targets", "categories"}
+      targets[패턴 번호] = [(카테고리, 순위, 값)] — 순위가 낮을수록 우선 (긴 키워드 → 규칙 파일 순서)
+    """
+    patterns = []
+    index = {}
+    targets = []
+
+    def _add(keyword, target):
+        pid = index.get(keyword)
+        if pid is None:
+            pid = index[keyword] = len(patterns)
+            patterns.append(keyword)
+            targets.append([])
+        targets[pid].append(target)
+
+    categories = [c for c in RULE_CATEGORIES if rules.get(c)]
+    for category in categories:
+        # 안정 정렬이므로 길이가 같으면 규칙 파일 순서 유지
+        ordered = sorted(rules[category].items(), key=lambda x: len(x[0]), reverse=True)
+        for rank, (k, v) in enumerate(ordered):
+            _add(str(k), (category, rank, v))
+
+    for k in ignore_keywords:
+        _add(str(k), (IGNORE_COLUMN, 0, True))
+
+    goto, fail, out = _build_automaton(patterns)
+    return {"goto": goto, "fail": fail, "out": out, "targets": targets, "categories": categories}
+
+
+def get_matcher(rules, ignore_keywords=()):
+    """규칙 버전별로 컴파일 결과를 재사용"""
+    ver = parse_cache.rules_version(rules, ignore_keywords)
+    with _COMPILED_LOCK:
+        matcher = _COMPILED.get(ver)
+        if matcher is None:
+            matcher = compile_rules(rules, ignore_keywords)
+            if len(_COMPILED) >= _COMPILED_MAX:
+                _COMPILED.pop(next(iter(_COMPILED)))
+            _COMPILED[ver] = matcher
+    return matcher
+
+
+def match(matcher, text):
+    """
+    문자열 하나를 한 번 훑어 카테고리별 당첨 규칙 값 반환
+    반환: {카테고리: 값, ...} (매칭된 카테고리만) + 중복방지 키워드 포함 시 {"중복방지": True}
+    """
+    goto, fail, out, targets = matcher["goto"], matcher["fail"], matcher["out"], matcher["targets"]
+
+    hits = set(out[0])  # 빈 키워드는 항상 매칭
+    node = 0
+    for ch in str(text):
+        while node and ch not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(ch, 0)
+        if out[node]:
+            hits.update(out[node])
+
+    best = {}
+    for pid in hits:
+        for category, rank, value in targets[pid]:
+            cur = best.get(category)
+            if cur is None or rank < cur[0]:
+                best[category] = (rank, value)
+    return {category: value for category, (rank, value) in best.items()}
+
+
+def match_frame(matcher, texts):
+    """
+    적요 Series 전체 매칭 (고유 값만 매칭 후 펼침)
+    반환: texts와 같은 index의 DataFrame
+      - 카테고리 컬럼: 당첨 규칙 값 (없으면 None)
+      - "중복방지" 컬럼: 중복방지 키워드 포함 여부
+    """
+    codes, uniques = pd.factorize(texts.astype(str), sort=False)
+    results = [match(matcher, u) for u in uniques]
+
+    frame = {}
+    for category in matcher["categories"]:
+        vals = pd.Series([r.get(category) for r in results] + [None], dtype=object)
+        frame[category] = vals.to_numpy()[codes]
+    ignored = pd.Series([r.get(IGNORE_COLUMN, False) for r in results] + [False], dtype=bool)
+    frame[IGNORE_COLUMN] = ignored.to_numpy()[codes]
+    return pd.DataFrame(frame, index=texts.index)
@@ -0,0 +1,285 @@
+"""
+warehouse.py — 분류된 거래의 연/월 분할 Parquet 저장소 (workspaces/.warehouse)
+
+업로드 폴더(workspaces/{YYYY}년/{M}월/)와 같은 단위로 나눠 저장합니다.
+  year=2025/month=3/{원본 파일 키}.parquet   ← 원본 파일 하나의 해당 월 행
+  year=2023/compact.parquet                 ← 지난 연도는 한 파일로 압축 (날짜순, row group 통계 포함)
+기간 조회(read_period)는 기간에 걸친 파일만 고르고, 날짜 조건(row group 통계로 건너뜀)과
+필요한 컬럼만 읽습니다.
+
+pyarrow가 없으면 available()이 False — file_engine은 SQLite 저장소(data_store)를 사용합니다.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+import datetime as dt
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+WAREHOUSE_DIR = ".warehouse"
+INDEX_FILE = "_index.json"
+INDEX_VERSION = 1
+COMPACT_FILE = "compact.parquet"
+
+# 압축 파일 row group 크기 (날짜순 정렬 후 기록 → row group별 날짜 최소/최대 통계로 건너뛰기)
+ROW_GROUP_SIZE = 65536
+
+# 저장 컬럼 (file_engine.OUTPUT_COLUMNS + 원본 파일 경로/파일 내 순서)
+COLUMNS = ["rel", "seq", "날짜", "__row_idx", "적요", "입금", "출금", "파일명", "대분류", "소분류"]
+
+_LOCK = threading.Lock()
+
+
+def available():
+    return pa is not None
+
+
+def root_for(workspaces_dir):
+    return os.path.join(workspaces_dir, WAREHOUSE_DIR)
+
+
+def _schema():
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("rel", text), ("seq", pa.int64()), ("날짜", pa.timestamp("ns")), ("__row_idx", pa.int64()),
+        ("적요", pa.string()), ("입금", pa.int64()), ("출금", pa.int64()),
+        ("파일명", text), ("대분류", text), ("소분류", text),
+    ])
+
+
+def _file_key(rel):
+    return hashlib.sha1(rel.encode("utf-8")).hexdigest()[:16]
+
+
+def _month_dir(root, year, month):
+    return os.path.join(root, f"year={year}", f"month={month}")
+
+
+def _read_index(root):
+    try:
+        with open(os.path.join(root, INDEX_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return {"files": {}, "compacted": {}}
+        return {"files": data.get("files", {}), "compacted": data.get("compacted", {})}
+    except Exception:
+        return {"files": {}, "compacted": {}}
+
+
+def _write_index(root, index):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, INDEX_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, **index}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _write_parquet(table, path, sort=False):
+    if sort:
+        table = table.sort_by([("날짜", "ascending"), ("seq", "ascending")])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, write_statistics=True)
+    os.replace(tmp_path, path)
+
+
+def _to_table(rel, rows):
+    """분류된 행 DataFrame → Arrow 테이블 (저장 스키마)"""
+    frame = pd.DataFrame({
+        "rel": rel,
+        "seq": range(len(rows)),
+        "날짜": pd.to_datetime(rows["날짜"], errors="coerce").to_numpy(),
+        "__row_idx": rows["__row_idx"].astype("int64").to_numpy(),
+        "적요": rows["적요"].astype(str).to_numpy(dtype=object),
+        "입금": rows["입금"].astype("int64").to_numpy(),
+        "출금": rows["출금"].astype("int64").to_numpy(),
+        "파일명": rows["파일명"].astype(str).to_numpy(dtype=object),
+        "대분류": rows["대분류"].astype(str).to_numpy(dtype=object),
+        "소분류": rows["소분류"].astype(str).to_numpy(dtype=object),
+    })
+    return pa.Table.from_pandas(frame, schema=_schema(), preserve_index=False)
+
+
+# =============================================================================
+# 쓰기 (file_engine이 원본 파일 단위로 반영)
+# =============================================================================
+def _intact_rels(root, index):
+    """색인에 있는 원본 파일 중 기록한 Parquet 파일(월 파일 / 압축된 연도 파일)이 모두 남아 있는 것"""
+    broken = set()
+    for year, rels in index["compacted"].items():
+        if rels and not os.path.exists(os.path.join(root, f"year={year}", COMPACT_FILE)):
+            broken.update(rels)
+    for rel, rec in index["files"].items():
+        key = _file_key(rel)
+        for part in rec.get("partitions", []):
+            year, month = part.split("-")
+            if not os.path.exists(os.path.join(_month_dir(root, int(year), int(month)), f"{key}.parquet")):
+                broken.add(rel)
+                break
+    return set(index["files"]) - broken
+
+
+def file_versions(root):
+    """
+    반영된 원본 파일 → (내용 해시, 규칙 버전)
+    Parquet 파일이 지워진(폴더 정리 등) 원본 파일은 (None, None) → file_engine이 다시 기록하거나 삭제
+    """
+    with _LOCK:
+        index = _read_index(root)
+        intact = _intact_rels(root, index)
+        return {rel: (rec["hash"], rec["rules_ver"]) if rel in intact else (None, None)
+                for rel, rec in index["files"].items()}
+
+
+def _drop_rel(root, index, rel):
+    """원본 파일 rel의 행 제거 (월 파일 삭제, 압축된 연도 파일은 해당 행만 빼고 다시 씀)"""
+    rec = index["files"].pop(rel, None)
+    if rec is None:
+        return
+    key = _file_key(rel)
+    for part in rec.get("partitions", []):
+        year, month = part.split("-")
+        path = os.path.join(_month_dir(root, int(year), int(month)), f"{key}.parquet")
+        if os.path.exists(path):
+            os.remove(path)
+    for year, rels in index["compacted"].items():
+        if rel in rels:
+            path = os.path.join(root, f"year={year}", COMPACT_FILE)
+            if os.path.exists(path):
+                table = pq.read_table(path, partitioning=None)
+                mask = pc.not_equal(pc.cast(table["rel"], pa.string()), rel)
+                _write_parquet(table.filter(mask), path)
+            rels.remove(rel)
+
+
+def write_file_rows(root, updates, removed=()):
+    """
+    원본 파일 단위로 행 교체 (data_store.write_file_rows와 같은 형식)
+    updates: {rel: (내용 해시, 규칙 버전, DataFrame | None)}
+    반영 후 지난 연도는 연도별 한 파일로 압축
+    """
+    with _LOCK:
+        index = _read_index(root)
+        # Parquet 파일이 지워진 원본 파일은 색인에서도 빼 둠 (압축 파일을 다시 쓰면 멀쩡해 보이지 않도록)
+        for rel in set(index["files"]) - _intact_rels(root, index):
+            _drop_rel(root, index, rel)
+        for rel in removed:
+            _drop_rel(root, index, rel)
+
+        for rel, (digest, rules_ver, rows) in updates.items():
+            _drop_rel(root, index, rel)
+            partitions = []
+            if rows is not None and not rows.empty:
+                table = _to_table(rel, rows)
+                dates = pd.to_datetime(rows["날짜"], errors="coerce")
+                periods = (dates.dt.year * 100 + dates.dt.month).to_numpy()
+                for period in sorted(set(periods[pd.notna(periods)].astype(int))):
+                    year, month = divmod(int(period), 100)
+                    part = table.filter(pa.array(periods == period))
+                    _write_parquet(part, os.path.join(_month_dir(root, year, month), f"{_file_key(rel)}.parquet"))
+                    partitions.append(f"{year}-{month}")
+            index["files"][rel] = {"hash": digest, "rules_ver": rules_ver, "partitions": partitions}
+
+        compact_old_years(root, index)
+        _write_index(root, index)
+
+
+def compact_old_years(root, index, today=None):
+    """올해 이전 연도의 월 파일들을 year=YYYY/compact.parquet 하나로 합침 (기존 압축 파일 포함)"""
+    this_year = (today or dt.date.today()).year
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        if not name.startswith("year="):
+            continue
+        year = int(name[5:])
+        year_dir = os.path.join(root, name)
+        month_dirs = [d for d in os.listdir(year_dir) if d.startswith("month=")]
+        if year >= this_year or not month_dirs:
+            continue
+
+        paths = [os.path.join(year_dir, d, f) for d in month_dirs
+                 for f in os.listdir(os.path.join(year_dir, d)) if f.endswith(".parquet")]
+        compact_path = os.path.join(year_dir, COMPACT_FILE)
+        if os.path.exists(compact_path):
+            paths.append(compact_path)
+        tables = [pq.read_table(p, partitioning=None) for p in paths]
+        if tables:
+            table = pa.concat_tables([t.cast(_schema()) for t in tables])
+            _write_parquet(table, compact_path, sort=True)
+
+        moved = set(index["compacted"].get(str(year), []))
+        for rel, rec in index["files"].items():
+            kept = [p for p in rec.get("partitions", []) if not p.startswith(f"{year}-")]
+            if len(kept) != len(rec.get("partitions", [])):
+                rec["partitions"] = kept
+                moved.add(rel)
+        index["compacted"][str(year)] = sorted(moved)
+        for d in month_dirs:
+            shutil.rmtree(os.path.join(year_dir, d), ignore_errors=True)
+
+
+# =============================================================================
+# 읽기
+# =============================================================================
+def _files_for_period(root, start, end):
+    """기간 [start, end)에 걸친 Parquet 파일 목록 (연/월 폴더 이름으로 선별)"""
+    lo = (start.year, start.month) if start is not None else None
+    hi = ((end - pd.Timedelta(days=1)).year, (end - pd.Timedelta(days=1)).month) if end is not None else None
+
+    files = []
+    if not os.path.isdir(root):
+        return files
+    for name in sorted(os.listdir(root)):
+        if not name.startswith("year="):
+            continue
+        year = int(name[5:])
+        if (lo and year < lo[0]) or (hi and year > hi[0]):
+            continue
+        year_dir = os.path.join(root, name)
+        for entry in sorted(os.listdir(year_dir)):
+            path = os.path.join(year_dir, entry)
+            if entry == COMPACT_FILE:
+                files.append(path)
+            elif entry.startswith("month="):
+                month = int(entry[6:])
+                if (lo and (year, month) < lo) or (hi and (year, month) > hi):
+                    continue
+                files.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".parquet"))
+    return files
+
+
+def read_period(root, start=None, end=None, columns=None):
+    """
+    기간 [start, end) 행 읽기 — 해당 연/월 파일만, 날짜 조건은 row group 통계로 건너뜀
+    columns: 읽을 컬럼 (None이면 전체, rel/seq는 항상 포함)
+    반환: DataFrame (범주형 컬럼은 category)
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    cols = COLUMNS if columns is None else ["rel", "seq"] + [c for c in columns if c not in ("rel", "seq")]
+
+    with _LOCK:
+        files = _files_for_period(root, start, end)
+        if not files:
+            return pd.DataFrame(columns=cols)
+
+        condition = None
+        if start is not None:
+            condition = ds.field("날짜") >= pa.scalar(start, pa.timestamp("ns"))
+        if end is not None:
+            upper = ds.field("날짜") < pa.scalar(end, pa.timestamp("ns"))
+            condition = upper if condition is None else condition & upper
+        dataset = ds.dataset(files, schema=_schema(), format="parquet")
+        table = dataset.to_table(columns=cols, filter=condition)
+    return table.to_pandas()
@@ -0,0 +1,135 @@
+"""
+workspace_manifest.py — workspaces/년/월 원본 파일 목록(manifest) 관리
+
+경로별 크기 / 수정시각 / 내용 해시를 기록해 두고,
+다음 로드 때 추가·변경·삭제된 파일만 골라냅니다.
+마감된 달은 마감 시점의 파일 해시를 봉인(closed_months.json)으로 남겨 변경 여부만 확인합니다.
+"""
+
+import os
+import json
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 읽기 대상 확장자 (순서 = 로딩 순서)
+SOURCE_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+
+def scan_workspace(workspaces_dir):
+    """
+    원본 파일 목록을 한 번의 순회로 수집
+    반환: {상대경로: (size, mtime_ns)} — 확장자 순서(xlsx → xls → csv), 경로순 정렬
+    숨김 폴더(.engine_cache 등)와 숨김 파일은 제외
+    """
+    found = {ext: [] for ext in SOURCE_EXTENSIONS}
+    for root, dirs, files in os.walk(workspaces_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for fname in files:
+            if fname.startswith("."):
+                continue
+            ext = os.path.splitext(fname)[1].lower()
+            if ext not in found:
+                continue
+            path = os.path.join(root, fname)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, workspaces_dir)
+            found[ext].append((rel, (st.st_size, st.st_mtime_ns)))
+
+    scanned = {}
+    for ext in SOURCE_EXTENSIONS:
+        for rel, stat in sorted(found[ext]):
+            scanned[rel] = stat
+    return scanned
+
+
+def load_manifest(cache_dir):
+    """저장된 manifest 로드 → {상대경로: {"size", "mtime_ns", "hash"}}"""
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("files", {})
+    except Exception:
+        return {}
+
+
+def save_manifest(cache_dir, files):
+    """manifest 저장 (임시 파일 → 교체)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": files}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+    except Exception:
+        try: os.remove(tmp_path)
+        except OSError: pass
+
+
+def diff_manifest(manifest, scanned):
+    """
+    manifest와 현재 스캔 결과 비교
+    반환: (added, changed, deleted)
+      - added   : manifest에 없는 경로
+      - changed : 크기 또는 수정시각이 달라진 경로 (내용 해시는 호출 측에서 확인)
+      - deleted : 디스크에서 사라진 경로
+    """
+    added, changed = [], []
+    for rel, (size, mtime_ns) in scanned.items():
+        rec = manifest.get(rel)
+        if rec is None:
+            added.append(rel)
+        elif rec.get("size") != size or rec.get("mtime_ns") != mtime_ns:
+            changed.append(rel)
+    deleted = [rel for rel in manifest if rel not in scanned]
+    return added, changed, deleted
+
+
+# =============================================================================
+# 마감된 달 봉인 (closed_months.json)
+# =============================================================================
+SEALS_FILE = "closed_months.json"
+
+
+def load_seals(cache_dir):
+    """
+    마감 시점의 원본 파일 해시와 분류 규칙 버전 → {(연, 월): {"rules_ver": 규칙 버전, "files": {상대경로: 내용 해시}}}
+    규칙 버전 없이 기록된 예전 봉인은 rules_ver None
+    """
+    path = os.path.join(cache_dir, SEALS_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        seals = {}
+        for key, seal in data.get("months", {}).items():
+            year, month = key.split("-")
+            if not isinstance(seal.get("files"), dict):
+                seal = {"rules_ver": None, "files": seal}
+            seals[(int(year), int(month))] = seal
+        return seals
+    except Exception:
+        return {}
+
+
+def save_seals(cache_dir, seals):
+    """봉인 기록 저장 (임시 파일 → 교체)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, SEALS_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    months = {f"{year}-{month}": files for (year, month), files in sorted(seals.items())}
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "months": months}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+    except Exception:
+        try: os.remove(tmp_path)
+        except OSError: pass
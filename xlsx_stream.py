@@ -0,0 +1,158 @@
+"""
+xlsx_stream.py — 스트리밍 엑셀 저장 (마감 보고서 / 정산 엑셀)
+
+pd.ExcelWriter + to_excel은 통합 문서 전체를 메모리에 만든 뒤 저장하고,
+같은 행을 전체내역과 상세 시트에 쓸 때마다 셀 값을 다시 변환합니다.
+여기서는
+  - 컬럼마다 한 번만 파이썬 값으로 변환하고 서식(날짜 / 천 단위 구분 정수)을 미리 정해 두고
+  - 상세 시트는 partition()으로 한 번 나눈 행 위치로 같은 변환 결과를 골라 쓰며
+  - 행을 순서대로 흘려 씁니다 (xlsxwriter constant_memory, 없으면 openpyxl write_only)
+읽는 쪽(pd.read_excel)에서 보면 to_excel로 저장한 파일과 값이 같습니다.
+('='로 시작하는 적요는 수식이 아니라 문자열로 저장 — to_excel은 수식으로 저장해 값이 0으로 보였음)
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+DATE_FORMAT = "yyyy-mm-dd"
+INT_FORMAT = "#,##0"
+
+
+def partition(frame, col, labels):
+    """
+    frame을 col 값으로 한 번에 나눈 행 위치 {라벨: 위치 배열} (labels에 없는 값은 버림, 없는 라벨은 빠짐)
+    """
+    if frame.empty or col not in frame.columns:
+        return {}
+    groups = frame.groupby(col, sort=False, observed=True).indices
+    return {label: groups[label] for label in labels if label in groups}
+
+
+def _column(series):
+    """컬럼 → (종류, 서식, 값 배열) — 값은 파이썬 객체, 빈 값은 None"""
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        kind, fmt = "date", DATE_FORMAT
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_localize(None)
+    elif pd.api.types.is_bool_dtype(series.dtype):
+        kind, fmt = "bool", None
+    elif pd.api.types.is_integer_dtype(series.dtype):
+        kind, fmt = "number", INT_FORMAT
+    elif pd.api.types.is_float_dtype(series.dtype):
+        whole = series[~missing]
+        kind, fmt = "number", (INT_FORMAT if np.array_equal(whole, whole.round()) else None)
+    else:
+        kind, fmt = "value", None
+    values = series.astype(object).to_numpy()
+    if missing.any():
+        values = values.copy()
+        values[missing] = None
+    return kind, fmt, values
+
+
+def _prepare(sheets):
+    """시트 목록 → [(시트 이름, 헤더, 컬럼 목록)] (같은 DataFrame은 한 번만 변환)"""
+    converted = {}
+    prepared = []
+    for sheet in sheets:
+        name, frame = sheet[0], sheet[1]
+        positions = sheet[2] if len(sheet) > 2 else None
+        key = id(frame)
+        if key not in converted:
+            converted[key] = (frame, [_column(frame[c]) for c in frame.columns])
+        columns = converted[key][1]
+        if positions is not None:
+            columns = [(kind, fmt, values[positions]) for kind, fmt, values in columns]
+        prepared.append((name, [str(c) for c in frame.columns], columns))
+    return prepared
+
+
+def write_sheets(target, sheets):
+    """
+    시트 목록을 엑셀로 저장
+    target: 파일 경로 또는 BytesIO
+    sheets: [(시트 이름, DataFrame) 또는 (시트 이름, DataFrame, 행 위치 배열), ...]
+    """
+    prepared = _prepare(sheets)
+    if xlsxwriter is not None:
+        _write_xlsxwriter(target, prepared)
+    else:
+        _write_openpyxl(target, prepared)
+
+
+def _write_xlsxwriter(target, prepared):
+    workbook = xlsxwriter.Workbook(target, {
+        "constant_memory": True, "default_date_format": DATE_FORMAT,
+        "strings_to_numbers": False, "strings_to_formulas": False, "strings_to_urls": False,
+    })
+    header_fmt = workbook.add_format({"bold": True})
+    formats = {fmt: workbook.add_format({"num_format": fmt}) for fmt in (DATE_FORMAT, INT_FORMAT)}
+    try:
+        for name, header, columns in prepared:
+            ws = workbook.add_worksheet(name)
+            ws.write_row(0, 0, header, header_fmt)
+            writers = []
+            for kind, fmt, _ in columns:
+                write = {"date": ws.write_datetime, "number": ws.write_number,
+                         "bool": ws.write_boolean}.get(kind, ws.write)
+                writers.append((write, formats.get(fmt)))
+            cells = list(enumerate(writers))
+            for r, row in enumerate(zip(*[values for _, _, values in columns]), start=1):
+                for c, (write, cell_fmt) in cells:
+                    value = row[c]
+                    if value is not None:
+                        write(r, c, value, cell_fmt)
+    finally:
+        workbook.close()
+
+
+def _as_text_cells(ws, values):
+    formulas = [i for i, v in enumerate(values) if isinstance(v, str) and v.startswith("=")]
+    if not formulas:
+        return values
+    values = values.copy()
+    for i in formulas:
+        cell = WriteOnlyCell(ws, value=values[i])
+        cell.data_type = "s"
+        values[i] = cell
+    return values
+
+
+def _write_openpyxl(target, prepared):
+    workbook = Workbook(write_only=True)
+    bold = Font(bold=True)
+    for name, header, columns in prepared:
+        ws = workbook.create_sheet(name)
+        header_cells = []
+        for text in header:
+            cell = WriteOnlyCell(ws, value=text)
+            cell.font = bold
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        # '='로 시작하는 문자열은 수식이 아니라 문자열로 (xlsxwriter의 strings_to_formulas=False와 동일)
+        arrays = [_as_text_cells(ws, values) if kind == "value" else values for kind, _, values in columns]
+        formats = [fmt for _, fmt, _ in columns]
+        if not any(formats):
+            for row in zip(*arrays):
+                ws.append(row)
+            continue
+        for row in zip(*arrays):
+            out = list(row)
+            for c, fmt in enumerate(formats):
+                if fmt and out[c] is not None:
+                    cell = WriteOnlyCell(ws, value=out[c])
+                    cell.number_format = fmt
+                    out[c] = cell
+            ws.append(out)
+    workbook.save(target)